@@ -0,0 +1,237 @@
+"""Wall time, requests and bytes of CLI commands against a fake Trello
+
+Usage: python benchmarks/bench_cli.py [--boards N] [--lists N]
+       [--cards N] [--comments N] [--latency MS] [--throttle-every N]
+       [--runs N] [--compare REV|FILE] [--tolerance PCT] [--payload]
+
+Each case runs the real `commands` entry point in this process against
+the fake API in benchmarks/fake_trello.py. Every run starts from a fresh
+account, an empty home and cache directory, new connections and a new
+rate limiter, like a first run in a new process. The medians are saved
+to .benchmarks/<commit>.json. --compare prints the change from an
+earlier result and exits with 1 if a case now sends more requests or
+bytes, or is slower by more than the tolerance.
+
+--payload instead prints a Markdown table of the bytes every case
+receives with fields=all and with the fields its models render.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS = ROOT / ".benchmarks"
+
+sys.path.insert(0, str(ROOT))
+
+from fake_trello import Account, FakeTrello, oid  # noqa: E402
+
+BOARD, LIST, CARD = oid(1, 0), oid(3, 0, 0), oid(4, 0, 0, 0)
+CASES = {
+    "board show -a": ["board", "show", "-a"],
+    "list show -a": ["list", "show", "-a"],
+    "card show -a": ["card", "show", "-a"],
+    "board show -i": ["board", "show", "-i", BOARD],
+    "list show -i": ["list", "show", "-i", LIST],
+    "card show -i": ["card", "show", "-i", CARD],
+    "card add": ["card", "add", "-l", LIST, "-t", "New", "-c", "green"],
+}
+METRICS = ("wall_ms", "requests", "bytes")
+
+
+def commit():
+    """Return the current commit, marked dirty if trellolo has changes"""
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+
+    rev = git("rev-parse", "--short", "HEAD") or "unknown"
+    if git("status", "--porcelain", "--", "trellolo"):
+        rev += "-dirty"
+    return rev
+
+
+def load_result(ref):
+    """Load a saved result from a file, or by git revision"""
+    path = Path(ref)
+    if not path.is_file():
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", ref], cwd=ROOT,
+            capture_output=True, text=True,
+        ).stdout.strip()
+        path = RESULTS / f"{rev or ref}.json"
+    return json.loads(path.read_text())
+
+
+def run_case(server, args, sizes, home, options):
+    """Run one command from a clean state, returning its measurements"""
+    from click.testing import CliRunner
+    from trellolo.commands import commands
+    from trellolo.ratelimit import RateLimiter
+    from trellolo.trelloapi import TrelloAPI
+
+    shutil.rmtree(home)
+    home.mkdir()
+    server.account = Account(**sizes)
+    server.reset_stats()
+    TrelloAPI.close()
+    TrelloAPI.rate_limiter = RateLimiter()
+
+    start = perf_counter()
+    result = CliRunner().invoke(
+        commands, ["-k", "key", "-t", "token", *options, *args]
+    )
+    wall = perf_counter() - start
+    if result.exit_code:
+        raise SystemExit(
+            f"trellolo {' '.join(args)} failed:\n{result.output}"
+        )
+    return {
+        "wall_ms": wall * 1000,
+        "requests": server.stats["requests"],
+        "bytes": server.stats["bytes"],
+        "throttled": server.stats["throttled"],
+    }
+
+
+def all_fields():
+    """Have every query ask for all fields, as before the projections"""
+    from trellolo.trello import Comment, TrelloObject
+
+    TrelloObject.projection = classmethod(lambda cls: "all")
+    Comment.member_fields = ["all"]
+
+
+def payload(server, sizes, home, options):
+    """Print the bytes of every case with all fields, then projected"""
+    cases = {
+        name: run_case(server, args, sizes, home, options)["bytes"]
+        for name, args in CASES.items()
+    }
+    all_fields()
+    print("| command | fields=all | projected | saved |")
+    print("|---|--:|--:|--:|")
+    for name, args in CASES.items():
+        before = run_case(server, args, sizes, home, options)["bytes"]
+        after = cases[name]
+        print(
+            f"| `{name}` | {before:,} | {after:,} "
+            f"| {(before - after) / before:.0%} |"
+        )
+
+
+def compare(results, previous, tolerance):
+    """Print the change of every metric, returning whether one regressed"""
+    if previous["settings"] != results["settings"]:
+        print(f"warning: {previous['commit']} used other settings")
+    print(f"\nchange from {previous['commit']}")
+    regressed = False
+    for name, now in results["cases"].items():
+        before = previous["cases"].get(name)
+        if before is None:
+            continue
+        changes = []
+        for metric in METRICS:
+            old, new = before[metric], now[metric]
+            pct = (new - old) / old * 100 if old else 0
+            changes.append(f"{metric} {pct:+.0f}%")
+            limit = tolerance if metric == "wall_ms" else 0
+            regressed = regressed or pct > limit
+        print(f"{name:<16}{'  '.join(changes)}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boards", type=int, default=3)
+    parser.add_argument("--lists", type=int, default=5)
+    parser.add_argument("--cards", type=int, default=20)
+    parser.add_argument("--comments", type=int, default=2)
+    parser.add_argument(
+        "--latency", type=float, default=20, metavar="MS",
+        help="delay added to every response",
+    )
+    parser.add_argument(
+        "--throttle-every", type=int, default=0, metavar="N",
+        help="answer every Nth request with a 429",
+    )
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--compare", metavar="REV|FILE")
+    parser.add_argument("--tolerance", type=float, default=20, metavar="PCT")
+    parser.add_argument(
+        "--payload", action="store_true",
+        help="print the bytes saved by requesting only the rendered fields",
+    )
+    args = parser.parse_args(argv)
+    # Read first, as the result compared with may be the one replaced
+    previous = load_result(args.compare) if args.compare else None
+
+    # Keep the config, credential and response caches out of the real home
+    home = Path(tempfile.mkdtemp(prefix="trellolo-bench-")) / "home"
+    home.mkdir()
+    os.environ["HOME"] = str(home)
+    os.environ["XDG_CACHE_HOME"] = str(home / ".cache")
+    from trellolo.trelloapi import TrelloAPI
+
+    sizes = {
+        "boards": args.boards, "lists": args.lists,
+        "cards": args.cards, "comments": args.comments,
+    }
+    server = FakeTrello(
+        latency=args.latency / 1000, throttle_every=args.throttle_every
+    ).start()
+    TrelloAPI.base_url = server.url
+    options = ["--concurrency", str(args.concurrency)]
+    if args.payload:
+        try:
+            payload(server, sizes, home, options)
+        finally:
+            server.stop()
+            shutil.rmtree(home.parent)
+        return 0
+    results = {
+        "commit": commit(),
+        "settings": dict(
+            sizes, latency=args.latency, throttle_every=args.throttle_every,
+            concurrency=args.concurrency,
+        ),
+        "cases": {},
+    }
+    print(f"{'case':<16}{'wall ms':>10}{'requests':>10}{'bytes':>10}"
+          f"{'429s':>6}")
+    try:
+        for name, case_args in CASES.items():
+            runs = [
+                run_case(server, case_args, sizes, home, options)
+                for _ in range(args.runs)
+            ]
+            case = {m: median(r[m] for r in runs) for m in runs[0]}
+            results["cases"][name] = case
+            print(
+                f"{name:<16}{case['wall_ms']:>10.1f}{case['requests']:>10.0f}"
+                f"{case['bytes']:>10.0f}{case['throttled']:>6.0f}"
+            )
+    finally:
+        server.stop()
+        shutil.rmtree(home.parent)
+
+    RESULTS.mkdir(exist_ok=True)
+    path = RESULTS / f"{results['commit']}.json"
+    path.write_text(json.dumps(results, indent=2))
+    print(f"saved {path.relative_to(ROOT)}")
+    if previous and compare(results, previous, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Decoding time of each installed JSON backend on board payloads
+
+Usage: python benchmarks/bench_json.py [--cache] [PAYLOAD.json ...]
+
+Payloads are raw response bodies saved to files. --cache also uses the
+bodies in trellolo's response cache, so running a few commands first
+records real boards. With neither, a synthetic board tree is used.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from timeit import repeat
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_models import synthetic_board  # noqa: E402
+from trellolo.cache import ResponseCache  # noqa: E402
+from trellolo.decoder import JSONDecoder  # noqa: E402
+
+
+def synthetic_payload(cards):
+    info, actions = synthetic_board(cards)
+    info["actions"] = actions
+    return json.dumps(info).encode()
+
+
+def cached_payloads():
+    """Return the response bodies in the on-disk cache, re-encoded"""
+    payloads = []
+    for entry_file in ResponseCache.entries():
+        body = json.loads(entry_file.read_bytes())["body"]
+        payloads.append(json.dumps(body).encode())
+    return payloads
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("payloads", nargs="*", type=Path)
+    parser.add_argument("--cache", action="store_true")
+    parser.add_argument("--cards", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    payloads = [p.read_bytes() for p in args.payloads]
+    if args.cache:
+        payloads += cached_payloads()
+    if not payloads:
+        payloads = [synthetic_payload(args.cards)]
+    size = sum(len(p) for p in payloads)
+    print(f"{len(payloads)} payload(s), {size / 2**20:.1f} MiB")
+
+    results = {}
+    print(f"{'backend':<10}{'seconds':>10}{'MiB/s':>10}")
+    for name in JSONDecoder.available():
+        JSONDecoder.use(name)
+        seconds = min(repeat(
+            lambda: [JSONDecoder.decode(p) for p in payloads],
+            number=1, repeat=args.repeat,
+        ))
+        results[name] = seconds
+        print(f"{name:<10}{seconds:>10.4f}{size / 2**20 / seconds:>10.1f}")
+    if "json" in results:
+        for name, seconds in results.items():
+            print(f"{name}: {results['json'] / seconds:.2f}x stdlib json")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Memory and construction time of the models on a large synthetic board
+
+Usage: python benchmarks/bench_models.py [--cards N] [--rev REV ...]
+
+Without --rev the models of the working tree are measured. Each --rev
+loads trellolo/trello.py from that git revision instead, so the models
+can be compared before and after a change.
+"""
+import argparse
+import gc
+import subprocess
+import sys
+import tracemalloc
+import types
+from pathlib import Path
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_models(rev=None):
+    """Import trellolo/trello.py from the working tree or a git revision"""
+    if rev is None:
+        source = (ROOT / "trellolo" / "trello.py").read_text()
+    else:
+        source = subprocess.run(
+            ["git", "show", f"{rev}:trellolo/trello.py"],
+            cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+    module = types.ModuleType(f"trello_{rev or 'worktree'}")
+    exec(compile(source, "trello.py", "exec"), module.__dict__)
+    return module
+
+
+def oid(*n):
+    return "".join(f"{x:06x}" for x in n).rjust(24, "0")
+
+
+def synthetic_board(cards=40000, lists=100, comments=1):
+    """Return a nested board response shaped like Trello's"""
+    board_id = oid(1)
+    labels = [
+        {"id": oid(2, i), "name": "", "color": c, "idBoard": board_id}
+        for i, c in enumerate(("green", "blue"))
+    ]
+    info = {"id": board_id, "name": "Big board", "lists": []}
+    actions = []
+    per_list = cards // lists
+    for l in range(lists):
+        list_id = oid(3, l)
+        cards_info = []
+        for c in range(per_list):
+            card_id = oid(4, l, c)
+            cards_info.append({
+                "id": card_id,
+                "name": f"Card {c} of list {l}",
+                "idBoard": board_id,
+                "idList": list_id,
+                "labels": labels,
+                "badges": {"comments": comments},
+            })
+            for m in range(comments):
+                actions.append({
+                    "id": oid(5, l, c, m),
+                    "date": "2019-02-25T23:05:27.844Z",
+                    "data": {"text": f"Comment {m}", "card": {"id": card_id}},
+                    "memberCreator": {"fullName": "Jane Doe"},
+                })
+        info["lists"].append({
+            "id": list_id,
+            "name": f"List {l}",
+            "idBoard": board_id,
+            "cards": cards_info,
+        })
+    return info, actions
+
+
+def build(models, info, actions):
+    board = models.Board(info)
+    comments = [models.Comment(a) for a in actions]
+    return board, comments
+
+
+def measure(models, info, actions, repeat=3):
+    """Return the best build time and the memory held by the models"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = perf_counter()
+        build(models, info, actions)
+        times.append(perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = build(models, info, actions)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del tree
+    return min(times), size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=40000)
+    parser.add_argument("--lists", type=int, default=100)
+    parser.add_argument("--comments", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--rev", action="append", default=[],
+        help="git revision to compare with the working tree",
+    )
+    args = parser.parse_args(argv)
+
+    info, actions = synthetic_board(args.cards, args.lists, args.comments)
+    print(
+        f"{args.cards} cards on {args.lists} lists, "
+        f"{len(actions)} comments, 2 labels per card"
+    )
+    print(f"{'models':<16}{'build (s)':>12}{'memory (MiB)':>16}")
+    for rev in args.rev + [None]:
+        seconds, size = measure(load_models(rev), info, actions, args.repeat)
+        print(f"{rev or 'working tree':<16}{seconds:>12.3f}"
+              f"{size / 2**20:>16.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Startup time of commands that never touch the network
+
+Usage: python benchmarks/bench_startup.py [--runs N] [--budget MS]
+
+Each case runs in a fresh interpreter under -X importtime. Reports the
+median wall time over that of a bare interpreter, which is what trellolo
+adds, the part of it spent importing trellolo and everything it pulls
+in, and whether the HTTP stack was imported. Exits with 1 if a case adds
+more than the budget or imports the HTTP stack.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+
+ROOT = Path(__file__).resolve().parent.parent
+RUN = "from trellolo.commands import commands; commands(prog_name='trellolo')"
+CASES = {
+    "python": ([], {}),
+    "--help": (["--help"], {}),
+    "card -h": (["card", "-h"], {}),
+    "config -h": (["config", "-h"], {}),
+    "completion": ([], {
+        "_TRELLOLO_COMPLETE": "complete_bash",
+        "COMP_WORDS": "trellolo card ",
+        "COMP_CWORD": "2",
+    }),
+}
+# Modules only the network commands should need
+HEAVY = ("requests", "urllib3", "sqlite3", "aiohttp")
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def run(name, args, env):
+    """Run one case, returning wall seconds and the importtime report"""
+    script = "pass" if name == "python" else RUN
+    start = perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", script, *args],
+        env=dict(os.environ, **env), cwd=ROOT,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    return perf_counter() - start, proc.stderr
+
+
+def trellolo_import(report):
+    """Return microseconds spent importing trellolo, and module names"""
+    total, modules = 0, []
+    for line in report.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = match.group(2, 3, 4)
+        modules.append(name)
+        # Top level imports made while the -c script runs
+        if not indent and name.startswith("trellolo"):
+            total += int(cumulative)
+    return total, modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=11)
+    parser.add_argument("--budget", type=float, default=50, metavar="MS")
+    args = parser.parse_args(argv)
+
+    failed = False
+    bare = None
+    print(f"{'case':<12}{'wall ms':>10}{'added ms':>10}{'import ms':>11}"
+          "  heavy imports")
+    for name, (case_args, env) in CASES.items():
+        walls, imports, heavy = [], [], set()
+        for _ in range(args.runs):
+            wall, report = run(name, case_args, env)
+            total, modules = trellolo_import(report)
+            walls.append(wall * 1000)
+            imports.append(total / 1000)
+            heavy.update(m.split(".")[0] for m in modules)
+        wall = median(walls)
+        if bare is None:
+            bare = wall
+        heavy = sorted(heavy & set(HEAVY))
+        print(
+            f"{name:<12}{wall:>10.1f}{wall - bare:>10.1f}"
+            f"{median(imports):>11.1f}  {', '.join(heavy) or 'none'}"
+        )
+        failed = failed or wall - bare > args.budget or bool(heavy)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,512 @@
+"""In-process fake of the Trello REST API for the benchmarks
+
+Serves a synthetic account of boards x lists x cards x comments over real
+HTTP on localhost. The endpoints trellolo uses are answered with Trello's
+field selection, filters, action cursors, /1/batch, ETags and gzip, so
+the client does the same work as against the real API. Boards, cards
+and comments can be created and deleted, with Trello's error messages
+for bad credentials and IDs. Every response can be delayed, and every
+Nth request throttled with a 429.
+"""
+import gzip
+import hashlib
+import json
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import sleep
+from urllib.parse import parse_qsl, urlparse
+
+DATE = "2019-02-25T23:05:27.844Z"
+COLOURS = ("green", "yellow", "orange", "red", "purple", "blue")
+# Fields Trello sends by default besides the ones set below, so that
+# fields=all costs about what it does against the real API
+BOARD_DEFAULTS = {
+    "descData": None, "idOrganization": None, "idEnterprise": None,
+    "pinned": False, "shortUrl": "https://trello.com/b/aBcDeFgH",
+    "prefs": {
+        "permissionLevel": "private", "hideVotes": False,
+        "voting": "disabled", "comments": "members", "invitations": "members",
+        "selfJoin": True, "cardCovers": True, "isTemplate": False,
+        "cardAging": "regular", "calendarFeedEnabled": False,
+        "background": "blue", "backgroundImage": None,
+        "backgroundImageScaled": None, "backgroundTile": False,
+        "backgroundBrightness": "dark", "backgroundColor": "#0079BF",
+        "backgroundBottomColor": "#0079BF", "backgroundTopColor": "#0079BF",
+        "canBePublic": True, "canBeEnterprise": True, "canBeOrg": True,
+        "canBePrivate": True, "canInvite": True,
+    },
+    "labelNames": {colour: "" for colour in COLOURS},
+}
+LIST_DEFAULTS = {"subscribed": False, "softLimit": None, "status": None}
+CARD_DEFAULTS = {
+    "checkItemStates": None, "descData": {"emoji": {}}, "dueReminder": None,
+    "idMembersVoted": [], "idShort": 1, "idAttachmentCover": None,
+    "manualCoverAttachment": False, "shortLink": "aBcDeFgH",
+    "isTemplate": False, "cardRole": None, "dueComplete": False,
+    "due": None, "start": None, "idChecklists": [], "idMembers": [],
+    "shortUrl": "https://trello.com/c/aBcDeFgH", "subscribed": False,
+    "cover": {
+        "idAttachment": None, "color": None, "idUploadedBackground": None,
+        "size": "normal", "brightness": "light", "idPlugin": None,
+    },
+}
+BADGES = {
+    "attachmentsByType": {"trello": {"board": 0, "card": 0}},
+    "location": False, "votes": 0, "viewingMemberVoted": False,
+    "subscribed": False, "fogbugz": "", "checkItems": 0,
+    "checkItemsChecked": 0, "checkItemsEarliestDue": None, "comments": 0,
+    "attachments": 0, "description": False, "due": None, "dueComplete": False,
+    "start": None,
+}
+MEMBER = {
+    "id": "000000000000000000000006", "activityBlocked": False,
+    "avatarHash": None, "avatarUrl": None, "fullName": "Jane Doe",
+    "idMemberReferrer": None, "initials": "JD", "nonPublic": {},
+    "nonPublicAvailable": True, "username": "janedoe",
+}
+
+
+def oid(*n):
+    return "".join(f"{x:06x}" for x in n).rjust(24, "0")
+
+
+class Error(Exception):
+    """An error response, with its status and message"""
+
+    def __init__(self, status, message):
+        super().__init__(status, message)
+        self.status = status
+        self.message = message
+
+
+def project(obj, fields):
+    """Keep the requested fields of an object, as Trello does"""
+    if fields in (None, "all"):
+        return dict(obj)
+    keep = set(fields.split(",")) | {"id"}
+    return {k: v for k, v in obj.items() if k in keep}
+
+
+def by_pos(objs):
+    return sorted(objs, key=lambda o: (o["pos"], o["id"]))
+
+
+def open_only(objs, filter="open"):
+    if filter == "all":
+        return objs
+    return [o for o in objs if not o["closed"]]
+
+
+class Account:
+    """Synthetic boards, each with its lists, cards, labels and actions"""
+
+    def __init__(self, boards=3, lists=3, cards=10, comments=2):
+        self.boards = {}
+        self.actions_made = 0
+        # Objects created through the API, which get the IDs oid(8, n)
+        self.created = 0
+        for b in range(boards):
+            board = self.new_board(oid(1, b), f"Board {b}", [
+                (oid(2, b, i), colour.title(), colour)
+                for i, colour in enumerate(COLOURS)
+            ])
+            for l in range(lists):
+                self.new_list(board, oid(3, b, l), f"List {l}", l + 1)
+                for c in range(cards):
+                    card = self.new_card(
+                        board, oid(4, b, l, c), oid(3, b, l), f"Card {c}",
+                        c + 1, [board["labels"][c % len(COLOURS)]["id"]],
+                    )
+                    for m in range(comments):
+                        self.comment(board, card, f"Comment {m}")
+
+    def new_id(self):
+        self.created += 1
+        return oid(8, self.created)
+
+    def new_board(self, id, name, labels):
+        """Add a board with (id, name, colour) labels and no lists"""
+        board = {
+            "board": dict(
+                BOARD_DEFAULTS, id=id, name=name, closed=False, desc="",
+                url=f"https://trello.com/b/{id}",
+            ),
+            "lists": [], "cards": [], "actions": [],
+            "labels": [
+                {"id": label_id, "name": label_name, "color": colour,
+                 "idBoard": id}
+                for label_id, label_name, colour in labels
+            ],
+        }
+        self.boards[id] = board
+        return board
+
+    def new_list(self, board, id, name, pos):
+        board["lists"].append(dict(
+            LIST_DEFAULTS, id=id, name=name, idBoard=board["board"]["id"],
+            closed=False, pos=pos,
+        ))
+
+    def new_card(self, board, id, list_id, name, pos, label_ids, desc=""):
+        labels = [l for l in board["labels"] if l["id"] in label_ids]
+        card = dict(
+            CARD_DEFAULTS, id=id, name=name, idBoard=board["board"]["id"],
+            idList=list_id, closed=False, pos=pos, desc=desc,
+            idLabels=[l["id"] for l in labels], labels=labels,
+            badges=dict(BADGES), dateLastActivity=DATE,
+            url=f"https://trello.com/c/{id}",
+        )
+        board["cards"].append(card)
+        return card
+
+    def action(self, board, type, data):
+        """Add an action to the front of the board's feed"""
+        self.actions_made += 1
+        action = {
+            "id": oid(5, self.actions_made), "idMemberCreator": MEMBER["id"],
+            "type": type, "date": DATE, "appCreator": None, "limits": {},
+            "data": dict(data, board={"id": board["board"]["id"]}),
+            "memberCreator": MEMBER,
+        }
+        board["actions"].insert(0, action)
+        return action
+
+    def comment(self, board, card, text):
+        card["badges"]["comments"] += 1
+        return self.action(board, "commentCard", {
+            "text": text, "card": {"id": card["id"], "name": card["name"]},
+        })
+
+    def find(self, kind, id):
+        """Return the board holding a list or card, and the object"""
+        for board in self.boards.values():
+            for obj in board[kind]:
+                if obj["id"] == id:
+                    return board, obj
+        return None, None
+
+
+class FakeTrello(ThreadingHTTPServer):
+    """Fake Trello API serving an Account from a background thread"""
+
+    daemon_threads = True
+
+    def __init__(
+        self, account=None, latency=0, throttle_every=0, credentials=None
+    ):
+        super().__init__(("127.0.0.1", 0), FakeTrelloHandler)
+        self.account = account or Account()
+        # The only (key, token) accepted, if set
+        self.credentials = credentials
+        # Seconds every response is delayed by
+        self.latency = latency
+        # Extra seconds the responses of some paths are delayed by
+        self.delays = {}
+        # Answer every Nth request with a 429, if set
+        self.throttle_every = throttle_every
+        self.lock = Lock()
+        self.reset_stats()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self):
+        Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"requests": 0, "bytes": 0, "throttled": 0}
+            # (method, path, query) of every request
+            self.sent = []
+
+    def count(self, **counts):
+        with self.lock:
+            for name, n in counts.items():
+                self.stats[name] += n
+            return self.stats["requests"]
+
+    # Endpoints, answering None for a 404 or raising an Error
+
+    def get(self, path, q):
+        account = self.account
+        if re.fullmatch(r"/1/tokens/[^/]+", path):
+            return {"id": oid(7), "identifier": "trellolo"}
+        if path == "/1/members/me/boards":
+            boards = open_only(
+                list(account.boards.values()), q.get("filter", "all")
+            )
+            return [self.board(b, q) for b in boards]
+        if path == "/1/batch":
+            return [self.batch_item(url) for url in q["urls"].split(",")]
+        match = re.fullmatch(r"/1/boards/(\w+)(?:/(\w+))?", path)
+        if match:
+            board = account.boards.get(match.group(1))
+            if board is None:
+                return None
+            nested = match.group(2)
+            if nested is None:
+                return self.board(board, q)
+            if nested == "actions":
+                return self.actions(board["actions"], q)
+            if nested in ("lists", "cards", "labels"):
+                objs = board[nested]
+                if nested != "labels":
+                    objs = by_pos(open_only(objs, q.get("filter", "open")))
+                return [
+                    self.nested(board, nested, o, q, "fields") for o in objs
+                ]
+            return None
+        match = re.fullmatch(r"/1/lists/(\w+)(/cards)?", path)
+        if match:
+            board, _list = account.find("lists", match.group(1))
+            if _list is None:
+                raise Error(404, "model not found")
+            if match.group(2):
+                cards = [
+                    c for c in board["cards"] if c["idList"] == _list["id"]
+                ]
+                return [
+                    project(c, q.get("fields"))
+                    for c in by_pos(open_only(cards, q.get("filter")))
+                ]
+            return project(_list, q.get("fields"))
+        match = re.fullmatch(r"/1/cards/(\w+)(/actions)?", path)
+        if match:
+            board, card = account.find("cards", match.group(1))
+            if card is None:
+                return None
+            if match.group(2):
+                # A card's actions follow it across the boards it was on
+                return self.actions(sorted((
+                    a for b in account.boards.values() for a in b["actions"]
+                    if a["data"].get("card", {}).get("id") == card["id"]
+                ), key=lambda a: a["id"], reverse=True), q)
+            return project(card, q.get("fields"))
+        return None
+
+    def board(self, board, q):
+        """Render a board with the nested resources the query asks for"""
+        info = project(board["board"], q.get("fields"))
+        for nested in ("lists", "cards", "labels"):
+            filter = q.get(nested, "none")
+            if filter == "none":
+                continue
+            objs = board[nested]
+            if nested != "labels":
+                objs = by_pos(open_only(objs, filter))
+            info[nested] = [
+                self.nested(board, nested, o, q, f"{nested[:-1]}_fields")
+                for o in objs
+            ]
+        if q.get("actions"):
+            info["actions"] = self.actions(board["actions"], {
+                "filter": q["actions"],
+                "limit": q.get("actions_limit", 50),
+                "fields": q.get("action_fields"),
+                "memberCreator_fields": q.get("action_memberCreator_fields"),
+            })
+        return info
+
+    def nested(self, board, kind, obj, q, fields_key):
+        info = project(obj, q.get(fields_key))
+        if kind == "lists" and q.get("cards", "none") != "none":
+            cards = [c for c in board["cards"] if c["idList"] == obj["id"]]
+            info["cards"] = [
+                project(c, q.get("card_fields"))
+                for c in by_pos(open_only(cards, q["cards"]))
+            ]
+        return info
+
+    @staticmethod
+    def actions(actions, q):
+        """Filter a feed, newest first, honouring since and before"""
+        if q.get("filter", "all") != "all":
+            types = set(q["filter"].split(","))
+            actions = [a for a in actions if a["type"] in types]
+        if q.get("since"):
+            actions = [a for a in actions if a["id"] > q["since"]]
+        if q.get("before"):
+            actions = [a for a in actions if a["id"] < q["before"]]
+        page = []
+        for action in actions[:int(q.get("limit", 50))]:
+            info = project(action, q.get("fields"))
+            info["memberCreator"] = project(
+                action["memberCreator"], q.get("memberCreator_fields")
+            )
+            page.append(info)
+        return page
+
+    def batch_item(self, url):
+        url = urlparse(url)
+        try:
+            body = self.get("/1" + url.path, dict(parse_qsl(url.query)))
+        except Error as e:
+            return {"name": "ERROR", "message": e.message,
+                    "statusCode": e.status}
+        if body is None:
+            return {"name": "NotFound", "message": "not found",
+                    "statusCode": 404}
+        return {"200": body}
+
+    def post(self, path, q):
+        account = self.account
+        if path.rstrip("/") == "/1/boards":
+            # Trello adds three lists and a label of every colour
+            board = account.new_board(account.new_id(), q.get("name", ""), [
+                (account.new_id(), "", colour) for colour in COLOURS
+            ])
+            for pos, name in enumerate(("To Do", "Doing", "Done"), 1):
+                account.new_list(board, account.new_id(), name, pos * 16384)
+            return board["board"]
+        match = re.fullmatch(r"/1/cards/(\w+)/actions/comments", path)
+        if match:
+            board, card = account.find("cards", match.group(1))
+            if card is None:
+                return None
+            return account.comment(board, card, q.get("text", ""))
+        if path != "/1/cards":
+            return None
+        board, _list = account.find("lists", q.get("idList"))
+        if _list is None:
+            raise Error(400, "invalid value for idList")
+        cards = [c for c in board["cards"] if c["idList"] == _list["id"]]
+        pos = q.get("pos", "bottom")
+        if pos == "bottom":
+            pos = max((c["pos"] for c in cards), default=0) + 16384
+        elif pos == "top":
+            pos = min((c["pos"] for c in cards), default=16384) / 2
+        card = account.new_card(
+            board, account.new_id(), _list["id"],
+            q.get("name", ""), float(pos),
+            q.get("idLabels", "").split(","), q.get("desc", ""),
+        )
+        account.action(board, "createCard", {
+            "card": {"id": card["id"], "name": card["name"]},
+            "list": {"id": _list["id"]},
+        })
+        return card
+
+    def put(self, path, q):
+        """Update the name or the closed state of an object"""
+        match = re.fullmatch(r"/1/(boards|lists|cards)/(\w+)", path)
+        if match is None:
+            return None
+        kind, id = match.groups()
+        if kind == "boards":
+            board = self.account.boards.get(id)
+            obj = board and board["board"]
+        else:
+            _, obj = self.account.find(kind, id)
+        if obj is None:
+            return None
+        if "name" in q:
+            obj["name"] = q["name"]
+        if "closed" in q:
+            obj["closed"] = q["closed"] == "true"
+        return obj
+
+    def delete(self, path, q):
+        account = self.account
+        match = re.fullmatch(r"/1/boards/(\w+)", path)
+        if match:
+            if account.boards.pop(match.group(1), None) is None:
+                return None
+            return {"_value": None}
+        match = re.fullmatch(r"/1/cards/(\w+)/actions/(\w+)/comments", path)
+        if match:
+            board, card = account.find("cards", match.group(1))
+            comments = [
+                a for a in (board["actions"] if board else [])
+                if a["id"] == match.group(2) and a["type"] == "commentCard"
+            ]
+            if not comments:
+                return None
+            board["actions"].remove(comments[0])
+            card["badges"]["comments"] -= 1
+            return {"_value": None}
+        match = re.fullmatch(r"/1/cards/(\w+)", path)
+        board, card = account.find("cards", match and match.group(1))
+        if card is None:
+            return None
+        board["cards"].remove(card)
+        return {"limits": {}}
+
+
+class FakeTrelloHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written apart, which Nagle would delay by 40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=b"", headers={}):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if body and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        # Counted before the client can see the response and read the stats
+        self.server.count(bytes=len(body))
+        self.wfile.write(body)
+
+    def respond(self):
+        server = self.server
+        number = server.count(requests=1)
+        url = urlparse(self.path)
+        delay = server.latency + server.delays.get(url.path, 0)
+        if delay:
+            sleep(delay)
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+        if server.throttle_every and number % server.throttle_every == 0:
+            server.count(throttled=1)
+            return self.reply(429, b"API_TOKEN_LIMIT_EXCEEDED", {
+                "Retry-After": "0",
+            })
+
+        q = dict(parse_qsl(url.query))
+        with server.lock:
+            server.sent.append((self.command, url.path, q))
+            try:
+                self.check(url.path, q)
+                body = getattr(server, self.command.lower())(url.path, q)
+            except Error as e:
+                body = e
+        if isinstance(body, Error):
+            return self.reply(body.status, body.message.encode())
+        if body is None:
+            return self.reply(404, b"The requested resource was not found.")
+        content = json.dumps(body).encode()
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.reply(304, headers={"ETag": etag})
+        self.reply(200, content, {
+            "Content-Type": "application/json", "ETag": etag,
+        })
+
+    def check(self, path, q):
+        """Raise Trello's errors for bad credentials or a malformed ID"""
+        if self.server.credentials:
+            key, token = self.server.credentials
+            if q.get("key") != key:
+                raise Error(401, "invalid key")
+            if q.get("token") != token:
+                raise Error(401, "invalid token")
+        match = re.match(r"/1/(boards|lists|cards)/([^/]+)", path)
+        if match and not re.fullmatch("[0-9a-f]{24}", match.group(2)):
+            raise Error(400, "invalid id")
+
+    do_GET = do_POST = do_PUT = do_DELETE = respond
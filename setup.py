@@ -8,14 +8,15 @@ setup(
     name="trellolo",
     version="0.1",
     py_modules=["trellolo"],
+    python_requires=">=3.7",
     install_requires=["click", "requests"],
+    extras_require={"async": ["aiohttp"], "fast": ["orjson"]},
     packages=["trellolo"],
     entry_points="""
         [console_scripts]
         trellolo=trellolo:__main__.main
     """,
     classifiers=[
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Operating System :: OS Independent",
     ],
@@ -0,0 +1,145 @@
+"""Serve the API requests of the test_cli_* modules from cassettes
+
+TRELLO_CASSETTES picks how those tests reach Trello:
+
+- replay (default): replay tests/cassettes/<module>.json, never touching
+  the network. A missing cassette fails the module's tests.
+- fake: record every cassette again against the fake Trello of the
+  benchmarks, run in this process
+- once: replay, recording a missing cassette with real credentials
+- record: record every cassette again, with real credentials
+- live: always use the real API
+
+Except live, the config, credential and response caches live in a
+temporary directory. While a cassette is in use, responses are always
+revalidated rather than served fresh, so a run sends the requests that
+were recorded.
+"""
+import tempfile
+from inspect import iscoroutinefunction
+from os import environ
+from pathlib import Path
+
+import pytest
+from benchmarks.fake_trello import Account, FakeTrello
+from click.testing import CliRunner
+from trellolo import commands
+from trellolo.cache import ResponseCache
+from trellolo.cassette import Cassette
+from trellolo.config import Config
+from trellolo.credentials import CredentialCache
+from trellolo.lazy import LazyObject
+from trellolo.ratelimit import RateLimiter
+from trellolo.trelloapi import TrelloAPI
+
+MODE = environ.get("TRELLO_CASSETTES", "replay")
+CASSETTES = Path(__file__).parent / "cassettes"
+
+if MODE != "live":
+    # Credentials stand in for real ones when replaying
+    environ.setdefault("TRELLO_KEY", Config.api_key() or "replay-key")
+    environ.setdefault("TRELLO_TOKEN", Config.token() or "replay-token")
+    # Read now, as a test moves them from the environment to the config
+    SECRETS = {"key": environ["TRELLO_KEY"], "token": environ["TRELLO_TOKEN"]}
+    home = Path(tempfile.mkdtemp(prefix="trellolo-tests-"))
+    Config.config_file = home / ".trellolo.cfg"
+    ResponseCache.cache_dir = home / "responses"
+
+if MODE == "fake":
+    # One account for the whole run, as the modules share their objects
+    FAKE = FakeTrello(
+        Account(boards=1, lists=2, cards=2, comments=1),
+        credentials=(SECRETS["key"], SECRETS["token"]),
+    )
+    TrelloAPI.base_url = FAKE.start().url
+
+
+@pytest.fixture(autouse=True, scope="module")
+def cassette(request):
+    """Route the module's requests through its cassette"""
+    name = request.module.__name__.rpartition(".")[2]
+    if MODE == "live" or not name.startswith("test_cli"):
+        yield None
+        return
+    mode = "record" if MODE == "fake" else MODE
+    cassette = Cassette(CASSETTES / f"{name}.json", mode, secrets=SECRETS)
+    # Whatever ran before, the module checks the credentials first
+    try:
+        CredentialCache.cache_file().unlink()
+    except FileNotFoundError:
+        pass
+    ttls = ResponseCache.ttls, ResponseCache.default_ttl
+    ResponseCache.ttls, ResponseCache.default_ttl = [], 0
+    TrelloAPI.transport = cassette
+    yield cassette
+    TrelloAPI.transport = None
+    ResponseCache.ttls, ResponseCache.default_ttl = ttls
+    cassette.close()
+    cassette.save()
+
+
+@pytest.fixture
+def fake_trello(monkeypatch):
+    """Send the requests to the fake Trello of the benchmarks, uncached"""
+    server = FakeTrello().start()
+    monkeypatch.setattr(TrelloAPI, "base_url", server.url)
+    monkeypatch.setattr(TrelloAPI, "url", server.url)
+    monkeypatch.setattr(TrelloAPI, "session", None)
+    monkeypatch.setattr(TrelloAPI, "rate_limiter", RateLimiter())
+    monkeypatch.setattr(ResponseCache, "enabled", False)
+    yield server
+    TrelloAPI.close()
+    server.stop()
+
+
+@pytest.fixture
+def fake_cli(fake_trello, monkeypatch):
+    """Run trellolo commands against the fake Trello, each from scratch
+
+    Returns a function taking the command's arguments and returning the
+    click result, with stdout and stderr apart.
+    """
+    credentials = {
+        name: getattr(TrelloAPI, name)
+        for name in ("api_key", "token", "initialized")
+    }
+
+    def invoke(*args):
+        for name, value in credentials.items():
+            monkeypatch.setattr(TrelloAPI, name, value)
+        client = LazyObject(commands.new_client)
+        monkeypatch.setattr(commands, "trello", client)
+        monkeypatch.setattr(commands, "api_client", client)
+        fake_trello.sent.clear()
+        return CliRunner(mix_stderr=False).invoke(commands.commands, [
+            "-k", "key", "-t", "token", "--no-cache", *args
+        ])
+
+    return invoke
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """Answer an API class's requests with respond(method, url, params)
+
+    Returns a function installing respond, which returns the list of the
+    (method, url, params) sent.
+    """
+    sent = []
+
+    def install(respond, api=TrelloAPI):
+        def send_request(url="", method="GET", params={}, **kwargs):
+            sent.append((method, url, params))
+            return respond(method, url, params)
+
+        async def async_send_request(*args, **kwargs):
+            return send_request(*args, **kwargs)
+
+        if iscoroutinefunction(api.send_request):
+            fake = async_send_request
+        else:
+            fake = send_request
+        monkeypatch.setattr(api, "send_request", staticmethod(fake))
+        return sent
+
+    return install
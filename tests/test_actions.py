@@ -0,0 +1,58 @@
+import pytest
+from trellolo.actions import ActionPages
+from trellolo.board import BoardAPI
+
+# Newest first, as Trello returns them
+FEED = [{"id": f"{n:04}", "data": {"text": str(n)}} for n in range(25, 0, -1)]
+
+
+def feed_pages(cursors):
+    """Return a responder serving FEED, recording each request's cursor"""
+    def page(method, url, params):
+        cursors.append(params.get("before"))
+        actions = [
+            a for a in FEED
+            if not params.get("before") or a["id"] < params["before"]
+        ]
+        return actions[:params["limit"]]
+
+    return page
+
+
+@pytest.fixture
+def requests(fake_api, monkeypatch):
+    """Serve FEED in pages of ten, returning the cursors sent"""
+    cursors = []
+    monkeypatch.setattr(ActionPages, "page_size", 10)
+    fake_api(feed_pages(cursors))
+    return cursors
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_action_pages(requests, prefetch):
+    """Test that every page is walked with the last action as cursor"""
+    pages = ActionPages("/1/boards/b1/actions", prefetch=prefetch)
+    assert list(pages) == FEED
+    assert requests == [None, "0016", "0006"]
+
+
+def test_action_pages_stop_early(requests):
+    """Test that no page is requested before it is needed"""
+    pages = iter(ActionPages("/1/boards/b1/actions"))
+    assert [next(pages)["id"] for _ in range(10)][-1] == "0016"
+    assert requests == [None]
+    next(pages)
+    assert requests == [None, "0016"]
+
+
+def test_action_pages_first_page(requests):
+    """Test that a page fetched elsewhere is continued, not refetched"""
+    pages = ActionPages("/1/boards/b1/actions", first_page=FEED[:10])
+    assert list(pages) == FEED
+    assert requests == ["0016", "0006"]
+
+
+def test_card_comments_paged(requests):
+    """Test that a card's comments come from every page"""
+    comments = BoardAPI().get_card_comments_by_id("c-paged")
+    assert [c.text for c in comments] == [str(n) for n in range(25, 0, -1)]
@@ -0,0 +1,129 @@
+import asyncio
+from threading import current_thread, main_thread
+
+import pytest
+from benchmarks.fake_trello import Account, oid
+from tests.test_actions import FEED, feed_pages
+from trellolo.actions import ActionPages
+from trellolo.board import BoardAPI
+from trellolo.tracing import RequestStats, RequestTracer
+from trellolo.trelloapi import TrelloAPI
+
+pytest.importorskip("aiohttp")
+from trellolo.aioboard import AsyncBoardAPI  # noqa: E402
+from trellolo.aiotrelloapi import AsyncTrelloAPI  # noqa: E402
+
+BOARD, LIST, CARD = oid(1, 0), oid(3, 0, 0), oid(4, 0, 0, 0)
+# Calls made of both clients, as (method, args, kwargs)
+CALLS = [
+    ("get_boards", (), {"lists": True}),
+    ("get_board_tree_by_id", (BOARD,), {}),
+    ("get_card_by_id", (CARD,), {}),
+    ("get_card_by_id", (CARD,), {}),
+    ("get_list_by_id", (LIST,), {}),
+    ("get_card_comments_by_ids", ([CARD, oid(4, 0, 0, 1)],), {}),
+    ("add_card", (LIST, "New", "Desc", ["green"]), {}),
+    ("add_card_comment", (CARD, "Hello"), {}),
+    ("find_card_ids", (), {"list_id": LIST, "label": "green"}),
+    ("show_by_id", (CARD, "card"), {}),
+    ("show_by_id", (LIST, "list"), {}),
+    ("delete_card_by_id", (CARD,), {}),
+]
+
+
+def test_aioboard_matches_boardapi(fake_trello, capsys):
+    """Test that both clients send the same requests and build the same"""
+    def run_sync():
+        trello = BoardAPI()
+        return [
+            repr(getattr(trello, name)(*args, **kwargs))
+            for name, args, kwargs in CALLS
+        ], trello.saved_requests
+
+    async def run_async():
+        trello = AsyncBoardAPI()
+        await trello.auth()
+        results = [
+            repr(await getattr(trello, name)(*args, **kwargs))
+            for name, args, kwargs in CALLS
+        ]
+        await trello.close()
+        return results, trello.saved_requests
+
+    runs = []
+    for run in (run_sync, lambda: asyncio.run(run_async())):
+        fake_trello.account = Account()
+        fake_trello.reset_stats()
+        results = run()
+        runs.append((results, fake_trello.stats, capsys.readouterr().out))
+    assert runs[0] == runs[1]
+    # The identity map answered the second lookup of the card
+    assert runs[0][0][1] > 0
+
+
+def test_aiotrelloapi_sends_through_transport(monkeypatch):
+    """Test that async requests go through TrelloAPI.transport, traced"""
+    sent = []
+
+    class Response:
+        status_code = 200
+        headers = {}
+        content = b'{"id": "b1"}'
+
+    class Transport:
+        def request(self, method, url, params={}, **kwargs):
+            sent.append((method, url))
+            return Response()
+
+    stats = RequestStats()
+    threads = []
+    lookup = TrelloAPI.cache_lookup.__func__
+    monkeypatch.setattr(AsyncTrelloAPI, "cache_lookup", classmethod(
+        lambda cls, kwargs: threads.append(current_thread())
+        or lookup(cls, kwargs)
+    ))
+    monkeypatch.setattr(TrelloAPI, "bytes_received", 0)
+    monkeypatch.setattr(TrelloAPI, "transport", Transport())
+    monkeypatch.setattr(AsyncTrelloAPI, "url", "https://trello.test")
+    monkeypatch.setattr(AsyncTrelloAPI.cache, "enabled", False)
+    monkeypatch.setattr(RequestTracer, "hooks", [stats])
+    body = asyncio.run(AsyncTrelloAPI.send_request("/1/boards/b1"))
+    assert body == {"id": "b1"}
+    assert sent == [("GET", "https://trello.test/1/boards/b1")]
+    assert [key for key in stats.records] == [("GET", "/1/boards/b1")]
+    # The cache's file I/O runs off the loop, and the bytes are counted
+    assert threads and main_thread() not in threads
+    assert TrelloAPI.bytes_received == len(Response.content)
+
+
+def test_aiotrelloapi_connection_stats(fake_trello, monkeypatch):
+    """Test that the connections of the async client are counted"""
+    monkeypatch.setattr(AsyncTrelloAPI, "connections_opened", 0)
+    monkeypatch.setattr(AsyncTrelloAPI, "connections_reused", 0)
+
+    async def fetch():
+        AsyncTrelloAPI()
+        for _ in range(3):
+            await AsyncTrelloAPI.send_request(f"/1/boards/{BOARD}")
+        await AsyncTrelloAPI.close()
+
+    asyncio.run(fetch())
+    assert AsyncTrelloAPI.connection_stats() == {
+        "opened": 1, "reused": 2, "requests": 3
+    }
+
+
+def test_action_pages_async(fake_api, monkeypatch):
+    """Test that the async walk of actions sends the same requests"""
+    cursors = []
+    monkeypatch.setattr(ActionPages, "page_size", 10)
+    fake_api(feed_pages(cursors), AsyncTrelloAPI)
+
+    async def walk():
+        pages = ActionPages(
+            "/1/cards/c1/actions", prefetch=True, api=AsyncTrelloAPI
+        )
+        return [a async for a in pages]
+
+    assert asyncio.run(walk()) == FEED
+    assert cursors == [None, "0016", "0006"]
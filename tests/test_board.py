@@ -0,0 +1,150 @@
+import re
+import sys
+from urllib.parse import parse_qsl, urlparse
+
+import pytest
+from benchmarks.fake_trello import oid
+from trellolo.board import BoardAPI
+from trellolo.trello import Board, Card, Comment, List, TrelloObject
+
+BOARD, LIST, CARD = oid(1, 0), oid(3, 0, 0), oid(4, 0, 0, 0)
+# The fields of each model, as (endpoint, param, fields) requests send them
+BOARDS = {
+    ("/1/members/me/boards", "fields", Board.projection()),
+    ("/1/members/me/boards", "list_fields", List.projection()),
+}
+BOARD_INFO = {
+    ("/1/boards/{id}", "fields", Board.projection()),
+    ("/1/boards/{id}", "list_fields", List.projection()),
+}
+COMMENTS = {
+    ("/1/cards/{id}/actions", "fields", Comment.projection()),
+    ("/1/cards/{id}/actions", "memberCreator_fields", "fullName"),
+}
+BOARD_TREE = BOARD_INFO | {
+    ("/1/boards/{id}", "card_fields", Card.projection()),
+    ("/1/boards/{id}", "action_fields", Comment.projection()),
+    ("/1/boards/{id}", "action_memberCreator_fields", "fullName"),
+}
+FIELDS_SENT = {
+    "board show -a": BOARDS,
+    "list show -a": BOARDS,
+    "card show -a": {("/1/members/me/boards", "fields", "id")} | BOARD_TREE,
+    f"board show -i {BOARD}": BOARD_TREE,
+    f"list show -i {LIST}": {
+        ("/1/lists/{id}", "fields", List.projection()),
+        ("/1/lists/{id}/cards", "fields", Card.projection()),
+    } | BOARD_INFO | COMMENTS,
+    f"card show -i {CARD}": {
+        ("/1/cards/{id}", "fields", Card.projection()),
+        ("/1/lists/{id}", "fields", List.projection()),
+    } | BOARD_INFO | COMMENTS,
+}
+
+
+def list_names(board):
+    return [_list.name for _list in board.lists]
+
+
+def fields_sent(sent):
+    """Return the (endpoint, param, fields) of the requests sent"""
+    found = set()
+    for method, path, query in sent:
+        if path == "/1/batch":
+            urls = [urlparse(url) for url in query["urls"].split(",")]
+            found |= fields_sent(
+                (method, f"/1{url.path}", dict(parse_qsl(url.query)))
+                for url in urls
+            )
+        endpoint = re.sub("[0-9a-f]{24}", "{id}", path)
+        found |= {
+            (endpoint, param, value) for param, value in query.items()
+            if param.endswith("fields")
+        }
+    return found
+
+
+def test_board_hides_archived_lists(fake_trello):
+    """Test that archived lists stay hidden, as /1/boards/{id}/lists did"""
+    fake_trello.account.boards[BOARD]["lists"][0]["closed"] = True
+    trello = BoardAPI()
+    boards = trello.get_boards(lists=True)
+    assert list_names(boards[0]) == ["List 1", "List 2"]
+    assert list_names(boards[1]) == ["List 0", "List 1", "List 2"]
+    assert list_names(trello.get_board_tree_by_id(BOARD)) == [
+        "List 1", "List 2"
+    ]
+    assert list_names(trello.get_board_by_id(BOARD)) == ["List 1", "List 2"]
+
+
+def test_board_tree_fetches_comments_from_other_boards(fake_trello):
+    """Test that a card's comments made on its previous board are shown"""
+    boards = fake_trello.account.boards
+    moved = [
+        a for a in boards[BOARD]["actions"] if a["data"]["card"]["id"] == CARD
+    ]
+    boards[BOARD]["actions"].remove(moved[0])
+    boards[oid(1, 1)]["actions"].insert(0, moved[0])
+    fake_trello.sent.clear()
+    board = BoardAPI().get_board_tree_by_id(BOARD)
+    cards = {c.id: c for l in board.lists for c in l.cards}
+    assert [c.text for c in cards[CARD].comments] == [
+        "Comment 1", "Comment 0"
+    ]
+    assert [path for _, path, _ in fake_trello.sent] == [
+        f"/1/boards/{BOARD}", f"/1/cards/{CARD}/actions"
+    ]
+
+
+@pytest.mark.parametrize("command", FIELDS_SENT)
+def test_board_requests_rendered_fields(
+    fake_trello, fake_cli, monkeypatch, command
+):
+    """Test that a command asks only for the fields it prints"""
+    def run():
+        result = fake_cli(*command.split())
+        assert result.exit_code == 0, result.stderr
+        return result.stdout, fields_sent(fake_trello.sent)
+
+    output, sent = run()
+    assert sent == FIELDS_SENT[command]
+    # All the fields Trello has would print the same
+    monkeypatch.setattr(
+        TrelloObject, "projection", classmethod(lambda cls: "all")
+    )
+    monkeypatch.setattr(Comment, "member_fields", ["all"])
+    assert run()[0] == output
+
+
+def test_board_concurrent_fetches_keep_order(fake_trello, capsys):
+    """Test that boards fetched in parallel still print in order"""
+    trello = BoardAPI()
+    trello.show_all_by_type(cards=True)
+    expected = capsys.readouterr().out
+    fake_trello.delays[f"/1/boards/{BOARD}"] = 0.3
+    fake_trello.sent.clear()
+    trello.concurrency = 3
+    trello.show_all_by_type(cards=True)
+    assert capsys.readouterr().out == expected
+    # The first board was answered last
+    boards = [path for _, path, _ in fake_trello.sent][1:]
+    assert sorted(boards) == [f"/1/boards/{oid(1, b)}" for b in range(3)]
+    assert boards[-1] == f"/1/boards/{BOARD}"
+
+
+def test_board_streams_output(fake_trello, monkeypatch):
+    """Test that each board is written before the next one is fetched"""
+    class Stdout:
+        def write(self, text):
+            writes.append((text, len(fake_trello.sent)))
+
+        def flush(self):
+            pass
+
+    writes = []
+    monkeypatch.setattr(sys, "stdout", Stdout())
+    BoardAPI().show_all_by_type(cards=True)
+    # The member's boards, then one request per board
+    assert [
+        requests for text, requests in writes if text.startswith("Board ID")
+    ] == [2, 3, 4]
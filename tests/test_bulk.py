@@ -0,0 +1,62 @@
+import pytest
+from click.testing import CliRunner
+from trellolo import commands
+from trellolo.board import BoardAPI
+
+CARDS = [
+    {"id": "c1", "labels": [{"name": "Bug", "color": "red"}]},
+    {"id": "c2", "labels": []},
+    {"id": "c3", "labels": [{"name": "", "color": "red"}]},
+]
+
+
+@pytest.fixture
+def sent(fake_api):
+    """Answer the board's requests, failing for a missing object"""
+    def respond(method, url, params):
+        if method == "GET":
+            return CARDS
+        if url.endswith("/missing"):
+            raise Exception("404: not found")
+        return {}
+
+    return fake_api(respond)
+
+
+def test_find_card_ids_by_label(sent):
+    """Test that cards are picked by label name or colour"""
+    trello = BoardAPI()
+    assert trello.find_card_ids(list_id="l1") == ["c1", "c2", "c3"]
+    assert trello.find_card_ids(list_id="l1", label="Bug") == ["c1"]
+    assert trello.find_card_ids(board_id="b1", label="red") == ["c1", "c3"]
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_bulk_change(sent, concurrency):
+    """Test that every object is changed, failures reported in order"""
+    trello = BoardAPI()
+    trello.concurrency = concurrency
+    results = list(trello.bulk_change("card", "archive", ["c1", "missing"]))
+    assert [(id, str(error)) for id, error in results] == [
+        ("c1", "None"), ("missing", "404: not found")
+    ]
+    assert sorted(sent) == [
+        ("PUT", "/1/cards/c1", {"closed": "true"}),
+        ("PUT", "/1/cards/missing", {"closed": "true"}),
+    ]
+
+
+def test_bulk_commands_need_targets(fake_api, monkeypatch):
+    """Test that a bulk command given nothing to change is refused"""
+    monkeypatch.setattr(commands.trello, "initialized", True)
+    fake_api(lambda method, url, params: [])
+    runner = CliRunner(mix_stderr=False)
+    for args in (["card", "delete"], ["card", "archive", "--dry-run"]):
+        result = runner.invoke(commands.commands, args)
+        assert result.exit_code == 2
+        assert "Error: Give at least one ID, a file or a filter" in (
+            result.stderr
+        )
+    result = runner.invoke(commands.commands, ["card", "delete", "-b", "b1"])
+    assert result.exit_code == 0
+    assert result.stdout == "No cards to delete.\n"
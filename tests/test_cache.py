@@ -0,0 +1,136 @@
+import pytest
+from trellolo.cache import ResponseCache
+
+BOARD_ID = "5c6b993fa3eabe2af426aa2a"
+CARD_ID = "5c72fa330f4c0b8bd50a2799"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Point the response cache at a temporary directory"""
+    monkeypatch.setattr(ResponseCache, "cache_dir", tmp_path)
+    monkeypatch.setattr(ResponseCache, "enabled", True)
+    return ResponseCache
+
+
+def save_board(cache, headers={}):
+    key = cache.key("GET", f"/1/boards/{BOARD_ID}", {"cards": "all"})
+    text = f'{{"id": "{BOARD_ID}", "cards": [{{"id": "{CARD_ID}"}}]}}'
+    cache.save(key, f"/1/boards/{BOARD_ID}", headers, text, {"x": 1})
+    return key
+
+
+def test_cache_key_normalizes_params(cache):
+    """Test that param order and types don't change the cache key"""
+    assert cache.key("GET", "/1/x", {"a": 1, "b": "2"}) == cache.key(
+        "GET", "/1/x", {"b": 2, "a": "1"}
+    )
+
+
+def test_cache_fresh_entry(cache):
+    """Test that a response within its TTL is served from the cache"""
+    entry = cache.load(save_board(cache))
+    assert cache.fresh(entry)
+    assert entry["body"] == {"x": 1}
+
+
+def test_cache_only_revalidatable_when_no_ttl(cache, monkeypatch):
+    """Test that TTL-less responses are only kept when they have an ETag"""
+    monkeypatch.setattr(ResponseCache, "ttls", [])
+    assert cache.load(save_board(cache)) is None
+    entry = cache.load(save_board(cache, {"ETag": '"v1"'}))
+    assert not cache.fresh(entry)
+    assert cache.validators(entry) == {"If-None-Match": '"v1"'}
+
+
+def test_cache_mutation_invalidates_mentioning_entries(cache):
+    """Test that deleting a card drops the cached board containing it"""
+    key = save_board(cache)
+    other = '{"idBoard": "5c72fa305cf82e3a0e47ef9e"}'
+    cache.invalidate("/1/cards/5c72fa305cf82e3a0e47ef9f", {}, other)
+    assert cache.load(key)
+    cache.invalidate(f"/1/cards/{CARD_ID}", {}, f'{{"idBoard": "{BOARD_ID}"}}')
+    assert cache.load(key) is None
+    # Without a board in the response, every entry with a TTL goes
+    key = save_board(cache)
+    cache.invalidate(f"/1/cards/{CARD_ID}", {}, "{}")
+    assert cache.load(key) is None
+
+
+def test_cache_batched_invalidation(cache):
+    """Test that batched mutations invalidate once, on exit"""
+    key = save_board(cache)
+    with cache.batched():
+        cache.invalidate(f"/1/cards/{CARD_ID}", {}, "{}")
+        assert cache.load(key)
+    assert cache.load(key) is None
+
+
+def test_cache_evicts_least_recently_used(cache, monkeypatch):
+    """Test that the size cap removes entries"""
+    save_board(cache)
+    monkeypatch.setattr(ResponseCache, "max_size", 0)
+    cache.evict()
+    assert list(cache.entries()) == []
+
+
+def test_cache_disabled(cache, monkeypatch):
+    """Test that --no-cache bypasses loading and saving"""
+    monkeypatch.setattr(ResponseCache, "enabled", False)
+    assert cache.load(save_board(cache)) is None
+    assert list(cache.entries()) == []
+
+
+def test_cache_drop_uses_the_index(cache):
+    """Test that a mutation only opens the index of the IDs it touched"""
+    key = save_board(cache)
+    boards = cache.key("GET", "/1/members/me/boards", {})
+    cache.save(boards, "/1/members/me/boards", {}, "[]", [])
+    # Only the board is indexed, not every object in it
+    assert cache.index_file(BOARD_ID).read_text() == f"{key}\n"
+    assert not cache.index_file(CARD_ID).exists()
+    # An entry the index doesn't list is left alone
+    cache.entry_file(key).rename(cache.entry_file("unindexed"))
+    cache.invalidate("/1/boards", {}, f'{{"id": "{BOARD_ID}"}}')
+    assert cache.load(boards) is None
+    assert cache.load("unindexed")
+    assert not cache.index_file(BOARD_ID).exists()
+
+
+def test_cache_evicts_over_max_size_only(cache, monkeypatch):
+    """Test that saves scan the cache only once it grows over max_size"""
+    scans = []
+    evict = ResponseCache.evict.__func__
+    monkeypatch.setattr(ResponseCache, "evict", classmethod(
+        lambda cls: scans.append(1) or evict(cls)
+    ))
+    key = save_board(cache)
+    # The first save finds no size file and counts the entries once
+    assert len(scans) == 1
+    size = cache.entry_file(key).stat().st_size + cache.index_size()
+    assert cache.size_file().read_text() == str(size)
+    # Saving it again doesn't grow the index
+    save_board(cache)
+    assert len(scans) == 1
+    assert cache.index_file(BOARD_ID).read_text() == f"{key}\n"
+    monkeypatch.setattr(ResponseCache, "max_size", size)
+    cache.save(
+        cache.key("GET", "/1/lists/x", {}), "/1/boards/x", {}, "{}", {}
+    )
+    assert len(scans) == 2
+    assert len(list(cache.entries())) == 1
+    assert not cache.index_file(BOARD_ID).exists()
+    assert cache.size_file().read_text() == str(
+        sum(f.stat().st_size for f in cache.entries()) + cache.index_size()
+    )
+
+
+def test_cache_keeps_tokens_private(cache):
+    """Test that token paths aren't cached and entries are owner-only"""
+    path = "/1/tokens/replay-token"
+    key = cache.key("GET", path, {})
+    cache.save(key, path, {"ETag": '"v1"'}, "{}", {})
+    assert cache.load(key) is None
+    save_board(cache)
+    files = [cache.size_file(), *cache.entries(), *cache.indexes()]
+    assert {file.stat().st_mode & 0o777 for file in files} == {0o600}
@@ -0,0 +1,64 @@
+import pytest
+from trellolo.board import BoardAPI
+from trellolo.cardimport import CardImport
+
+LABELS = [
+    {"id": "a1", "name": "Bug", "color": "red", "idBoard": "b1"},
+    {"id": "a2", "name": "", "color": "green", "idBoard": "b1"},
+]
+
+
+@pytest.fixture
+def created(fake_api):
+    """Answer the import's requests, returning the cards it creates"""
+    cards = []
+
+    def respond(method, url, params):
+        if method == "POST":
+            cards.append(params)
+            return {"id": f"c{len(cards)}", "name": params["name"]}
+        return {
+            "/1/lists/l1": {"id": "l1", "name": "Todo", "idBoard": "b1"},
+            "/1/lists/l1/cards": [{"pos": 100}, {"pos": 300}],
+            "/1/boards/b1/labels": LABELS,
+        }.get(url)
+
+    fake_api(respond)
+    return cards
+
+
+def test_card_import(tmp_path, created):
+    """Test that rows become cards, in order, with failures reported"""
+    path = tmp_path / "cards.csv"
+    path.write_text(
+        "title,list_id,labels\n"
+        "First,l1,\"Bug,green\"\n"
+        "Second,,nosuch\n"
+        "Third,l1,red\n"
+    )
+    importer = CardImport(BoardAPI(), path, list_id="l1")
+    results = list(importer.run())
+    assert [r.get("id") for r in results] == ["c1", None, "c2"]
+    assert results[1]["error"] == "Unable to find label: nosuch"
+    assert [(c["name"], c["idLabels"]) for c in created] == [
+        ("First", "a1,a2"), ("Third", "a1")
+    ]
+    # Below the list's last card, keeping the file's order
+    assert [c["pos"] for c in created] == [16684, 33068]
+    assert importer.results.read_text().count("\n") == 3
+
+
+def test_card_import_resume(tmp_path, created):
+    """Test that a resumed import only retries the rows not created yet"""
+    path = tmp_path / "cards.jsonl"
+    path.write_text('{"title": "First"}\n{broken\n')
+    importer = CardImport(BoardAPI(), path, list_id="l1")
+    assert [r.get("id") for r in importer.run()] == ["c1", None]
+    with pytest.raises(Exception):
+        list(importer.run())
+
+    path.write_text('{"title": "First"}\n{"name": "Second"}\n')
+    assert list(importer.run(resume=True)) == [
+        {"row": 2, "id": "c2", "name": "Second"}
+    ]
+    assert [c["name"] for c in created] == ["First", "Second"]
@@ -0,0 +1,62 @@
+import pytest
+from trellolo.cassette import Cassette, CassetteError
+from trellolo.trelloapi import TrelloAPI
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {"ETag": '"v1"', "Content-Encoding": "gzip"}
+
+
+def test_cassette_record_and_replay(tmp_path, monkeypatch):
+    """Test that responses are replayed in order, without credentials"""
+    bodies = [b'{"name": "Old"}', b'{"name": "New", "token": "s3cret"}']
+
+    class Session:
+        def request(self, method, url, params={}, **kwargs):
+            return FakeResponse(200, bodies.pop(0))
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(TrelloAPI, "new_session", classmethod(
+        lambda cls: Session()
+    ))
+    path = tmp_path / "cassette.json"
+    url = "https://api.trello.com/1/boards/b1"
+    params = {"fields": "name", "key": "k3y", "token": "s3cret"}
+    recorder = Cassette(
+        path, "once", secrets={"key": "k3y", "token": "s3cret"}
+    )
+    assert recorder.mode == "record"
+    recorder.request("GET", url, params=params)
+    recorder.request("GET", url, params=params)
+    recorder.save()
+    assert "s3cret" not in path.read_text()
+    assert "k3y" not in path.read_text()
+
+    player = Cassette(path, secrets={"key": "other", "token": "creds"})
+    assert player.mode == "replay"
+    params = {"fields": "name", "key": "other", "token": "creds"}
+    contents = [
+        player.request("GET", url, params=params).content for _ in range(3)
+    ]
+    assert contents == [
+        b'{"name": "Old"}',
+        b'{"name": "New", "token": "{token}"}',
+        b'{"name": "New", "token": "{token}"}',
+    ]
+    resp = player.request("GET", url, params=params)
+    assert resp.headers["etag"] == '"v1"'
+    assert "Content-Encoding" not in resp.headers
+    with pytest.raises(CassetteError):
+        player.request("GET", url, params={"fields": "all"})
+
+
+def test_cassette_missing(tmp_path):
+    """Test that replaying a cassette never recorded fails loudly"""
+    with pytest.raises(CassetteError, match="No cassette recorded at"):
+        Cassette(tmp_path / "missing.json")
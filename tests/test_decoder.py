@@ -0,0 +1,27 @@
+import pytest
+from trellolo.decoder import JSONDecoder
+
+
+@pytest.fixture
+def decoder(monkeypatch):
+    monkeypatch.setattr(JSONDecoder, "name", None)
+    monkeypatch.setattr(JSONDecoder, "loads", None)
+    return JSONDecoder
+
+
+def test_decoder_backends_decode_bytes(decoder):
+    """Test that every available backend decodes raw response bytes"""
+    content = '[{"id": "abc", "name": "Bōard"}]'.encode()
+    for name in decoder.available():
+        assert decoder.use(name) == name
+        assert decoder.decode(content) == [{"id": "abc", "name": "Bōard"}]
+
+
+def test_decoder_falls_back_to_stdlib(decoder, monkeypatch):
+    """Test that a missing fast backend falls back to the stdlib"""
+    monkeypatch.setitem(decoder.backends, "orjson", "no_such_module")
+    monkeypatch.setitem(decoder.backends, "ujson", "no_such_module")
+    assert decoder.decode(b"{}") == {}
+    assert decoder.name == "json"
+    with pytest.raises(ValueError):
+        decoder.use("orjson")
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+from trellolo.lazy import LazyObject
+
+
+class Client:
+    def __init__(self):
+        self.concurrency = 1
+
+
+def test_lazy_object_builds_on_first_use():
+    """Test that the object is built once, on access, then configured"""
+    built = []
+    client = LazyObject(lambda: built.append(Client()) or built[-1])
+    client.when_loaded(lambda c: setattr(c, "concurrency", 4))
+    assert not built and not client.loaded
+    assert client.concurrency == 4
+    client.concurrency = 8
+    client.when_loaded(lambda c: setattr(c, "stream", True))
+    assert len(built) == 1 and built[0].concurrency == 8 and built[0].stream
+
+
+def test_cli_import_skips_http_stack():
+    """Test that loading the CLI doesn't import the HTTP client"""
+    code = (
+        "import sys, trellolo.commands; "
+        "print(sorted({'requests', 'sqlite3'} & set(sys.modules)))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True
+    ).stdout
+    assert out.strip() == "[]"
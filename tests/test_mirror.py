@@ -0,0 +1,119 @@
+from time import time
+
+import pytest
+from trellolo.localboard import LocalBoardAPI
+from trellolo.mirror import Mirror
+
+LABEL = {"id": "a1", "name": "", "color": "blue", "idBoard": "b1"}
+
+
+def card(id, list_id="l1", comments=0, **fields):
+    return dict({
+        "id": id, "name": f"Card {id}", "idBoard": "b1", "idList": list_id,
+        "closed": False, "pos": 1, "idLabels": ["a1"],
+        "badges": {"comments": comments},
+    }, **fields)
+
+
+def comment(id, card_id, text, date="2019-01-01"):
+    return {
+        "id": id, "type": "commentCard", "date": date,
+        "data": {"text": text, "card": {"id": card_id}},
+        "memberCreator": {"fullName": "Bob"},
+    }
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    """Mirror holding one fully loaded board"""
+    mirror = Mirror(tmp_path / "mirror.db")
+    mirror.save_board({"id": "b1", "name": "Board"}, 0)
+    mirror.load_board({
+        "id": "b1",
+        "name": "Board",
+        "lists": [
+            {"id": "l1", "name": "Todo", "idBoard": "b1", "pos": 1},
+            {"id": "l2", "name": "Done", "idBoard": "b1", "pos": 2},
+        ],
+        "labels": [LABEL],
+        "cards": [card("c1", comments=1), card("c2", pos=2)],
+        "comments": [comment("d1", "c1", "hi")],
+        "last_action_id": "d1",
+    })
+    yield mirror
+    mirror.close()
+
+
+def test_mirror_answers_like_the_api(mirror):
+    """Test that the local client rebuilds the same models"""
+    trello = LocalBoardAPI(mirror)
+    board = trello.get_board_tree_by_id("b1")
+    assert [l.name for l in board.lists] == ["Todo", "Done"]
+    assert [c.id for c in board.lists[0].cards] == ["c1", "c2"]
+    first = board.lists[0].cards[0]
+    assert [l.colour for l in first.labels] == ["blue"]
+    assert [c.text for c in first.comments] == ["hi"]
+    assert trello.get_card_by_id("c1").comments[0].name == "Bob"
+    assert trello.get_board_ids() == ["b1"]
+    assert mirror.staleness() < 60
+    with pytest.raises(Exception):
+        trello.add_card("l1", "New")
+
+
+def test_mirror_replays_actions(mirror, monkeypatch):
+    """Test that actions update the mirror, refetching only new cards"""
+    fetched = []
+
+    def fetch_cards(ids, mapper=map):
+        fetched.extend(ids)
+        cards = {"c1": card("c1", comments=1), "c3": card("c3", "l2", 1)}
+        return [cards.get(id) for id in ids]
+
+    monkeypatch.setattr(Mirror, "fetch_cards", staticmethod(fetch_cards))
+    mirror.apply_actions("b1", [
+        # Newest first, as Trello sends them
+        {"id": "d5", "type": "deleteCard", "data": {"card": {"id": "c2"}}},
+        comment("d4", "c3", "new", "2019-01-03"),
+        {"id": "d3", "type": "createCard", "data": {"card": {"id": "c3"}}},
+        {"id": "d2", "type": "updateComment", "data": {
+            "action": {"id": "d1", "text": "edited"}, "card": {"id": "c1"},
+        }},
+    ])
+    assert fetched == ["c3"]
+    assert mirror.card("c2") is None
+    assert mirror.card("c3")["list_id"] == "l2"
+    assert [c["text"] for c in mirror.comments("c3")] == ["new"]
+    assert [c["text"] for c in mirror.comments("c1")] == ["edited"]
+    assert mirror.board("b1")["last_action_id"] == "d5"
+
+
+def test_mirror_save_board_keeps_sync_state(mirror):
+    """Test that saving a board again keeps its position and cursor"""
+    mirror.save_board({"id": "b1", "name": "Renamed"})
+    row = mirror.board("b1")
+    assert (row["name"], row["position"], row["last_action_id"]) == (
+        "Renamed", 0, "d1"
+    )
+
+
+def test_mirror_cursor_without_actions(tmp_path, fake_api):
+    """Test that a board without actions still syncs incrementally"""
+    sent = fake_api(lambda method, url, params: {
+        "/1/members/me/boards": [{"id": "b1", "name": "Board"}],
+        "/1/boards/b1": {"id": "b1", "name": "Board"},
+    }.get(url, []))
+    mirror = Mirror(tmp_path / "mirror.db")
+    started = int(time())
+    mirror.sync()
+    cursor = mirror.board("b1")["last_action_id"]
+    assert started <= int(cursor[:8], 16) <= time()
+    mirror.sync()
+    assert sent[-1][1:] == (
+        "/1/boards/b1/actions", {"limit": 1000, "since": cursor}
+    )
+
+    # Mirrors synced before cursors were kept for such boards
+    mirror.db.execute("UPDATE boards SET last_action_id = NULL")
+    mirror.sync()
+    assert mirror.board("b1")["last_action_id"] is not None
+    mirror.close()
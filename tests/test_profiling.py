@@ -0,0 +1,21 @@
+import pstats
+
+from trellolo.profiling import CommandProfile
+from trellolo.trello import Card
+
+
+def test_command_profile(tmp_path):
+    """Test that the stats file is written and model code is reported"""
+    path = tmp_path / "command.prof"
+    profile = CommandProfile(str(path))
+    profile.start()
+    cards = [Card({"id": str(i), "name": "Card"}) for i in range(200)]
+    profile.stop()
+
+    assert len(cards) == 200
+    assert pstats.Stats(str(path)).total_calls > 0
+    hot = [name for (_, _, name), _ in profile.hot_functions()]
+    assert "__init__" in hot
+    lines = list(profile.report())
+    assert lines[0].startswith(f"Profile written to {path}")
+    assert "trello.py" in lines[3]
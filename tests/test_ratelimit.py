@@ -0,0 +1,50 @@
+from trellolo.ratelimit import RateLimiter
+
+
+class FakeClock:
+    now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ratelimit_token_budget():
+    """Test that requests beyond the per-token budget have to wait"""
+    limiter = RateLimiter(clock=FakeClock())
+    delays = [limiter.reserve("key", "token") for _ in range(101)]
+    assert delays[:100] == [0] * 100
+    # 100 requests per 10 seconds refills one token every 0.1 seconds
+    assert round(delays[100], 3) == 0.1
+
+
+def test_ratelimit_budgets_are_per_token():
+    """Test that another token has its own budget"""
+    limiter = RateLimiter(clock=FakeClock())
+    for _ in range(100):
+        limiter.reserve("key", "token1")
+    assert limiter.reserve("key", "token2") == 0
+
+
+def test_ratelimit_syncs_with_headers():
+    """Test that Trello's remaining count is honoured"""
+    limiter = RateLimiter(clock=FakeClock())
+    limiter.update("key", "token", {"x-rate-limit-api-token-remaining": "0"})
+    assert limiter.reserve("key", "token") > 0
+
+
+def test_ratelimit_honours_retry_after():
+    """Test that a 429 pauses requests and slows the refill rate"""
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock)
+    assert limiter.throttled("key", "token", retry_after="3") == 3
+    assert limiter.reserve("key", "token") == 3
+    clock.now = 3
+    assert limiter.reserve("key", "token") == 0
+    assert limiter.bucket("token", "token").rate == 5
+
+
+def test_ratelimit_backs_off_without_retry_after():
+    """Test exponential back off when Trello gives no Retry-After"""
+    limiter = RateLimiter(clock=FakeClock())
+    assert limiter.throttled("key", "token", attempt=2) == 4
+    assert RateLimiter.retry_after("soon") is None
@@ -0,0 +1,38 @@
+from click.testing import CliRunner
+
+from trellolo.commands import commands
+
+# Without credentials, as the lines run never need them
+ENV = {"TRELLO_KEY": "", "TRELLO_TOKEN": ""}
+
+
+def test_run_script(tmp_path):
+    """Test that a script stops at the first failing line"""
+    script = tmp_path / "runbook.txt"
+    script.write_text("# comment\n\ntrellolo bogus\nrun other.txt\n")
+    result = CliRunner(mix_stderr=False, env=ENV).invoke(
+        commands, ["run", str(script)]
+    )
+    assert result.exit_code == 1
+    assert result.stderr.splitlines() == [
+        f"{script}:3: Error: No such command 'bogus'."
+    ]
+
+    result = CliRunner(mix_stderr=False, env=ENV).invoke(
+        commands, ["run", "--keep-going", str(script)]
+    )
+    assert result.exit_code == 1
+    assert result.stderr.splitlines()[1] == (
+        f"{script}:4: Error: run can't be used from run"
+    )
+
+
+def test_shell():
+    """Test that the shell reports errors and keeps going until exit"""
+    result = CliRunner(mix_stderr=False, env=ENV).invoke(
+        commands, ["shell"], input="bogus\n\nshell\nexit\nbogus\n"
+    )
+    assert result.exit_code == 0
+    assert result.stdout.count("trellolo> ") == 4
+    assert "Error: No such command 'bogus'." in result.stderr
+    assert "Error: shell can't be used from shell" in result.stderr
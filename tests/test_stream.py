@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from trellolo.board import BoardAPI
+from trellolo.stream import JSONStream
+from trellolo.trello import List
+from trellolo.trelloapi import TrelloAPI
+
+LISTS = [
+    {"id": "l1", "name": "Tōdo", "idBoard": "b1", "cards": [
+        {"id": f"c{i}", "name": f"Card {i}", "idList": "l1",
+         "badges": {"comments": i % 2}, "pos": 16384.5 * i}
+        for i in range(5)
+    ]},
+    {"id": "l2", "name": "Done", "idBoard": "b1", "cards": []},
+]
+
+
+def chunks(data, size=1):
+    """Split a body into tiny chunks to cross every token boundary"""
+    body = json.dumps(data, ensure_ascii=False).encode()
+    return (body[i:i + size] for i in range(0, len(body), size))
+
+
+def test_stream_walks_nested_values():
+    """Test that values are decoded across chunk boundaries"""
+    stream = JSONStream(chunks(LISTS))
+    names, cards = [], []
+    for _ in stream.items():
+        for key in stream.members():
+            if key == "cards":
+                for _ in stream.items():
+                    cards.append(stream.value())
+            elif key == "name":
+                names.append(stream.value())
+            else:
+                stream.value()
+    assert names == ["Tōdo", "Done"]
+    assert cards == LISTS[0]["cards"]
+
+
+def test_stream_rejects_truncated_body():
+    """Test that a cut off body raises instead of ending quietly"""
+    body = json.dumps(LISTS).encode()[:-10]
+    stream = JSONStream([body])
+    with pytest.raises(ValueError):
+        for _ in stream.items():
+            stream.value()
+
+
+def test_stream_lists_by_board_id(monkeypatch):
+    """Test that streamed lists and cards render like loaded ones"""
+    monkeypatch.setattr(
+        TrelloAPI, "stream_request",
+        classmethod(lambda cls, url, params: chunks(LISTS, 7))
+    )
+    trello = BoardAPI()
+    monkeypatch.setattr(trello, "stream_window", 2)
+    monkeypatch.setattr(
+        trello, "get_card_comments_by_ids",
+        lambda ids, remember: [[] for _ in ids]
+    )
+    lists = trello.stream_lists_by_board_id("b1")
+    assert not isinstance(lists, type(LISTS))
+    streamed = [line for l in lists for line in l.lines()]
+
+    loaded = []
+    for info in LISTS:
+        _list = List(info)
+        _list.show_details = True
+        loaded.extend(_list.lines())
+    assert streamed == loaded
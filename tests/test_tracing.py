@@ -0,0 +1,78 @@
+import json
+
+import pytest
+import requests
+from trellolo.ratelimit import RateLimiter
+from trellolo.tracing import RequestStats, RequestTracer, TraceFile
+from trellolo.trelloapi import TrelloAPI
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, content=b"", headers={}):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    def close(self):
+        pass
+
+
+def test_tracer_endpoint():
+    """Test that IDs and tokens are replaced by placeholders"""
+    card = "5c6b993fa3eabe2af426aa2a"
+    assert RequestTracer.endpoint(f"/1/cards/{card}/actions") == (
+        "/1/cards/{id}/actions"
+    )
+    assert RequestTracer.endpoint("/1/tokens/abc123") == "/1/tokens/{token}"
+    assert RequestTracer.endpoint("/1/members/me/boards") == (
+        "/1/members/me/boards"
+    )
+
+
+def test_tracer_records_requests(tmp_path, monkeypatch):
+    """Test that hooks see the status, size and retries of each request"""
+    responses = [
+        FakeResponse(429, headers={"Retry-After": "0"}),
+        FakeResponse(200, b'{"id": "c1"}'),
+        FakeResponse(404, b"not found"),
+    ]
+
+    class Session:
+        def request(self, **kwargs):
+            return responses.pop(0)
+
+    monkeypatch.setattr(TrelloAPI, "get_session", classmethod(
+        lambda cls: Session()
+    ))
+    monkeypatch.setattr(TrelloAPI, "url", TrelloAPI.base_url)
+    monkeypatch.setattr(TrelloAPI, "rate_limiter", RateLimiter())
+    monkeypatch.setattr(TrelloAPI.cache, "enabled", False)
+    stats = RequestStats()
+    trace = TraceFile(tmp_path / "trace.jsonl")
+    monkeypatch.setattr(RequestTracer, "hooks", [stats, trace])
+
+    card = "5c6b993fa3eabe2af426aa2a"
+    TrelloAPI.send_request(f"/1/cards/{card}")
+    with pytest.raises(requests.HTTPError):
+        TrelloAPI.send_request(f"/1/cards/{card}")
+    trace.close()
+
+    records = [
+        json.loads(line)
+        for line in (tmp_path / "trace.jsonl").read_text().splitlines()
+    ]
+    assert [(r["status"], r["retries"], r["bytes"]) for r in records] == [
+        (200, 1, 12), (404, 0, 9)
+    ]
+    assert {r["endpoint"] for r in records} == {"/1/cards/{id}"}
+    lines = list(stats.summary())
+    assert len(lines) == 2
+    assert lines[1].split()[2:6] == ["2", "1", "0", "1"]
+
+
+def test_stats_percentile():
+    values = list(range(1, 101))
+    assert RequestStats.percentile(values, 0.5) == 50
+    assert RequestStats.percentile(values, 0.95) == 95
+    assert RequestStats.percentile([7], 0.95) == 7
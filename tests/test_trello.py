@@ -0,0 +1,50 @@
+import pytest
+from trellolo.trello import Board, Card, Comment, Label, List
+
+CARD = {
+    "id": "c1",
+    "name": "Card",
+    "idBoard": "b1",
+    "idList": "l1",
+    "labels": [{"id": "a1", "color": "blue", "idBoard": "b1"}],
+    "badges": {"comments": 2},
+}
+
+
+def test_trello_board_tree():
+    """Test that a nested response builds the whole model tree"""
+    board = Board({
+        "id": "b1",
+        "name": "Board",
+        "lists": [{"id": "l1", "name": "List", "idBoard": "b1",
+                   "cards": [CARD]}],
+    })
+    card = board.lists[0].cards[0]
+    assert isinstance(card, Card)
+    assert (card.board_id, card.list_id, card.has_comments) == (
+        "b1", "l1", True
+    )
+    assert [(l.colour, l.id_board) for l in card.labels] == [("blue", "b1")]
+    assert card.comments == []
+
+
+def test_trello_empty_models():
+    """Test that models built without info don't share state"""
+    for model in (Board, List, Card, Comment, Label):
+        obj = model()
+        assert obj.id is None and obj.show_details is False
+    first, second = Card(), Card()
+    first.comments.append("x")
+    assert second.comments == []
+    assert List().cards == [] and Board().lists == []
+
+
+def test_trello_slots():
+    """Test that models are slotted records"""
+    card = Card(CARD)
+    with pytest.raises(AttributeError):
+        card.unknown = True
+    assert "list_id" in repr(card)
+    comment = Comment({"id": "d1", "date": "2019", "data": {"text": "hi"},
+                       "memberCreator": {"fullName": "Bob"}})
+    assert (comment.name, comment.text) == ("Bob", "hi")
@@ -0,0 +1,120 @@
+import pytest
+import requests
+from benchmarks.fake_trello import oid
+from trellolo.config import Config
+from trellolo.credentials import CredentialCache
+from trellolo.ratelimit import RateLimiter
+from trellolo.trelloapi import TrelloAPI
+
+
+def test_trelloapi_batch_params():
+    """Test that sub-request commas don't split the batch urls list"""
+    params = TrelloAPI.batch_params([
+        ("/1/cards/abc/actions", {"filter": "commentCard,updateCard"}),
+        ("/1/lists/def", {}),
+    ])
+    assert params == {
+        "urls": "/cards/abc/actions?filter=commentCard%2CupdateCard,"
+        "/lists/def"
+    }
+
+
+def test_trelloapi_batch_chunks():
+    """Test that batches never exceed Trello's sub-request limit"""
+    chunks = TrelloAPI.batch_chunks([("/1/x", {})] * 25)
+    assert [len(c) for c in chunks] == [10, 10, 5]
+
+
+def test_trelloapi_split_batch():
+    """Test that batch results are split back out, in order"""
+    assert TrelloAPI.split_batch([{"200": [1]}, {"200": []}]) == [[1], []]
+    with pytest.raises(requests.HTTPError) as e:
+        TrelloAPI.split_batch([
+            {"200": []},
+            {"name": "ERROR", "message": "invalid id", "statusCode": 400},
+        ])
+    assert str(e.value) == "400: invalid id"
+
+
+def test_trelloapi_caches_credential_checks(tmp_path, monkeypatch):
+    """Test that credentials are validated once, then again after a 401"""
+    monkeypatch.setattr(Config, "config_file", tmp_path / ".trellolo.cfg")
+    monkeypatch.setattr(TrelloAPI, "api_key", None)
+    monkeypatch.setattr(TrelloAPI, "token", None)
+    checks = []
+    monkeypatch.setattr(
+        TrelloAPI, "send_request",
+        classmethod(lambda cls, url="", **kwargs: checks.append(url))
+    )
+    TrelloAPI("key", "token")
+    TrelloAPI("key", "token")
+    assert checks == ["/1/tokens/token"]
+    assert "token" not in CredentialCache.cache_file().read_text()
+
+    # Only the credentials the failing request sent are forgotten
+    with pytest.raises(requests.HTTPError):
+        TrelloAPI.check_response(401, b"invalid token", "other", "pair")
+    TrelloAPI("key", "token")
+    assert len(checks) == 1
+    with pytest.raises(requests.HTTPError):
+        TrelloAPI.check_response(401, b"invalid token", "key", "token")
+    TrelloAPI("key", "token")
+    assert len(checks) == 2
+
+
+def test_trelloapi_stream_out_of_retries(monkeypatch):
+    """Test that a streamed request out of retries raises the 429"""
+    class Throttled:
+        status_code = 429
+        headers = {"Retry-After": "0"}
+        closed = False
+
+        @property
+        def content(self):
+            assert not self.closed, "body read after close"
+            return b"API_TOKEN_LIMIT_EXCEEDED"
+
+        def close(self):
+            self.closed = True
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            self.close()
+
+    class Session:
+        def request(self, **kwargs):
+            sent.append(kwargs["url"])
+            return Throttled()
+
+    sent = []
+    limiter = RateLimiter()
+    limiter.max_retries = 1
+    monkeypatch.setattr(TrelloAPI, "get_session", classmethod(
+        lambda cls: Session()
+    ))
+    monkeypatch.setattr(TrelloAPI, "rate_limiter", limiter)
+    monkeypatch.setattr(TrelloAPI.cache, "enabled", False)
+    with pytest.raises(requests.HTTPError) as e:
+        list(TrelloAPI.stream_request("/1/boards/b1"))
+    assert str(e.value) == "429: API_TOKEN_LIMIT_EXCEEDED"
+    assert len(sent) == 2
+
+
+def test_trelloapi_reuses_connections(fake_trello, fake_cli):
+    """Test that one connection serves every request, as --stats says"""
+    result = fake_cli(
+        "--stats", "--debug", "list", "show", "-i", oid(3, 0, 0)
+    )
+    assert result.exit_code == 0, result.stderr
+    # Four, or five with the check of the credentials
+    sent = fake_trello.stats["requests"]
+    assert sent >= 4
+    connections = [
+        line for line in result.stderr.splitlines()
+        if line.startswith("Connections")
+    ]
+    assert connections == [
+        f"Connections opened: 1 | reused: {sent - 1} | requests: {sent}"
+    ]
@@ -0,0 +1,79 @@
+import json
+from threading import Thread
+
+import pytest
+import requests
+from trellolo.cache import ResponseCache
+from trellolo.mirror import Mirror
+from trellolo.webhook import WebhookServer, signature
+
+CALLBACK_URL = "https://example.com/trello"
+SECRET = "s3cret"
+BOARD_ID = "5c6b993fa3eabe2af426aa2a"
+CARD_ID = "5c72fa330f4c0b8bd50a2799"
+# A callback as Trello posts it, trimmed to what is used
+PAYLOAD = {
+    "model": {"id": BOARD_ID, "name": "Board"},
+    "action": {
+        "id": "5c72fa305cf82e3a0e47ef9e",
+        "type": "updateCard",
+        "date": "2019-02-25T23:05:24.806Z",
+        "data": {
+            "card": {"id": CARD_ID, "name": "Renamed", "closed": True},
+            "old": {"name": "Card", "closed": False},
+            "board": {"id": BOARD_ID, "name": "Board"},
+        },
+    },
+}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """Webhook server on a free port, over a mirror holding one card"""
+    monkeypatch.setattr(Mirror, "db_file", tmp_path / "mirror.db")
+    monkeypatch.setattr(ResponseCache, "cache_dir", tmp_path / "responses")
+    mirror = Mirror()
+    mirror.load_board({
+        "id": BOARD_ID, "name": "Board", "lists": [], "labels": [],
+        "cards": [{"id": CARD_ID, "name": "Card", "idBoard": BOARD_ID}],
+        "comments": [], "last_action_id": "1",
+    })
+    mirror.close()
+    server = WebhookServer(("127.0.0.1", 0), CALLBACK_URL, SECRET, log=str)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, body, secret=SECRET):
+    return requests.post(url, data=body, headers={
+        "X-Trello-Webhook": signature(secret, body, CALLBACK_URL)
+    })
+
+
+def test_webhook_applies_signed_actions(server):
+    """Test that a recorded callback updates the mirror and the cache"""
+    cache_key = ResponseCache.key("GET", f"/1/cards/{CARD_ID}", {})
+    ResponseCache.save(
+        cache_key, f"/1/cards/{CARD_ID}", {}, json.dumps({"id": CARD_ID}), {}
+    )
+    assert requests.head(server).status_code == 200
+    assert post(server, json.dumps(PAYLOAD).encode()).status_code == 200
+    mirror = Mirror()
+    card = mirror.card(CARD_ID)
+    assert (card["name"], card["closed"]) == ("Renamed", 1)
+    # Only a sync moves the cursor, so missed callbacks are replayed
+    assert mirror.board(BOARD_ID)["last_action_id"] == "1"
+    mirror.close()
+    assert ResponseCache.load(cache_key) is None
+
+
+def test_webhook_rejects_bad_callbacks(server):
+    """Test that unsigned or malformed callbacks change nothing"""
+    body = json.dumps(PAYLOAD).encode()
+    assert post(server, body, secret="wrong").status_code == 401
+    assert post(server, b"{").status_code == 400
+    mirror = Mirror()
+    assert mirror.card(CARD_ID)["name"] == "Card"
+    mirror.close()
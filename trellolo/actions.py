@@ -0,0 +1,103 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from trellolo.trelloapi import TrelloAPI
+
+
+class ActionPages:
+    """Walk an action feed newest first, a full page per request
+
+    Iterating yields the actions one by one, sync or async depending on
+    the API class, and only asks for a page when the previous one is used
+    up, so stopping early wastes no requests. With prefetch, the next page
+    is requested while the current one is consumed: faster when the whole
+    feed is read, at the cost of at most one unused page.
+    """
+
+    # Trello returns at most 1000 actions per request
+    page_size = 1000
+
+    def __init__(
+        self, url, params={}, since=None, before=None, first_page=None,
+        prefetch=False, api=TrelloAPI
+    ):
+        self.url = url
+        self.params = dict(params, limit=self.page_size)
+        if since:
+            self.params["since"] = since
+        self.before = before
+        # A page already fetched, e.g. through a batch, to continue from
+        self.first_page = first_page
+        self.prefetch = prefetch
+        self.api = api
+
+    def query(self, before=None):
+        if before:
+            return dict(self.params, before=before)
+        return self.params
+
+    def next_cursor(self, page):
+        """Return the cursor of the page after this one, if there is one"""
+        if len(page) >= self.page_size:
+            return page[-1]["id"]
+        return None
+
+    def fetch(self, before):
+        return self.api.send_request(self.url, params=self.query(before)) or []
+
+    def pages(self):
+        """Yield each page of actions"""
+        page = self.first_page
+        if page is None:
+            page = self.fetch(self.before)
+        if not self.prefetch:
+            while True:
+                yield page
+                before = self.next_cursor(page)
+                if not before:
+                    return
+                page = self.fetch(before)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while True:
+                before = self.next_cursor(page)
+                if before:
+                    pending = executor.submit(self.fetch, before)
+                yield page
+                if not before:
+                    return
+                page = pending.result()
+
+    def __iter__(self):
+        for page in self.pages():
+            yield from page
+
+    async def apages(self):
+        """Yield each page of actions, using an async API class"""
+        page = self.first_page
+        if page is None:
+            page = await self.afetch(self.before)
+        pending = None
+        try:
+            while True:
+                before = self.next_cursor(page)
+                if before and self.prefetch:
+                    pending = asyncio.ensure_future(self.afetch(before))
+                yield page
+                if not before:
+                    return
+                page = await (pending or self.afetch(before))
+                pending = None
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def afetch(self, before):
+        resp = await self.api.send_request(
+            self.url, params=self.query(before)
+        )
+        return resp or []
+
+    async def __aiter__(self):
+        async for page in self.apages():
+            for action in page:
+                yield action
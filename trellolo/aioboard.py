@@ -0,0 +1,116 @@
+import asyncio
+from collections import deque
+from functools import partial
+from threading import Lock
+
+from trellolo.actions import ActionPages
+from trellolo.aiotrelloapi import AsyncTrelloAPI
+from trellolo.board import Batch, BoardAPI, Call, Pages
+from trellolo.trello import Comment
+
+
+class AsyncBoardAPI(BoardAPI):
+    """asyncio flavour of BoardAPI with the same methods
+
+    The methods share BoardAPI's implementation, with their requests
+    awaited instead, so every network method returns an awaitable.
+    Create the client, then ``await trello.auth(key, token)`` before
+    making any other call.
+    """
+
+    api = AsyncTrelloAPI
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+        AsyncTrelloAPI()
+
+    async def imap(self, func, items):
+        """Lazily await func on each item, in order.
+
+        At most AsyncTrelloAPI.concurrency calls are in flight or waiting
+        to be consumed, so memory stays bounded.
+        """
+        pending = deque()
+        for item in items:
+            pending.append(asyncio.ensure_future(func(item)))
+            if len(pending) >= AsyncTrelloAPI.concurrency:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+
+    async def map(self, func, items):
+        """Await func on every item at once, keeping order"""
+        return await asyncio.gather(*[func(i) for i in items])
+
+    async def run(self, steps):
+        """Await the needs of a driven method, returning its result"""
+        send, answer = steps.send, None
+        while True:
+            try:
+                need = send(answer)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                send, answer = steps.send, await self.answer(need)
+            except Exception as e:
+                send, answer = steps.throw, e
+
+    async def answer(self, need):
+        if isinstance(need, Call):
+            return await need.method(*need.args, **need.kwargs)
+        if isinstance(need, Batch):
+            return await self.api.send_batch(need.requests)
+        if isinstance(need, Pages):
+            pages = ActionPages(
+                need.url, need.params, first_page=need.first_page,
+                api=self.api,
+            )
+            return [a async for a in pages]
+        return await self.api.send_request(
+            need.url, method=need.method, params=need.params
+        )
+
+    async def auth(self, key="", token=""):
+        await AsyncTrelloAPI.auth(key, token)
+        self.initialized = AsyncTrelloAPI.initialized
+
+    async def close(self):
+        await AsyncTrelloAPI.close()
+
+    async def iter_card_comments(self, id="", first_page=None):
+        url = f"/1/cards/{id}/actions"
+        pages = ActionPages(
+            url, self.comments_query(), first_page=first_page,
+            api=AsyncTrelloAPI,
+        )
+        async for action in pages:
+            yield Comment(action)
+
+    async def bulk_change(self, type, action, ids):
+        """Delete or archive objects concurrently, yielding (id, error)"""
+        with AsyncTrelloAPI.cache.batched():
+            change = partial(self.change, type, action)
+            async for result in self.imap(change, ids):
+                yield result
+
+    async def iter_all_by_type(self, lists=False, cards=False):
+        """Yield every board as soon as its data has arrived"""
+        if cards:
+            ids = await self.get_board_ids()
+            async for board in self.imap(self.get_board_tree_by_id, ids):
+                board.show_details = True
+                yield board
+        else:
+            for board in await self.get_boards(lists=lists):
+                board.show_details = lists
+                yield board
+
+    async def show_all_by_type(self, lists=False, cards=False):
+        empty = True
+        async for board in self.iter_all_by_type(lists=lists, cards=cards):
+            self.render(board)
+            empty = False
+
+        if empty:
+            print("No boards available!")  # pragma: no cover
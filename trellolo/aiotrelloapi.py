@@ -0,0 +1,222 @@
+import asyncio
+from contextlib import asynccontextmanager
+from functools import partial
+
+import aiohttp
+
+from trellolo.trelloapi import TrelloAPI
+
+
+class TransportResponse:
+    """The parts of an aiohttp response used, from a transport response"""
+
+    def __init__(self, resp):
+        self.status = resp.status_code
+        self.headers = resp.headers
+        self.content = resp.content
+
+    async def read(self):
+        return self.content
+
+
+class TransportSession:
+    """aiohttp-like session sending through a blocking transport
+
+    Lets the async client use TrelloAPI.transport, e.g. a Cassette, by
+    running each of its requests in a thread.
+    """
+
+    closed = False
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    @asynccontextmanager
+    async def request(self, **kwargs):
+        loop = asyncio.get_running_loop()
+        resp = await loop.run_in_executor(
+            None, partial(self.transport.request, **kwargs)
+        )
+        yield TransportResponse(resp)
+
+
+class AsyncTrelloAPI(TrelloAPI):
+    """asyncio flavour of TrelloAPI built on a shared aiohttp pool"""
+
+    api_key = None
+    token = None
+    url = None
+    initialized = False
+    pool_size = 100
+    # Maximum number of requests in flight at once
+    concurrency = 100
+    session = None
+    semaphore = None
+    # Connections opened and reused by the sessions created
+    connections_opened = 0
+    connections_reused = 0
+    _loop = None
+
+    @classmethod
+    def __init__(cls, key="", token="", url=""):
+        # Credentials are validated by awaiting auth()
+        cls.url = cls.base_url + url
+
+    @classmethod
+    async def auth(cls, key="", token="", url=""):
+        cls.url = cls.base_url + url
+        if key and token and await cls.valid_credentials(key, token):
+            cls.api_key = key
+            cls.token = token
+
+    @classmethod
+    def get_session(cls):
+        """Return the session of the running loop, creating it if needed"""
+        loop = asyncio.get_running_loop()
+        if cls._loop is not loop:
+            cls.semaphore = asyncio.Semaphore(cls.concurrency)
+            cls._loop, cls.session = loop, None
+        if cls.transport is not None:
+            return TransportSession(cls.transport)
+        if cls.session is None or cls.session.closed:
+            cls.session = cls.new_session()
+        return cls.session
+
+    @classmethod
+    def new_session(cls):
+        """Create a keep-alive session backed by a connection pool"""
+        connector = aiohttp.TCPConnector(
+            limit=cls.pool_size, limit_per_host=cls.pool_size
+        )
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(cls.connection_opened)
+        trace.on_connection_reuseconn.append(cls.connection_reused)
+        return aiohttp.ClientSession(
+            connector=connector,
+            auto_decompress=True,
+            headers={
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+            },
+            trace_configs=[trace],
+        )
+
+    @classmethod
+    async def connection_opened(cls, session, context, params):
+        cls.connections_opened += 1
+
+    @classmethod
+    async def connection_reused(cls, session, context, params):
+        cls.connections_reused += 1
+
+    @classmethod
+    def set_pool_size(cls, size):
+        """Set the connection pool size used by the next session"""
+        cls.pool_size = size
+
+    @classmethod
+    async def close(cls):
+        """Close the shared session and its pooled connections"""
+        if cls.session is not None:
+            await cls.session.close()
+            cls.session = None
+
+    @classmethod
+    def connection_stats(cls):
+        """Return how many connections were opened and reused"""
+        return {
+            "opened": cls.connections_opened,
+            "reused": cls.connections_reused,
+            "requests": cls.connections_opened + cls.connections_reused,
+        }
+
+    @staticmethod
+    async def in_thread(func, *args):
+        """Run blocking file I/O, like the cache's, off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(func, *args))
+
+    @classmethod
+    async def send_rate_limited(cls, kwargs, trace=None):
+        """Send a request through the rate limiter, retrying on 429s"""
+        key, token = cls.credentials_sent(kwargs)
+        limiter = cls.rate_limiter
+        session = cls.get_session()
+        for attempt in range(limiter.max_retries + 1):
+            await asyncio.sleep(limiter.reserve(key, token))
+            async with cls.semaphore:
+                async with session.request(**kwargs) as resp:
+                    content = await resp.read()
+            cls.count_bytes(len(content))
+            if resp.status != 429:
+                limiter.update(key, token, resp.headers)
+                break
+            wait = limiter.throttled(
+                key, token, resp.headers.get("Retry-After"), attempt
+            )
+            if attempt == limiter.max_retries:
+                break
+            if trace is not None:
+                trace["retries"] = attempt + 1
+            await asyncio.sleep(wait)
+        return resp, content
+
+    @classmethod
+    async def send_request(
+        cls, url="", method="GET", headers={}, params={}, data={},
+        key="", token=""
+    ):
+        """Make a generic Trello API call without blocking the loop."""
+        kwargs = cls.build_request(
+            url, method, headers, params, data, key, token
+        )
+        trace = cls.tracer.start(kwargs["method"], url)
+        cache_key, entry = await cls.in_thread(cls.cache_lookup, kwargs)
+        if entry and cls.cache.fresh(entry):
+            cls.tracer.finish(trace, 200, cache="fresh")
+            return entry["body"]
+
+        resp, content = await cls.send_rate_limited(kwargs, trace)
+        if entry and resp.status == 304:
+            cls.tracer.finish(trace, 304, cache="revalidated")
+            return await cls.in_thread(
+                cls.cache.revalidated, cache_key, entry
+            )
+        cls.tracer.finish(trace, resp.status, len(content))
+        cls.check_response(
+            resp.status, content, *cls.credentials_sent(kwargs)
+        )
+        body = cls.decoder.decode(content)
+        await cls.in_thread(
+            cls.cache_update, url, kwargs, cache_key, resp.headers, content,
+            body
+        )
+        return body
+
+    @classmethod
+    async def send_batch(cls, calls, strict=True):
+        """Coalesce independent (url, params) GETs into /1/batch calls."""
+        if len(calls) == 1 and strict:
+            url, params = calls[0]
+            return [await cls.send_request(url, params=params)]
+
+        resps = await asyncio.gather(*[
+            cls.send_request("/1/batch", params=cls.batch_params(chunk))
+            for chunk in cls.batch_chunks(calls)
+        ])
+        return [
+            result
+            for resp in resps
+            for result in cls.split_batch(resp, strict)
+        ]
+
+    @classmethod
+    async def valid_credentials(cls, key, token):
+        """Validate the API key, unless it was validated recently"""
+        if not await cls.in_thread(cls.credentials.valid, key, token):
+            await cls.send_request(
+                url=f"/1/tokens/{token}", key=key, token=token
+            )
+            await cls.in_thread(cls.credentials.save, key, token)
+        cls.initialized = True
+        return True
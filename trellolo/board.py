@@ -1,14 +1,147 @@
+import sys
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from threading import Lock
+
+from trellolo.actions import ActionPages
+from trellolo.stream import JSONStream
 from trellolo.trello import Board, Card, Comment, Label, List
 from trellolo.trelloapi import TrelloAPI
 
+# What a step of a client method needs answered, see driven()
+Request = namedtuple("Request", "url method params", defaults=("GET", {}))
+Batch = namedtuple("Batch", "requests")
+Pages = namedtuple("Pages", "url params first_page", defaults=(None,))
+
+
+class Call:
+    """A call of another client method, awaited by the async client"""
+
+    def __init__(self, method, *args, **kwargs):
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+
+
+def driven(steps):
+    """Make a generator of the requests a method needs a client method.
+
+    The generator yields a Request, Batch, Pages or Call and is sent the
+    answer. The client's run() answers them, blocking in BoardAPI and
+    awaiting in AsyncBoardAPI, so both share a single implementation.
+    """
+    @wraps(steps)
+    def method(self, *args, **kwargs):
+        return self.run(steps(self, *args, **kwargs))
+
+    return method
+
 
 class BoardAPI:
 
+    api = TrelloAPI
     _initialized = False
+    # Trello caps nested actions at 1000 per request
+    actions_limit = 1000
+    # Maximum number of requests in flight at once
+    concurrency = 1
+    # Parse whole boards incrementally instead of loading them at once
+    stream = False
+    # Streamed cards whose comments are fetched together
+    stream_window = 100
+    # Request behind each bulk change, by object type and action
+    bulk_requests = {
+        ("card", "delete"): ("DELETE", "/1/cards/{}", {}),
+        ("card", "archive"): ("PUT", "/1/cards/{}", {"closed": "true"}),
+        ("list", "archive"): ("PUT", "/1/lists/{}/closed", {"value": "true"}),
+        ("board", "delete"): ("DELETE", "/1/boards/{}", {}),
+        ("board", "archive"): ("PUT", "/1/boards/{}", {"closed": "true"}),
+    }
 
     def __init__(self, key="", token=""):
+        self._lock = Lock()
+        self.reset()
         self.auth(key, token)
 
+    def reset(self):
+        """Start a new request scope with an empty identity map"""
+        self._identity_map = {}
+        self.saved_requests = 0
+
+    def _recall(self, type, id):
+        """Return an object already fetched in this scope, if any"""
+        obj = self._identity_map.get((type, id))
+        if obj is not None:
+            with self._lock:
+                self.saved_requests += 1
+        return obj
+
+    def _remember(self, type, id, obj):
+        """Keep an object so later lookups are served from memory"""
+        self._identity_map[(type, id)] = obj
+        return obj
+
+    def _forget(self, type, id):
+        self._identity_map.pop((type, id), None)
+
+    def imap(self, func, items):
+        """Lazily call func on each item, in parallel if allowed, in order.
+
+        At most `concurrency` calls are in flight or waiting to be
+        consumed, so memory stays bounded however many items there are.
+        """
+        if self.concurrency <= 1:
+            for item in items:
+                yield func(item)
+            return
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = deque()
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= self.concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def map(self, func, items):
+        """Call func on each item, in parallel if allowed, keeping order"""
+        return [r for r in self.imap(func, items)]
+
+    def run(self, steps):
+        """Answer the needs of a driven method, returning its result"""
+        send, answer = steps.send, None
+        while True:
+            try:
+                need = send(answer)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                send, answer = steps.send, self.answer(need)
+            except Exception as e:
+                send, answer = steps.throw, e
+
+    def answer(self, need):
+        if isinstance(need, Call):
+            return need.method(*need.args, **need.kwargs)
+        if isinstance(need, Batch):
+            return self.api.send_batch(need.requests, mapper=self.map)
+        if isinstance(need, Pages):
+            return list(ActionPages(
+                need.url, need.params, first_page=need.first_page
+            ))
+        return self.api.send_request(
+            need.url, method=need.method, params=need.params
+        )
+
+    @staticmethod
+    def render(obj):
+        """Write an object to stdout as its lines are produced"""
+        out = sys.stdout
+        for line in obj.lines():
+            out.write(f"{line}\n")
+        out.flush()
+
     def auth(self, key="", token=""):
         TrelloAPI(key, token)
         self.initialized = TrelloAPI.initialized
@@ -21,83 +154,306 @@ class BoardAPI:
     def initialized(self, val):
         self._initialized = val
 
+    # Projections: each fetch asks only for the fields its models render
+
+    @staticmethod
+    def board_ids_query():
+        return {"filter": "all", "fields": "id"}
+
+    @staticmethod
+    def boards_query(lists=False):
+        return {
+            "filter": "all",
+            "fields": Board.projection(),
+            "lists": "open" if lists else "none",
+            "list_fields": List.projection(),
+        }
+
+    @staticmethod
+    def board_query(lists=True):
+        query_string = {"fields": Board.projection()}
+        if lists:
+            query_string.update(lists="open", list_fields=List.projection())
+        return query_string
+
+    @classmethod
+    def board_tree_query(cls):
+        return {
+            "fields": Board.projection(),
+            "lists": "open",
+            "list_fields": List.projection(),
+            "cards": "all",
+            "card_fields": Card.projection(),
+            "actions": "commentCard",
+            "actions_limit": cls.actions_limit,
+            "action_fields": Comment.projection(),
+            "action_memberCreator_fields": ",".join(Comment.member_fields),
+        }
+
+    @staticmethod
+    def labels_query():
+        return {"fields": Label.projection()}
+
+    @staticmethod
+    def list_query():
+        return {"fields": List.projection()}
+
+    @staticmethod
+    def lists_query():
+        return {
+            "fields": List.projection(),
+            "cards": "all",
+            "card_fields": Card.projection(),
+        }
+
+    @staticmethod
+    def card_query():
+        return {"fields": Card.projection()}
+
+    @staticmethod
+    def comments_query():
+        return {
+            "filter": "commentCard",
+            "limit": ActionPages.page_size,
+            "fields": Comment.projection(),
+            "memberCreator_fields": ",".join(Comment.member_fields),
+        }
+
+    @driven
     def add_board(self, name):
         url = "/1/boards/"
         query_string = {"name": name}
-        resp = TrelloAPI.send_request(
-            method="POST", url=url, params=query_string
-        )
+        resp = yield Request(url, "POST", query_string)
         if resp:
             print("Board Added:")
-            board = self.get_board_by_id(resp["id"])
+            board = self._remember("board", resp["id"], Board(resp))
             print(board)
             return board
         else:
             raise Exception("Unable to create board")
 
+    @driven
     def delete_board(self, id):
         url = f"/1/boards/{id}"
-        board = self.get_board_by_id(id)
+        board = yield Call(self.get_board_by_id, id)
         if not board.id:
             raise Exception(f"Unable to find board with ID: {id}")
 
-        resp = TrelloAPI.send_request(method="DELETE", url=url)
+        resp = yield Request(url, "DELETE")
         if resp:
+            self._forget("board", id)
             print(f"Board {id} deleted")
         else:
             raise Exception("Unable to delete board")
 
+    @driven
     def get_board_ids(self, title=""):
         url = "/1/members/me/boards"
-        query_string = {"filter": "all", "fields": ""}
-        resp = TrelloAPI.send_request(url, params=query_string)
+        query_string = self.board_ids_query()
+        resp = yield Request(url, params=query_string)
         boards = []
         if resp:
             boards = [b["id"] for b in resp if b.get("id")]
         return boards
 
+    @driven
+    def get_boards(self, lists=False):
+        """Get all boards, and optionally their lists, in one request"""
+        url = "/1/members/me/boards"
+        query_string = self.boards_query(lists)
+        resp = yield Request(url, params=query_string)
+        boards = []
+        if resp:
+            boards = [Board(b) for b in resp if b.get("id")]
+        return boards
+
+    @driven
     def get_board_labels(self, id=""):
+        labels = self._recall("labels", id)
+        if labels is not None:
+            return labels
+
         url = f"/1/boards/{id}/labels"
-        query_string = {"fields": "all"}
-        resp = TrelloAPI.send_request(url, params=query_string)
+        query_string = self.labels_query()
+        resp = yield Request(url, params=query_string)
         labels = []
         if resp:
             for l in resp:
                 label = Label(l)
                 labels.append(label)
+            self._remember("labels", id, labels)
         return labels
 
-    def get_list_by_id(self, id=""):
-        url = f"/1/lists/{id}"
-        query_string = {"fields": "all"}
-        resp = TrelloAPI.send_request(url, params=query_string)
-        _list = List()
-        if resp:
-            _list = List(resp)
-            _list.cards = self.get_cards_by_list_id(id)
+    @driven
+    def get_list_by_id(self, id="", cards=True):
+        _list = self._recall("list", id)
+        if _list is None:
+            url = f"/1/lists/{id}"
+            query_string = self.list_query()
+            resp = yield Request(url, params=query_string)
+            _list = List()
+            if resp:
+                _list = self._remember("list", id, List(resp))
+        if _list.id and cards:
+            _list.cards = yield Call(self.get_cards_by_list_id, id)
         return _list
 
+    @driven
     def get_cards_by_list_id(self, id=""):
+        cards = self._recall("cards", id)
+        if cards is not None:
+            return cards
+
         url = f"/1/lists/{id}/cards"
-        resp = TrelloAPI.send_request(url)
+        query_string = self.card_query()
+        resp = yield Request(url, params=query_string)
         cards = []
         if resp:
             cards = [Card(c) for c in resp]
+            self._remember("cards", id, cards)
         return cards
 
+    @driven
     def get_board_by_id(self, id=""):
+        board = self._recall("board", id)
+        if board is not None:
+            return board
+
+        url = f"/1/boards/{id}"
+        query_string = self.board_query()
+        resp = yield Request(url, params=query_string)
+        board = Board()
+        if resp:
+            board = self._remember("board", id, Board(resp))
+        return board
+
+    @driven
+    def get_board_tree_by_id(self, id=""):
+        """Get a board with its lists, cards and comments in one request"""
+        url = f"/1/boards/{id}"
+        query_string = self.board_tree_query()
+        resp = yield Request(url, params=query_string)
+        board = Board()
+        if resp:
+            board = self.build_board_tree(resp)
+            if self.actions_truncated(resp):
+                yield Call(self.update_card_comments, board.lists)
+            else:
+                missing = self.comments_missing(resp)
+                if missing:
+                    yield Call(self.update_card_comments, board.lists, missing)
+        return board
+
+    @classmethod
+    def actions_truncated(cls, info):
+        """Whether the nested actions hit the cap and may miss comments"""
+        return len(info.get("actions", [])) >= cls.actions_limit
+
+    @staticmethod
+    def comments_missing(info):
+        """Return the IDs of the cards missing comments in the actions
+
+        Those are comments made before a card moved from another board.
+        """
+        found = {}
+        for action in info.get("actions", []):
+            card_id = action.get("data", {}).get("card", {}).get("id")
+            found[card_id] = found.get(card_id, 0) + 1
+        return {
+            c["id"] for c in info.get("cards", [])
+            if (c.get("badges") or {}).get("comments", 0)
+            > found.get(c["id"], 0)
+        }
+
+    @staticmethod
+    def build_board_tree(info):
+        """Build the Board/List/Card/Comment tree from a nested response"""
+        board = Board(info)
+        board.show_details = True
+
+        cards = {}
+        for c in info.get("cards", []):
+            cards.setdefault(c.get("idList"), []).append(Card(c))
+
+        comments = {}
+        for action in info.get("actions", []):
+            card_id = action.get("data", {}).get("card", {}).get("id")
+            comments.setdefault(card_id, []).append(action)
+
+        for _list in board.lists:
+            _list.show_details = True
+            _list.cards = cards.get(_list.id, [])
+            for _card in _list.cards:
+                if _card.has_comments:
+                    _card.comments = [
+                        Comment(c) for c in comments.get(_card.id, [])
+                    ]
+        return board
+
+    def stream_board_by_id(self, id=""):
+        """Get a board whose lists and cards are parsed as they are read"""
         url = f"/1/boards/{id}"
-        query_string = {"actions": "all", "cards": "all", "lists": "all"}
+        query_string = self.board_query(lists=False)
         resp = TrelloAPI.send_request(url, params=query_string)
         board = Board()
         if resp:
             board = Board(resp)
+            board.show_details = True
+            board.lists = self.stream_lists_by_board_id(id)
         return board
 
+    def stream_lists_by_board_id(self, id=""):
+        """Yield each list of a board, its cards streaming after it.
+
+        A list's cards must be consumed before the next list is read, and
+        nothing is kept, so memory stays flat however big the board is.
+        """
+        url = f"/1/boards/{id}/lists"
+        query_string = self.lists_query()
+        stream = JSONStream(TrelloAPI.stream_request(url, query_string))
+        for _ in stream.items():
+            info, cards = {}, None
+            for key in stream.members():
+                if key != "cards":
+                    info[key] = stream.value()
+                    continue
+                # Trello sends nested cards after the list's own fields
+                _list = List(info)
+                _list.show_details = True
+                _list.cards = cards = self._stream_cards(stream)
+                yield _list
+                for _ in cards:
+                    pass
+            if cards is None:
+                _list = List(info)
+                _list.show_details = True
+                yield _list
+
+    def _stream_cards(self, stream):
+        """Yield the cards of a streamed array, a window at a time"""
+        window = []
+        for _ in stream.items():
+            window.append(Card(stream.value()))
+            if len(window) >= self.stream_window:
+                yield from self._update_streamed_comments(window)
+                window = []
+        yield from self._update_streamed_comments(window)
+
+    def _update_streamed_comments(self, cards):
+        """Fetch the comments of streamed cards without keeping them"""
+        commented = [c for c in cards if c.has_comments]
+        comments = self.get_card_comments_by_ids(
+            [c.id for c in commented], remember=False
+        )
+        for _card, _comments in zip(commented, comments):
+            _card.comments = _comments
+        return cards
+
+    @driven
     def get_lists_by_board_id(self, id=""):
         url = f"/1/boards/{id}/lists"
-        query_string = {"cards": "all", "card_fields": "all"}
-        resp = TrelloAPI.send_request(url, params=query_string)
+        query_string = self.lists_query()
+        resp = yield Request(url, params=query_string)
         lists = []
         if resp:
             for l in resp:
@@ -105,25 +461,54 @@ class BoardAPI:
                 lists.append(_list)
         return lists
 
+    @driven
     def get_card_comments_by_id(self, id=""):
+        comments = self._recall("comments", id)
+        if comments is not None:
+            return comments
+
         url = f"/1/cards/{id}/actions"
-        query_string = {"filter": "commentCard"}
-        resp = TrelloAPI.send_request(url, params=query_string)
-        comments = []
-        if resp:
-            comments = [Comment(c) for c in resp]
-        return comments
+        actions = yield Pages(url, self.comments_query())
+        comments = [Comment(a) for a in actions]
+        return self._remember("comments", id, comments)
+
+    def iter_card_comments(self, id="", first_page=None):
+        """Yield a card's comments newest first, a page at a time"""
+        url = f"/1/cards/{id}/actions"
+        pages = ActionPages(url, self.comments_query(), first_page=first_page)
+        for action in pages:
+            yield Comment(action)
+
+    @driven
+    def get_card_comments_by_ids(self, ids, remember=True):
+        """Get the comments of many cards through batched requests"""
+        if not remember:
+            found = dict.fromkeys(ids)
+        else:
+            found = {id: self._recall("comments", id) for id in ids}
+        missing = [id for id, comments in found.items() if comments is None]
 
+        url = "/1/cards/{}/actions"
+        query_string = self.comments_query()
+        resp = yield Batch(
+            [(url.format(id), query_string) for id in missing]
+        )
+        for id, page in zip(missing, resp):
+            # Only a full page goes on to ask for the next one
+            actions = yield Pages(url.format(id), query_string, page)
+            found[id] = [Comment(a) for a in actions]
+            if remember:
+                self._remember("comments", id, found[id])
+        return [found[id] for id in ids]
+
+    @driven
     def add_card(self, list_id, name="", description="", label_colour=[]):
         url = "/1/cards"
-        _list = self.get_list_by_id(list_id)
+        _list = yield Call(self.get_list_by_id, list_id, cards=False)
         labels = []
         if _list.id:
-            labels = [
-                l.id
-                for l in self.get_board_labels(_list.board_id)
-                if l.colour in label_colour
-            ]
+            board_labels = yield Call(self.get_board_labels, _list.board_id)
+            labels = [l.id for l in board_labels if l.colour in label_colour]
 
         if not labels:
             raise Exception(f"Unable to find label: {label_colour}")
@@ -135,132 +520,220 @@ class BoardAPI:
             "idLabels": ",".join(labels),
             "desc": description,
         }
-        resp = TrelloAPI.send_request(
-            method="POST", url=url, params=query_string
-        )
+        resp = yield Request(url, "POST", query_string)
         if resp:
-            card = self.get_card_by_id(resp['id'])
+            self._forget("cards", list_id)
+            card = self._remember("card", resp["id"], Card(resp))
             print(f"Card Added: {card}")
             return card
         else:
             raise Exception("Unable to add card")
 
+    @driven
     def add_card_comment(self, id, comment):
         url = f"/1/cards/{id}/actions/comments"
-        card = self.get_card_by_id(id)
+        card = yield Call(self.get_card_by_id, id)
         if not card.id:
             raise Exception(f"Unable to find card with ID: {id}")
 
         query_string = {"text": comment}
-        resp = TrelloAPI.send_request(
-            method="POST", url=url, params=query_string
-        )
+        resp = yield Request(url, "POST", query_string)
         if resp:
-            card = self.get_card_by_id(id)
             card.show_details = True
-            card.comments = self.get_card_comments_by_id(id)
+            card.has_comments = True
+            if resp.get("memberCreator"):
+                # Trello lists comments newest first
+                card.comments = [Comment(resp)] + card.comments
+                self._remember("comments", id, card.comments)
+            else:
+                self._forget("comments", id)
+                card.comments = yield Call(self.get_card_comments_by_id, id)
             print(f"Comment Added: {card}")
         else:
             raise Exception("Unable to add comment")
 
+    @driven
     def delete_card_comment(self, id, comment_id):
         url = f"/1/cards/{id}/actions/{comment_id}/comments"
-        card = self.get_card_by_id(id)
+        card = yield Call(self.get_card_by_id, id)
         if not card.id:
             raise Exception(f"Unable to find card with ID: {id}")
 
-        resp = TrelloAPI.send_request(method="DELETE", url=url)
+        resp = yield Request(url, "DELETE")
         if resp:
+            card.comments = [c for c in card.comments if c.id != comment_id]
+            card.has_comments = bool(card.comments)
+            self._remember("comments", id, card.comments)
             print("Comment Deleted")
         else:
             raise Exception("Unable to delete comment")
 
+    @driven
     def get_card_by_id(self, id=""):
+        card = self._recall("card", id)
+        if card is not None:
+            return card
+
         url = f"/1/cards/{id}"
-        query_string = {"fields": "all", "card_fields": "all"}
-        resp = TrelloAPI.send_request(url, params=query_string)
+        query_string = self.card_query()
+        resp = yield Request(url, params=query_string)
         card = Card()
         if resp:
-            card = Card(resp)
+            card = self._remember("card", id, Card(resp))
             if card.has_comments:
-                card.comments = self.get_card_comments_by_id(id)
+                card.comments = yield Call(self.get_card_comments_by_id, id)
         return card
 
+    @driven
     def delete_card_by_id(self, id=""):
         url = f"/1/cards/{id}"
-        resp = TrelloAPI.send_request(method="DELETE", url=url)
+        resp = yield Request(url, "DELETE")
         if resp:
+            card = self._identity_map.get(("card", id))
+            if card is not None:
+                self._forget("cards", card.list_id)
+            self._forget("card", id)
+            self._forget("comments", id)
             print(f"Card {id} deleted")
 
+    @driven
+    def find_card_ids(self, list_id=None, board_id=None, label=None):
+        """Get the open cards of a list or board, optionally with a label"""
+        if list_id:
+            url = f"/1/lists/{list_id}/cards"
+        else:
+            url = f"/1/boards/{board_id}/cards"
+        resp = yield Request(url, params={"fields": "labels"})
+        return self.ids_with_label(resp or [], label)
+
+    @staticmethod
+    def ids_with_label(cards, label=None):
+        """Return the IDs of the cards with a label name or colour"""
+        return [
+            c["id"] for c in cards
+            if not label or any(
+                label in (l.get("name"), l.get("color"))
+                for l in c.get("labels", [])
+            )
+        ]
+
+    @driven
+    def find_list_ids(self, board_id):
+        """Get the open lists of a board"""
+        url = f"/1/boards/{board_id}/lists"
+        resp = yield Request(url, params={"fields": "id"})
+        return [l["id"] for l in resp or []]
+
+    @driven
+    def change(self, type, action, id):
+        """Delete or archive an object, returning (id, error)"""
+        method, url, params = self.bulk_requests[(type, action)]
+        try:
+            yield Request(url.format(id), method, params)
+        except Exception as e:
+            return id, e
+        self._forget(type, id)
+        return id, None
+
+    def bulk_change(self, type, action, ids):
+        """Delete or archive objects concurrently, yielding (id, error).
+
+        Objects aren't looked up first, a missing one just fails, and the
+        cache is invalidated once at the end instead of after each change.
+        """
+        with self.api.cache.batched():
+            yield from self.imap(partial(self.change, type, action), ids)
+
     def get_all_boards(self):
-        boards = []
-        for id in self.get_board_ids():
-            board = self.get_board_by_id(id)
-            boards.append(board)
-        return boards
+        return self.get_boards(lists=True)
+
+    def iter_all_by_type(self, lists=False, cards=False):
+        """Yield every board as soon as its data has arrived"""
+        if cards:
+            get_board = (
+                self.stream_board_by_id if self.stream
+                else self.get_board_tree_by_id
+            )
+            boards = self.imap(get_board, self.get_board_ids())
+        else:
+            boards = iter(self.get_boards(lists=lists))
+        for board in boards:
+            board.show_details = lists or cards
+            yield board
 
     def show_all_by_type(self, lists=False, cards=False):
-        allboards = self.get_all_boards()
+        empty = True
+        for board in self.iter_all_by_type(lists=lists, cards=cards):
+            self.render(board)
+            empty = False
 
-        if len(allboards) == 0:
+        if empty:
             print("No boards available!")  # pragma: no cover
-        else:
-            for board in allboards:
-                if lists or cards:
-                    board.show_details = True
-                    board.lists = self.get_lists_by_board_id(board.id)
-                    if cards:
-                        self.update_boardlist_with_card_info(
-                            board, show_details=True
-                        )
-                print(board)
 
+    @driven
     def get_all_board_details(self, board_id, card="", list=""):
-        board = self.get_board_by_id(board_id)
+        if not card and not list:
+            if self.stream:
+                return self.stream_board_by_id(board_id)
+            return (yield Call(self.get_board_tree_by_id, board_id))
+
+        board = yield Call(self.get_board_by_id, board_id)
         board.show_details = True
         if list:
             board.lists = [list]
-        elif card:
-            board.lists = [self.get_list_by_id(card.list_id)]
         else:
-            board.lists = self.get_lists_by_board_id(board.id)
+            # Only the card itself is shown, so skip the list's other cards
+            _list = yield Call(self.get_list_by_id, card.list_id, cards=False)
+            _list.cards = [card]
+            board.lists = [_list]
 
-        board = self.update_boardlist_with_card_info(
+        board = yield Call(
+            self.update_boardlist_with_card_info,
             board, show_details=True, card=card, list=list
         )
         return board
 
+    @driven
     def show_by_id(self, id, type):
         if type == "list":
-            _list = self.get_list_by_id(id)
-            board = self.get_all_board_details(
-                _list.board_id, list=_list
+            _list = yield Call(self.get_list_by_id, id)
+            board = yield Call(
+                self.get_all_board_details, _list.board_id, list=_list
             )
         elif type == "card":
-            card = self.get_card_by_id(id)
-            board = self.get_all_board_details(
-                card.board_id, card=card
+            card = yield Call(self.get_card_by_id, id)
+            board = yield Call(
+                self.get_all_board_details, card.board_id, card=card
             )
         elif type == "board":
-            board = self.get_all_board_details(id)
+            board = yield Call(self.get_all_board_details, id)
         else:
             raise Exception("Unknown type for show_by_id()")
-        print(board)
+        self.render(board)
 
+    @driven
     def update_boardlist_with_card_info(
         self, board: Board, show_details=False, card="", list=""
     ):
         """Get detailed board list with card information"""
-        for _list in [
-            l for l in board.lists if not list or l.id == list.id
-        ]:
+        lists = [l for l in board.lists if not list or l.id == list.id]
+        for _list in lists:
             _list.show_details = show_details
-            cards = []
-            for _card in [
+            _list.cards = [
                 c for c in _list.cards if not card or c.id == card.id
-            ]:
-                if _card.has_comments:
-                    _card.comments = self.get_card_comments_by_id(_card.id)
-                cards.append(_card)
-            _list.cards = cards
+            ]
+        yield Call(self.update_card_comments, lists)
         return board
+
+    @driven
+    def update_card_comments(self, lists, ids=None):
+        """Fetch the comments of the commented cards on lists, or of ids"""
+        cards = [
+            c for l in lists for c in l.cards
+            if c.has_comments and (ids is None or c.id in ids)
+        ]
+        comments = yield Call(
+            self.get_card_comments_by_ids, [c.id for c in cards]
+        )
+        for _card, _comments in zip(cards, comments):
+            _card.comments = _comments
@@ -0,0 +1,374 @@
+import json
+import re
+from contextlib import contextmanager
+from hashlib import sha256
+import os
+from os import environ, replace, utime
+from pathlib import Path
+from threading import Lock
+from time import time
+
+from trellolo.decoder import JSONDecoder
+
+# Trello object IDs are 24 hex characters
+TRELLO_ID = re.compile(r"\b[0-9a-f]{24}\b")
+TRELLO_ID_BYTES = re.compile(TRELLO_ID.pattern.encode())
+# The board and list an object belongs to, including an action's board
+PARENT_ID = re.compile(
+    r'"(?:idBoard|idList|board"\s*:\s*\{\s*"id)"\s*:\s*"([0-9a-f]{24})"'
+)
+PARENT_ID_BYTES = re.compile(PARENT_ID.pattern.encode())
+
+
+def object_ids(*parts):
+    """Return the Trello IDs mentioned in some str or bytes"""
+    ids = set()
+    for part in parts:
+        if isinstance(part, bytes):
+            ids.update(i.decode() for i in TRELLO_ID_BYTES.findall(part))
+        else:
+            ids.update(TRELLO_ID.findall(part))
+    return ids
+
+
+def parent_ids(path, content):
+    """Return the IDs in a path and the parents mentioned by a response"""
+    ids = object_ids(path)
+    if isinstance(content, bytes):
+        ids.update(i.decode() for i in PARENT_ID_BYTES.findall(content))
+    else:
+        ids.update(PARENT_ID.findall(content))
+    return ids
+
+
+def private_open(path, mode="w"):
+    """Open a file for writing that only its owner can read"""
+    flags = os.O_WRONLY | os.O_CREAT
+    flags |= os.O_APPEND if mode == "a" else os.O_TRUNC
+    return open(os.open(path, flags, 0o600), mode)
+
+
+class ResponseCache:
+    """On-disk cache of GET responses with TTLs and ETag revalidation
+
+    Next to the entries, index/<id> lists the keys of the entries under
+    each ID of their path and each board and list their objects belong
+    to, so a mutation only opens the index files of the IDs it touched.
+    A mutation whose response doesn't name its board, like a deletion,
+    also drops every entry served without revalidation. The size file
+    keeps a running total of the entries and index, so the directory is
+    only scanned once max_size is crossed.
+    """
+
+    cache_dir = Path(
+        environ.get("XDG_CACHE_HOME", "~/.cache"), "trellolo", "responses"
+    ).expanduser()
+    enabled = True
+    # Least recently used entries are evicted above this many bytes
+    max_size = 50 * 1024 * 1024
+    # Seconds a response is served without revalidation, by endpoint
+    ttls = [
+        (re.compile(r"^/1/boards/\w+/labels$"), 3600),
+        (re.compile(r"^/1/boards/\w+$"), 60),
+        (re.compile(r"^/1/members/me/boards$"), 60),
+    ]
+    default_ttl = 0
+    # Endpoints never cached, as their paths hold the token
+    uncached = re.compile(r"^/1/tokens/")
+    # IDs collected while invalidation is batched, see batched()
+    _pending = None
+    _pending_lock = Lock()
+    _size_lock = Lock()
+    # Index of the entries of the member's endpoints, like new boards
+    members_index = "members"
+    # Index of the entries with a TTL
+    fresh_index = "fresh"
+
+    @classmethod
+    def ttl(cls, path):
+        """Return the TTL of an endpoint"""
+        for pattern, ttl in cls.ttls:
+            if pattern.match(path):
+                return ttl
+        return cls.default_ttl
+
+    @staticmethod
+    def key(method, url, params):
+        """Hash the method, URL and normalized params of a request"""
+        normalized = json.dumps(
+            [method, url, sorted((k, str(v)) for k, v in params.items())]
+        )
+        return sha256(normalized.encode()).hexdigest()
+
+    @classmethod
+    def entry_file(cls, key):
+        return cls.cache_dir / f"{key}.json"
+
+    @classmethod
+    def index_file(cls, id):
+        return cls.cache_dir / "index" / id
+
+    @classmethod
+    def size_file(cls):
+        return cls.cache_dir / "size"
+
+    @classmethod
+    def load(cls, key):
+        """Return a cached entry, marking it as recently used"""
+        if not cls.enabled:
+            return None
+        path = cls.entry_file(key)
+        try:
+            entry = JSONDecoder.decode(path.read_bytes())
+            utime(path)
+        except Exception:
+            return None
+        return entry
+
+    @staticmethod
+    def fresh(entry):
+        """Whether an entry can be served without revalidation"""
+        return entry["expires"] > time()
+
+    @staticmethod
+    def validators(entry):
+        """Return the conditional request headers of an entry"""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    @classmethod
+    def save(cls, key, path, headers, content, body):
+        """Cache a response that is fresh for a while or revalidatable"""
+        if not cls.enabled or cls.uncached.match(path):
+            return
+        ttl = cls.ttl(path)
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not ttl and not etag and not last_modified:
+            return
+        entry = {
+            "path": path,
+            "ids": sorted(parent_ids(path, content)),
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires": time() + ttl,
+            "body": body,
+        }
+        try:
+            replaced = cls.entry_file(key).stat().st_size
+        except OSError:
+            replaced = 0
+        size = cls.write(key, entry)
+        if size:
+            cls.grow(size - replaced + cls.index(key, entry))
+
+    @classmethod
+    def revalidated(cls, key, entry):
+        """Extend the life of an entry after a 304 Not Modified"""
+        entry["expires"] = time() + cls.ttl(entry["path"])
+        cls.write(key, entry)
+        return entry["body"]
+
+    @classmethod
+    def write(cls, key, entry):
+        """Write an entry, returning its size or 0 if that failed"""
+        path = cls.entry_file(key)
+        tmp = path.with_suffix(".tmp")
+        try:
+            cls.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            with private_open(tmp) as file:
+                size = file.write(json.dumps(entry))
+            replace(tmp, path)
+        except OSError:  # pragma: no cover
+            return 0  # The cache is best effort
+        return size
+
+    @classmethod
+    def index(cls, key, entry):
+        """Index an entry under its IDs, returning the bytes written"""
+        ids = entry["ids"]
+        if entry["path"].startswith("/1/members/"):
+            ids = [*ids, cls.members_index]
+        if cls.ttl(entry["path"]):
+            ids = [*ids, cls.fresh_index]
+        line = f"{key}\n"
+        size = 0
+        try:
+            cls.index_file("").mkdir(mode=0o700, exist_ok=True)
+            for id in ids:
+                index = cls.index_file(id)
+                if index.exists() and key in index.read_text().split():
+                    continue
+                with private_open(index, "a") as file:
+                    size += file.write(line)
+        except OSError:  # pragma: no cover
+            pass
+        return size
+
+    @classmethod
+    def grow(cls, size):
+        """Add to the size of the cache, evicting once over max_size"""
+        with cls._size_lock:
+            try:
+                total = int(cls.size_file().read_text())
+            except (OSError, ValueError):
+                total = None
+            if total is None or total + size > cls.max_size:
+                cls.evict()
+                return
+            try:
+                with private_open(cls.size_file()) as file:
+                    file.write(str(total + size))
+            except OSError:  # pragma: no cover
+                pass
+
+    @classmethod
+    def entries(cls):
+        """Yield the path of every cached entry"""
+        if cls.cache_dir.is_dir():
+            yield from cls.cache_dir.glob("*.json")
+
+    @classmethod
+    def indexes(cls):
+        """Yield the path of every index file"""
+        if cls.index_file("").is_dir():
+            yield from cls.index_file("").iterdir()
+
+    @classmethod
+    def invalidate(cls, path, params, content):
+        """Drop the entries indexed under any ID a mutation touched"""
+        ids = object_ids(path, content, *[str(v) for v in params.values()])
+        if not path.startswith("/1/boards") and not parent_ids("", content):
+            # The boards that may show the object are unknown
+            ids.add(cls.fresh_index)
+        # New boards only show up in the member's board list
+        members = path.rstrip("/") == "/1/boards"
+        with cls._pending_lock:
+            if cls._pending is not None:
+                cls._pending[0].update(ids)
+                cls._pending[1] = cls._pending[1] or members
+                return
+        cls.drop(ids, members)
+
+    @classmethod
+    @contextmanager
+    def batched(cls):
+        """Invalidate once, on exit, for all the mutations made inside
+
+        Reads inside the block can still be served entries that one of
+        its mutations made stale.
+        """
+        with cls._pending_lock:
+            cls._pending = [set(), False]
+        try:
+            yield
+        finally:
+            with cls._pending_lock:
+                ids, members = cls._pending
+                cls._pending = None
+            if ids or members:
+                cls.drop(ids, members)
+
+    @classmethod
+    def drop(cls, ids, members=False):
+        """Remove the entries indexed under any of ids, or the member's"""
+        if members:
+            ids = {*ids, cls.members_index}
+        freed = 0
+        for id in ids:
+            index = cls.index_file(id)
+            try:
+                freed += index.stat().st_size
+                keys = set(index.read_text().split())
+                index.unlink()
+            except OSError:
+                continue
+            for key in keys:
+                entry_file = cls.entry_file(key)
+                try:
+                    freed += entry_file.stat().st_size
+                    entry_file.unlink()
+                except OSError:
+                    continue  # Dropped or evicted already
+        if freed:
+            cls.grow(-freed)
+
+    @classmethod
+    def evict(cls):
+        """Remove least recently used entries until under max_size
+
+        Index lines of the removed entries are pruned, and the size file
+        is set to the exact total again.
+        """
+        files = []
+        for entry_file in cls.entries():
+            try:
+                stat = entry_file.stat()
+            except OSError:  # pragma: no cover
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry_file))
+        total = sum(size for _, size, _ in files)
+        index_size = cls.index_size()
+        evicted = set()
+        for _, size, entry_file in sorted(files, key=lambda f: f[0]):
+            if total + index_size <= cls.max_size:
+                break
+            try:
+                entry_file.unlink()
+            except OSError:  # pragma: no cover
+                pass
+            evicted.add(entry_file.stem)
+            total -= size
+            # Its key takes at least a line of the index
+            index_size -= len(entry_file.stem) + 1
+        if evicted:
+            cls.prune(evicted)
+            index_size = cls.index_size()
+        total += index_size
+        try:
+            with private_open(cls.size_file()) as file:
+                file.write(str(total))
+        except OSError:  # pragma: no cover
+            pass
+
+    @classmethod
+    def index_size(cls):
+        """Return the bytes taken by the index files"""
+        size = 0
+        for index in cls.indexes():
+            try:
+                size += index.stat().st_size
+            except OSError:  # pragma: no cover
+                continue
+        return size
+
+    @classmethod
+    def prune(cls, keys):
+        """Remove keys from the index, deleting the index files emptied"""
+        for index in cls.indexes():
+            try:
+                lines = index.read_text().split()
+                kept = [key for key in lines if key not in keys]
+                if not kept:
+                    index.unlink()
+                elif len(kept) < len(lines):
+                    with private_open(index) as file:
+                        file.writelines(f"{key}\n" for key in kept)
+            except OSError:  # pragma: no cover
+                continue
+
+    @classmethod
+    def clear(cls):
+        """Remove every cached entry"""
+        for entry_file in cls.entries():
+            entry_file.unlink()
+        for index in cls.indexes():
+            index.unlink()
+        try:
+            cls.size_file().unlink()
+        except FileNotFoundError:
+            pass
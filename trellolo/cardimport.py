@@ -0,0 +1,148 @@
+import csv
+import json
+from pathlib import Path
+
+from trellolo.trelloapi import TrelloAPI
+
+
+class CardImport:
+    """Create cards in bulk from a CSV or JSON Lines file
+
+    Rows are read lazily and each list and board is looked up once. Cards
+    are created through the client's worker pool, so up to `concurrency`
+    creations are in flight under the shared rate limit. Every row's
+    outcome is appended to the results file as soon as it is known, which
+    is where a resumed run picks up from.
+    """
+
+    # Column names accepted for each card field
+    aliases = {
+        "title": ("title", "name"),
+        "list_id": ("list_id", "idList"),
+        "description": ("description", "desc"),
+        "labels": ("labels",),
+    }
+    # Gap left between imported cards, as Trello does for "bottom"
+    pos_step = 16384
+
+    def __init__(self, trello, path, results=None, list_id=None):
+        self.trello = trello
+        self.path = Path(path)
+        self.results = Path(
+            results or self.path.with_name(self.path.name + ".results.jsonl")
+        )
+        self.list_id = list_id
+        self.positions = {}
+
+    def rows(self):
+        """Yield the number and fields of each row of the file"""
+        with self.path.open(newline="") as f:
+            if self.path.suffix.lower() == ".csv":
+                records = csv.DictReader(f)
+            else:
+                # Lines are parsed with the row, so a bad one fails alone
+                records = (line for line in f if line.strip())
+            yield from enumerate(records, 1)
+
+    def done(self):
+        """Return the rows a previous run created cards for"""
+        rows = set()
+        if not self.results.exists():
+            return rows
+        with self.results.open() as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # last line of an interrupted run
+                if result.get("id"):
+                    rows.add(result["row"])
+        return rows
+
+    def field(self, row, name):
+        for key in self.aliases[name]:
+            if row.get(key):
+                return row[key]
+        return None
+
+    def prepare(self, row):
+        """Build the query that creates a row's card"""
+        if isinstance(row, str):
+            row = json.loads(row)
+        list_id = self.field(row, "list_id") or self.list_id
+        title = self.field(row, "title")
+        if not list_id or not title:
+            raise Exception("A title and list_id are required")
+        _list = self.trello.get_list_by_id(list_id, cards=False)
+        if not _list.id:
+            raise Exception(f"Unable to find list: {list_id}")
+
+        wanted = self.field(row, "labels") or []
+        if isinstance(wanted, str):
+            wanted = [w.strip() for w in wanted.split(",") if w.strip()]
+        board_labels = self.trello.get_board_labels(_list.board_id)
+        labels = []
+        for name in wanted:
+            found = [
+                l.id for l in board_labels if name in (l.name, l.colour)
+            ]
+            if not found:
+                raise Exception(f"Unable to find label: {name}")
+            labels += [id for id in found if id not in labels]
+
+        return {
+            "idList": list_id,
+            "name": title,
+            "pos": self.next_pos(list_id),
+            "idLabels": ",".join(labels),
+            "desc": self.field(row, "description") or "",
+        }
+
+    def next_pos(self, list_id):
+        """Return a position below the last card, keeping the file's order"""
+        if list_id not in self.positions:
+            cards = TrelloAPI.send_request(
+                f"/1/lists/{list_id}/cards", params={"fields": "pos"}
+            ) or []
+            self.positions[list_id] = max(
+                (c["pos"] for c in cards), default=0
+            )
+        self.positions[list_id] += self.pos_step
+        return self.positions[list_id]
+
+    def queries(self, skip):
+        """Yield each pending row with its query, or the error preparing it"""
+        for number, row in self.rows():
+            if number in skip:
+                continue
+            try:
+                yield number, self.prepare(row), None
+            except Exception as e:
+                yield number, None, e
+
+    @staticmethod
+    def create(item):
+        number, query, error = item
+        if error is None:
+            try:
+                card = TrelloAPI.send_request(
+                    method="POST", url="/1/cards", params=query
+                )
+                return {"row": number, "id": card["id"], "name": card["name"]}
+            except Exception as e:
+                error = e
+        return {"row": number, "error": str(error)}
+
+    def run(self, resume=False):
+        """Import the rows, yielding each result in file order"""
+        if self.results.exists() and not resume:
+            raise Exception(
+                f"{self.results} exists. "
+                "Pass --resume to continue that import, or remove it."
+            )
+        skip = self.done() if resume else set()
+        with self.results.open("a") as results:
+            for result in self.trello.imap(self.create, self.queries(skip)):
+                results.write(json.dumps(result) + "\n")
+                results.flush()
+                yield result
@@ -0,0 +1,155 @@
+import json
+from pathlib import Path
+from threading import Lock
+from urllib.parse import urlsplit
+
+from requests.structures import CaseInsensitiveDict
+
+from trellolo.trelloapi import TrelloAPI
+
+
+class CassetteError(Exception):
+    """Raised for a request that has no recorded response"""
+
+
+class CassetteResponse:
+    """A recorded response, with the parts of requests' Response used"""
+
+    def __init__(self, status, headers, body):
+        self.status_code = status
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = body.encode("utf-8", "surrogateescape")
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Cassette:
+    """Transport for TrelloAPI that records responses or replays them
+
+    Requests are matched on their method, path and parameters. Identical
+    requests get their responses in the order they were recorded, the last
+    one repeating. The credentials are kept out of the file: key and token
+    parameters are left out, and the given secrets are replaced by
+    placeholders wherever they appear.
+
+    Modes: "replay" never touches the network and fails without the
+    file, "record" sends requests and saves what they returned, and
+    "once" replays the file if it exists and records it otherwise.
+    """
+
+    modes = ("replay", "record", "once")
+    # Bodies are stored decoded, so their encoding headers are dropped
+    dropped_headers = {
+        "connection", "content-encoding", "content-length", "set-cookie",
+        "transfer-encoding",
+    }
+
+    def __init__(self, path, mode="replay", secrets={}):
+        if mode not in self.modes:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        if mode == "once":
+            mode = "replay" if self.path.exists() else "record"
+        self.mode = mode
+        self.secrets = {
+            value: f"{{{name}}}" for name, value in secrets.items() if value
+        }
+        self.interactions = []
+        self.responses = {}
+        self.played = {}
+        self.session = None
+        self.lock = Lock()
+        if mode == "replay":
+            self.load()
+
+    def scrub(self, text):
+        for secret, placeholder in self.secrets.items():
+            text = text.replace(secret, placeholder)
+        return text
+
+    def describe(self, method, url, params):
+        """Return the request as it is stored and matched"""
+        return {
+            "method": method,
+            "path": self.scrub(urlsplit(url).path),
+            "params": {
+                k: self.scrub(str(v)) for k, v in sorted(params.items())
+                if k not in ("key", "token")
+            },
+        }
+
+    @staticmethod
+    def match_key(request):
+        return json.dumps(request, sort_keys=True)
+
+    def load(self):
+        if not self.path.exists():
+            raise CassetteError(f"No cassette recorded at {self.path}")
+        self.interactions = json.loads(self.path.read_text())
+        for interaction in self.interactions:
+            key = self.match_key(interaction["request"])
+            self.responses.setdefault(key, []).append(
+                interaction["response"]
+            )
+
+    def save(self):
+        """Write what was recorded, even if that was nothing"""
+        if self.mode != "record":
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.interactions, indent=1) + "\n")
+
+    def request(self, method, url, params={}, **kwargs):
+        """Answer a request like requests.Session.request would"""
+        request = self.describe(method, url, params)
+        if self.mode == "replay":
+            return self.replay(request)
+
+        if self.session is None:
+            self.session = TrelloAPI.new_session()
+        resp = self.session.request(method, url, params=params, **kwargs)
+        headers = {
+            k: v for k, v in resp.headers.items()
+            if k.lower() not in self.dropped_headers
+        }
+        body = resp.content.decode("utf-8", "surrogateescape")
+        with self.lock:
+            self.interactions.append({
+                "request": request,
+                "response": {
+                    "status": resp.status_code,
+                    "headers": headers,
+                    "body": self.scrub(body),
+                },
+            })
+        return resp
+
+    def replay(self, request):
+        key = self.match_key(request)
+        with self.lock:
+            responses = self.responses.get(key)
+            if not responses:
+                raise CassetteError(
+                    f"No response recorded in {self.path} for "
+                    f"{request['method']} {request['path']} "
+                    f"{request['params']}"
+                )
+            played = self.played.get(key, 0)
+            self.played[key] = played + 1
+        return CassetteResponse(**responses[min(played, len(responses) - 1)])
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
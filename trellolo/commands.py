@@ -1,16 +1,30 @@
-from pathlib import PurePath
+import shlex
+from pathlib import Path, PurePath
 from sys import argv
+from threading import Thread
 
 import click
 
-from trellolo.board import BoardAPI
 from trellolo.config import Config
+from trellolo.decoder import JSONDecoder
+from trellolo.lazy import LazyObject
 
 # Add "-h" support
 CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
 
+
+def new_client():
+    # Only commands that use the client pay for importing the HTTP stack
+    from trellolo.board import BoardAPI
+    return BoardAPI()
+
+
 # Instantiate object that will later be used to interact with boards
-trello = BoardAPI()
+trello = LazyObject(new_client)
+# The network client, while --local swaps trello for the mirror
+api_client = trello
+# Whether --local was given
+local_mode = False
 
 
 @click.group(context_settings=CONTEXT_SETTINGS)
@@ -18,8 +32,99 @@ trello = BoardAPI()
     "-k", "--api-key", help="Your Trello API key", envvar="TRELLO_KEY"
 )
 @click.option("-t", "--token", help="Your Trello token", envvar="TRELLO_TOKEN")
-def commands(api_key, token):
+@click.option(
+    "--pool-size", type=click.IntRange(min=1), default=10,
+    envvar="TRELLO_POOL_SIZE", show_default=True,
+    help="Number of pooled keep-alive connections"
+)
+@click.option(
+    "--concurrency", type=click.IntRange(min=1), default=1,
+    envvar="TRELLO_CONCURRENCY", show_default=True,
+    help="Maximum number of requests in flight at once"
+)
+@click.option(
+    "--no-cache", is_flag=True, help="Bypass the on-disk response cache"
+)
+@click.option(
+    "--json-backend", default="auto", envvar="TRELLO_JSON_BACKEND",
+    type=click.Choice(["auto"] + list(JSONDecoder.backends)),
+    show_default=True, help="JSON library used to decode responses"
+)
+@click.option(
+    "--stream", is_flag=True,
+    help="Parse whole boards as they download, keeping memory flat"
+)
+@click.option(
+    "--local", is_flag=True,
+    help="Answer show commands from the mirror kept by 'sync'"
+)
+@click.option(
+    "--max-staleness", type=click.IntRange(min=0), metavar="SECONDS",
+    help="With --local, fail if the mirror is older than this"
+)
+@click.option(
+    "--mirror", type=click.Path(dir_okay=False), envvar="TRELLO_MIRROR",
+    help="SQLite file of the local mirror"
+)
+@click.option(
+    "--debug", is_flag=True,
+    help="Print transfer and saved request counts when done"
+)
+@click.option(
+    "--stats", is_flag=True,
+    help="Print request counts and latencies per endpoint, and the "
+    "connections reused, when done"
+)
+@click.option(
+    "--trace", type=click.Path(dir_okay=False), envvar="TRELLO_TRACE",
+    help="Append a JSON line per request to this file"
+)
+@click.option(
+    "--profile", type=click.Path(dir_okay=False),
+    help="Write a cProfile stats file of the command and print its hot spots"
+)
+def commands(
+    api_key, token, pool_size, concurrency, no_cache, json_backend, stream,
+    local, max_staleness, mirror, debug, stats, trace, profile
+):
     """CLI for interacting with the Trello API"""
+    global trello, local_mode
+    if mirror:
+        from trellolo.mirror import Mirror
+        Mirror.db_file = Path(mirror).expanduser()
+    if json_backend == "auto":
+        # Picked on first decode, so commands that never decode skip it
+        JSONDecoder.name = JSONDecoder.loads = None
+    else:
+        try:
+            JSONDecoder.use(json_backend)
+        except ValueError as e:
+            raise click.ClickException(e)
+
+    def configure(client):
+        from trellolo.trelloapi import TrelloAPI
+        TrelloAPI.cache.enabled = not no_cache
+        client.reset()
+        # Every worker needs its own pooled connection to avoid blocking
+        TrelloAPI.set_pool_size(max(pool_size, concurrency))
+        client.concurrency = concurrency
+        client.stream = stream
+
+    local_mode = local
+    trello = api_client
+    if local:
+        from trellolo.localboard import LocalBoardAPI
+        trello = LocalBoardAPI()
+        check_staleness(trello.mirror, max_staleness)
+        configure(trello)
+    else:
+        api_client.when_loaded(configure)
+    if debug:
+        click.get_current_context().call_on_close(show_debug_info)
+    if stats or trace:
+        trace_requests(stats, trace)
+    if profile:
+        profile_command(profile)
     try:
         if api_key and token:
             trello.auth(key=api_key, token=token)
@@ -27,6 +132,83 @@ def commands(api_key, token):
         raise click.ClickException(e)
 
 
+def check_staleness(mirror, max_staleness=None):
+    """Refuse to answer from an empty or too old mirror"""
+    age = mirror.staleness()
+    if age is None:
+        raise click.ClickException(
+            "The local mirror is empty.\n"
+            f"  Run: [ {PurePath(argv[0]).name} sync ] to fill it."
+        )
+    if max_staleness is not None and age > max_staleness:
+        raise click.ClickException(
+            f"The local mirror was synced {age:.0f}s ago, "
+            f"more than --max-staleness {max_staleness}s.\n"
+            f"  Run: [ {PurePath(argv[0]).name} sync ] to update it."
+        )
+
+
+def connection_info():
+    """Return how many connections the command opened and reused"""
+    from trellolo.trelloapi import TrelloAPI
+    stats = TrelloAPI.connection_stats()
+    return (
+        f"Connections opened: {stats['opened']} | "
+        f"reused: {stats['reused']} | "
+        f"requests: {stats['requests']}"
+    )
+
+
+def show_debug_info():
+    """Print transfer and saved request counts to stderr
+
+    The connections opened and reused are printed by --stats.
+    """
+    from trellolo.trelloapi import TrelloAPI
+    click.echo(
+        f"Bytes received: {TrelloAPI.bytes_received} | "
+        f"saved by identity map: {trello.saved_requests}",
+        err=True
+    )
+
+
+def trace_requests(stats=False, trace=None):
+    """Record every request of the command for --stats and --trace"""
+    from trellolo.tracing import RequestStats, RequestTracer, TraceFile
+    ctx = click.get_current_context()
+    hooks = []
+    if stats:
+        hooks.append(RequestStats())
+    if trace:
+        hooks.append(TraceFile(trace))
+
+    def finish():
+        for hook in hooks:
+            RequestTracer.remove_hook(hook)
+            if isinstance(hook, TraceFile):
+                hook.close()
+            else:
+                click.echo("\n".join(hook.summary()), err=True)
+                click.echo(connection_info(), err=True)
+
+    for hook in hooks:
+        RequestTracer.add_hook(hook)
+    ctx.call_on_close(finish)
+
+
+def profile_command(path):
+    """Profile the rest of the command, reporting on it when done"""
+    from trellolo.profiling import CommandProfile
+    profile = CommandProfile(path)
+
+    def finish():
+        profile.stop()
+        click.echo("\n".join(profile.report()), err=True)
+
+    click.get_current_context().call_on_close(finish)
+    profile.start()
+
+
 ################################
 # CONFIG COMMAND
 ################################
@@ -54,12 +236,12 @@ def config(api_key, token):
 
 def load_config():
     """Load the config and instantiate an API client"""
-    if trello.initialized or (
+    if (
         # TODO: Find a  better way to determine the CliRunner invoked args
         # This is caused the help tests to fail when no config file or api
         # vars were present because get_os_args is diff from the invoked args
         set(["-h", "--help"]) & set(click.get_os_args())
-    ):
+    ) or trello.initialized:
         return
     try:
         data = Config.load()
@@ -80,6 +262,202 @@ def load_config():
         )
 
 
+################################
+# SYNC COMMAND
+################################
+
+
+@commands.command()
+@click.option(
+    "-b", "--board", "boards", multiple=True,
+    help="Only sync this board ID. Can be repeated."
+)
+@click.option(
+    "--full", is_flag=True,
+    help="Reload boards instead of replaying their latest changes"
+)
+def sync(boards, full):
+    """Update the local mirror that --local answers from.\n
+    The first sync of a board loads it in full. Later syncs only replay
+    the board's actions since the previous sync.
+    """
+    if local_mode:
+        raise click.ClickException("sync needs the network, drop --local")
+    load_config()  # load api and token from config
+    from trellolo.mirror import Mirror
+    try:
+        mirror = Mirror()
+        for name, result in mirror.sync(boards, full, mapper=trello.imap):
+            click.echo(f"{name}: {result}")
+        mirror.close()
+    except Exception as e:
+        raise click.ClickException(e)
+
+
+################################
+# SHELL COMMANDS
+################################
+
+
+def run_line(ctx, line):
+    """Run one line of a shell or script as a command of this process"""
+    args = shlex.split(line, comments=True)
+    if args and args[0] == "trellolo":
+        args = args[1:]  # lines pasted from a runbook
+    if not args:
+        return
+    group_ctx = ctx.find_root()
+    name, cmd, args = commands.resolve_command(group_ctx, args)
+    if name in ("shell", "run"):
+        raise click.UsageError(f"{name} can't be used from {ctx.info_name}")
+    if local_mode or api_client.loaded:
+        trello.reset()  # Start a new request scope, as a new process would
+    with cmd.make_context(name, args, parent=group_ctx) as sub_ctx:
+        cmd.invoke(sub_ctx)
+
+
+@commands.command()
+@click.pass_context
+def shell(ctx):
+    """Run commands interactively in one process.\n
+    Commands share the connections, caches and credentials, so only the
+    first pays for them. Global options go before "shell". Type "exit" or
+    press Ctrl-D to leave.
+    """
+    try:
+        import readline  # noqa: F401 (line editing and history)
+    except ImportError:  # pragma: no cover
+        pass
+    while True:
+        try:
+            line = input("trellolo> ")
+        except EOFError:
+            click.echo()
+            return
+        except KeyboardInterrupt:
+            click.echo()
+            continue
+        if line.strip() in ("exit", "quit"):
+            return
+        try:
+            run_line(ctx, line)
+        except click.exceptions.Exit:
+            pass  # e.g. after --help
+        except click.ClickException as e:
+            e.show()
+        except (click.Abort, KeyboardInterrupt):
+            click.echo()
+        except Exception as e:
+            click.echo(f"Error: {e}", err=True)
+
+
+@commands.command("run")
+@click.argument("script", type=click.File())
+@click.option(
+    "--keep-going", is_flag=True, help="Run the lines after a failed one"
+)
+@click.option("--echo", is_flag=True, help="Print each line before it runs")
+@click.pass_context
+def run_script(ctx, script, keep_going, echo):
+    """Run the commands in a file, one per line, in one process.\n
+    Commands share the connections, caches and credentials, so only the
+    first pays for them. "#" starts a comment and a leading "trellolo" is
+    ignored. Global options go before "run". Stops at the first failure.
+    """
+    failed = False
+    for number, line in enumerate(script, 1):
+        if echo and line.strip() and not line.lstrip().startswith("#"):
+            click.echo(f"$ {line.strip()}", err=True)
+        try:
+            run_line(ctx, line)
+            continue
+        except click.exceptions.Exit:
+            continue
+        except click.ClickException as e:
+            error = e.format_message()
+        except Exception as e:
+            error = e
+        click.echo(f"{script.name}:{number}: Error: {error}", err=True)
+        failed = True
+        if not keep_going:
+            break
+    if failed:
+        ctx.exit(1)
+
+
+################################
+# WEBHOOK COMMANDS
+################################
+
+
+@commands.group()
+def webhook():
+    """Keep the local mirror current with Trello webhooks"""
+    load_config()  # load api and token from config
+
+
+@webhook.command("serve")
+@click.option(
+    "-u", "--callback-url", required=True,
+    help="Public URL Trello posts to, forwarded to this server"
+)
+@click.option(
+    "-b", "--board", "boards", multiple=True,
+    help="Board ID to watch. Can be repeated. Defaults to mirrored boards."
+)
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("-p", "--port", default=8080, show_default=True)
+@click.option(
+    "-s", "--secret", required=True, envvar="TRELLO_SECRET",
+    help="Your Trello API secret, used to verify callbacks"
+)
+@click.option(
+    "--no-register", is_flag=True,
+    help="Don't create webhooks, they already point here"
+)
+def webhook_serve(callback_url, boards, host, port, secret, no_register):
+    """Apply board changes to the mirror and cache as Trello posts them.\n
+    Webhooks created on startup are deleted on exit.
+    """
+    if local_mode:
+        raise click.ClickException("webhooks need the network, drop --local")
+    from trellolo.mirror import Mirror
+    from trellolo.webhook import WebhookServer
+    try:
+        server = WebhookServer(
+            (host, port), callback_url, secret, log=click.echo
+        )
+    except OSError as e:
+        raise click.ClickException(f"Unable to listen on {host}:{port}: {e}")
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        if not no_register:
+            if not boards:
+                mirror = Mirror()
+                boards = [row["id"] for row in mirror.boards()]
+                mirror.close()
+            if not boards:
+                raise Exception(
+                    "No boards to watch. Pass --board or run sync first."
+                )
+            # Trello calls the server back before it creates a webhook
+            server.register(boards)
+        click.echo(f"Listening on {host}:{port} for {callback_url}")
+        thread.join()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        raise click.ClickException(e)
+    finally:
+        server.shutdown()
+        server.server_close()
+        try:
+            server.unregister()
+        except Exception as e:
+            click.echo(f"Unable to delete webhooks: {e}", err=True)
+
+
 ################################
 # CARD COMMANDS
 ################################
@@ -130,6 +508,51 @@ def card_add(title, description, list_id, labels):
         raise click.ClickException(e)
 
 
+@card.command("import")
+@click.option(
+    "-f", "--file", "path", required=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="CSV or JSON Lines file with title, list_id, description, labels"
+)
+@click.option("-l", "--list_id", help="List for rows that don't name one")
+@click.option(
+    "-o", "--output", type=click.Path(dir_okay=False),
+    help="Results file. Defaults to FILE.results.jsonl"
+)
+@click.option(
+    "--resume", is_flag=True,
+    help="Skip the rows the results file says were created"
+)
+def card_import(path, list_id, output, resume):
+    """Create a card for every row of a file.\n
+    Labels are colours or names, comma separated. Cards are created
+    --concurrency at a time and each row's new card ID or error is
+    written to the results file.
+    """
+    from trellolo.cardimport import CardImport
+    importer = CardImport(trello, path, output, list_id)
+    created = failed = 0
+    try:
+        if local_mode:
+            trello.read_only()
+        for result in importer.run(resume):
+            if "id" in result:
+                created += 1
+            else:
+                failed += 1
+                click.echo(f"Row {result['row']}: {result['error']}", err=True)
+    except Exception as e:
+        raise click.ClickException(e)
+    click.echo(
+        f"Created {created} cards, {failed} failed. "
+        f"Results in {importer.results}"
+    )
+    if failed:
+        raise click.ClickException(
+            f"{failed} rows failed. Fix them and rerun with --resume."
+        )
+
+
 @card.command("add_comment")
 @click.option("-i", "--id", required=True, help="Card ID")
 @click.option("-c", "--comment", required=True, help="Comment Text")
@@ -175,12 +598,119 @@ def card_show(id, all):
         raise click.ClickException(f"{e}")
 
 
+def bulk_options(scope="card"):
+    """Options choosing the objects a bulk change applies to"""
+    def decorator(f):
+        options = [
+            click.option(
+                "-i", "--id", "ids", multiple=True,
+                help="Object ID. Can be repeated."
+            ),
+            click.option(
+                "-f", "--file", type=click.File(),
+                help="File with one ID per line, - for stdin"
+            ),
+            click.option(
+                "--dry-run", is_flag=True,
+                help="Only print the IDs that would be changed"
+            ),
+        ]
+        if scope in ("card", "list"):
+            options.append(click.option(
+                "-b", "--board_id", help=f"Every open {scope} on this board"
+            ))
+        if scope == "card":
+            options += [
+                click.option(
+                    "-l", "--list_id", help="Every open card on this list"
+                ),
+                click.option(
+                    "--label",
+                    help="With --list_id or --board_id, only cards with "
+                    "this label name or colour"
+                ),
+            ]
+        for option in reversed(options):
+            f = option(f)
+        return f
+    return decorator
+
+
+def read_ids(ids, file=None):
+    """Collect the IDs given as options and one per line of a file"""
+    ids = [*ids]
+    if file:
+        ids += [
+            line.split()[0] for line in file
+            if line.strip() and not line.startswith("#")
+        ]
+    return ids
+
+
+def check_targets(*targets):
+    """Refuse a bulk change given neither IDs, a file nor a filter"""
+    if not any(targets):
+        raise click.UsageError("Give at least one ID, a file or a filter")
+
+
+def bulk_change(type, action, ids, dry_run=False):
+    """Change many objects at once and print a summary"""
+    ids = [*dict.fromkeys(ids)]
+    if not ids:
+        click.echo(f"No {type}s to {action}.")
+        return
+    if dry_run:
+        for id in ids:
+            click.echo(id)
+        click.echo(f"Would {action} {len(ids)} {type}s")
+        return
+    changed = failed = 0
+    for id, error in trello.bulk_change(type, action, ids):
+        if error is None:
+            changed += 1
+        else:
+            failed += 1
+            click.echo(f"{id}: {error}", err=True)
+    click.echo(f"{action.capitalize()}d {changed} {type}s, {failed} failed.")
+    if failed:
+        raise Exception(f"Unable to {action} {failed} {type}s")
+
+
+def card_ids(ids, file, list_id, board_id, label):
+    ids = read_ids(ids, file)
+    if label and not (list_id or board_id):
+        raise Exception("--label needs --list_id or --board_id")
+    if list_id or board_id:
+        ids += trello.find_card_ids(list_id, board_id, label)
+    return ids
+
+
 @card.command("delete")
-@click.option("-i", "--id", required=True, help="Delete card by id")
-def card_delete(id):
-    """Deleted a card using the ID."""
+@bulk_options()
+def card_delete(ids, file, dry_run, board_id, list_id, label):
+    """Delete cards by ID, from a file or by list, board and label."""
+    check_targets(ids, file, list_id, board_id)
     try:
-        trello.delete_card_by_id(id)
+        if len(ids) == 1 and not (file or dry_run or list_id or board_id):
+            return trello.delete_card_by_id(ids[0])
+        if local_mode:
+            trello.read_only()
+        ids = card_ids(ids, file, list_id, board_id, label)
+        bulk_change("card", "delete", ids, dry_run)
+    except Exception as e:
+        raise click.ClickException(e)
+
+
+@card.command("archive")
+@bulk_options()
+def card_archive(ids, file, dry_run, board_id, list_id, label):
+    """Archive cards by ID, from a file or by list, board and label."""
+    check_targets(ids, file, list_id, board_id)
+    try:
+        if local_mode:
+            trello.read_only()
+        ids = card_ids(ids, file, list_id, board_id, label)
+        bulk_change("card", "archive", ids, dry_run)
     except Exception as e:
         raise click.ClickException(e)
 
@@ -226,11 +756,29 @@ def board_add(name):
 
 
 @board.command("delete")
-@click.option("-i", "--id", required=True, help="Delete board by id")
-def board_delete(id):
-    """Delete a board."""
+@bulk_options("board")
+def board_delete(ids, file, dry_run):
+    """Delete boards by ID or from a file."""
+    check_targets(ids, file)
     try:
-        trello.delete_board(id)
+        if len(ids) == 1 and not (file or dry_run):
+            return trello.delete_board(ids[0])
+        if local_mode:
+            trello.read_only()
+        bulk_change("board", "delete", read_ids(ids, file), dry_run)
+    except Exception as e:
+        raise click.ClickException(e)
+
+
+@board.command("archive")
+@bulk_options("board")
+def board_archive(ids, file, dry_run):
+    """Close boards by ID or from a file."""
+    check_targets(ids, file)
+    try:
+        if local_mode:
+            trello.read_only()
+        bulk_change("board", "archive", read_ids(ids, file), dry_run)
     except Exception as e:
         raise click.ClickException(e)
 
@@ -263,3 +811,19 @@ def list_show(id, all):
             click.echo(click.get_current_context().get_help())
     except Exception as e:
         raise click.ClickException(e)
+
+
+@list.command("archive")
+@bulk_options("list")
+def list_archive(ids, file, dry_run, board_id):
+    """Archive lists by ID, from a file or by board."""
+    check_targets(ids, file, board_id)
+    try:
+        if local_mode:
+            trello.read_only()
+        ids = read_ids(ids, file)
+        if board_id:
+            ids += trello.find_list_ids(board_id)
+        bulk_change("list", "archive", ids, dry_run)
+    except Exception as e:
+        raise click.ClickException(e)
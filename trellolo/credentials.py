@@ -0,0 +1,62 @@
+import json
+from hashlib import sha256
+from os import replace
+from time import time
+
+from trellolo.config import Config
+
+
+class CredentialCache:
+    """Remembers which credentials Trello accepted, for a while
+
+    Entries are keyed by a hash of the key and token, so the file never
+    holds the credentials themselves. It lives next to the config file.
+    """
+
+    # Seconds a successful validation is trusted
+    ttl = 24 * 3600
+
+    @staticmethod
+    def cache_file():
+        return Config.config_file.with_name(".trellolo.auth")
+
+    @staticmethod
+    def fingerprint(key, token):
+        return sha256(f"{key}:{token}".encode()).hexdigest()
+
+    @classmethod
+    def load(cls):
+        try:
+            return json.loads(cls.cache_file().read_text())
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def valid(cls, key, token):
+        """Whether the credentials were validated and haven't expired"""
+        return cls.load().get(cls.fingerprint(key, token), 0) > time()
+
+    @classmethod
+    def save(cls, key, token):
+        """Remember that Trello accepted the credentials"""
+        now = time()
+        entries = {f: t for f, t in cls.load().items() if t > now}
+        entries[cls.fingerprint(key, token)] = now + cls.ttl
+        cls.write(entries)
+
+    @classmethod
+    def forget(cls, key, token):
+        """Have the credentials checked again next time"""
+        entries = cls.load()
+        if entries.pop(cls.fingerprint(key, token), None) is not None:
+            cls.write(entries)
+
+    @classmethod
+    def write(cls, entries):
+        path = cls.cache_file()
+        tmp = path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(entries))
+            replace(tmp, path)
+        except OSError:  # pragma: no cover
+            pass  # Validating again is always an option
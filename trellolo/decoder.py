@@ -0,0 +1,50 @@
+from importlib import import_module
+
+
+class JSONDecoder:
+    """Decode raw API response bytes with the fastest installed backend
+
+    orjson and ujson are optional; the stdlib json module is always there.
+    Every backend takes bytes, so bodies are never copied into a str first.
+    """
+
+    # Backend name -> module providing a loads() that accepts bytes
+    backends = {"orjson": "orjson", "ujson": "ujson", "json": "json"}
+    # Backends tried, in order, when none is chosen
+    preferred = ["orjson", "ujson", "json"]
+    # Chosen on first use, so unused backends are never imported
+    name = None
+    loads = None
+
+    @classmethod
+    def available(cls):
+        """Return the names of the backends that can be imported"""
+        names = []
+        for name, module in cls.backends.items():
+            try:
+                import_module(module)
+            except ImportError:
+                continue
+            names.append(name)
+        return names
+
+    @classmethod
+    def use(cls, name="auto"):
+        """Switch to a backend, or to the fastest available one"""
+        names = cls.preferred if name == "auto" else [name]
+        for name in names:
+            try:
+                module = import_module(cls.backends[name])
+            except ImportError:
+                continue
+            cls.name = name
+            cls.loads = staticmethod(module.loads)
+            return name
+        raise ValueError(f"JSON backend {names[0]} is not installed")
+
+    @classmethod
+    def decode(cls, content):
+        """Decode a JSON response body given as bytes"""
+        if cls.loads is None:
+            cls.use()
+        return cls.loads(content)
@@ -0,0 +1,34 @@
+class LazyObject:
+    """Stand-in for an object that is only built when first used
+
+    Reading or setting an attribute builds the object with the factory,
+    then forwards to it. Functions passed to when_loaded() run on the
+    object once it exists.
+    """
+
+    def __init__(self, factory):
+        vars(self).update(_factory=factory, _object=None, _on_load=[])
+
+    @property
+    def loaded(self):
+        return self._object is not None
+
+    def _load(self):
+        if self._object is None:
+            vars(self)["_object"] = self._factory()
+            while self._on_load:
+                self._on_load.pop(0)(self._object)
+        return self._object
+
+    def when_loaded(self, func):
+        """Call func with the object now, or as soon as it is built"""
+        if self.loaded:
+            func(self._object)
+        else:
+            self._on_load.append(func)
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
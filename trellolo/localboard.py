@@ -0,0 +1,163 @@
+import json
+
+from trellolo.board import BoardAPI
+from trellolo.mirror import Mirror
+from trellolo.trello import Board, Card, Comment, Label, List
+
+
+class LocalBoardAPI(BoardAPI):
+    """BoardAPI answering from the local mirror, without the network
+
+    Lookups follow the same filters as the API calls they replace, so
+    the output matches the live commands as of the last sync.
+    """
+
+    def __init__(self, mirror=None):
+        self.mirror = mirror or Mirror()
+        super().__init__()
+
+    def auth(self, key="", token=""):
+        self.initialized = True
+
+    def read_only(self, *args, **kwargs):
+        raise Exception(
+            "The local mirror is read-only. Drop --local to make changes."
+        )
+
+    add_board = delete_board = read_only
+    add_card = add_card_comment = delete_card_comment = read_only
+    delete_card_by_id = change = bulk_change = read_only
+
+    # Rows are turned back into API shaped dicts for the models
+
+    @staticmethod
+    def board_info(row):
+        return {"id": row["id"], "name": row["name"]}
+
+    @staticmethod
+    def list_info(row):
+        return {
+            "id": row["id"], "name": row["name"], "idBoard": row["board_id"]
+        }
+
+    def card_info(self, row, labels=None):
+        if labels is None:
+            labels = self.label_map(row["board_id"])
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "idBoard": row["board_id"],
+            "idList": row["list_id"],
+            "labels": [
+                labels[id] for id in json.loads(row["label_ids"] or "[]")
+                if id in labels
+            ],
+            "badges": {"comments": row["comment_count"]},
+        }
+
+    @staticmethod
+    def comment_info(row):
+        return {
+            "id": row["id"],
+            "date": row["date"],
+            "data": {"text": row["text"]},
+            "memberCreator": {"fullName": row["member"]},
+        }
+
+    def label_map(self, board_id):
+        return {
+            row["id"]: {"id": row["id"], "name": row["name"],
+                        "color": row["color"], "idBoard": row["board_id"]}
+            for row in self.mirror.labels(board_id)
+        }
+
+    def get_board_ids(self, title=""):
+        return [row["id"] for row in self.mirror.boards()]
+
+    def get_boards(self, lists=False):
+        boards = []
+        for row in self.mirror.boards():
+            board = Board(self.board_info(row))
+            if lists:
+                board.lists = self.get_lists(row["id"])
+            boards.append(board)
+        return boards
+
+    def get_lists(self, board_id):
+        return [
+            List(self.list_info(l))
+            for l in self.mirror.lists(board_id, closed=False)
+        ]
+
+    def get_board_labels(self, id=""):
+        return [Label(l) for l in self.label_map(id).values()]
+
+    def get_list_by_id(self, id="", cards=True):
+        row = self.mirror.list(id)
+        if row is None:
+            return List()
+        _list = List(self.list_info(row))
+        if cards:
+            _list.cards = self.get_cards_by_list_id(id)
+        return _list
+
+    def get_cards_by_list_id(self, id="", closed=False):
+        rows = self.mirror.cards(id, closed=closed)
+        labels = self.label_map(rows[0]["board_id"]) if rows else {}
+        return [Card(self.card_info(row, labels)) for row in rows]
+
+    def get_board_by_id(self, id=""):
+        row = self.mirror.board(id)
+        if row is None:
+            return Board()
+        board = Board(self.board_info(row))
+        board.lists = self.get_lists(id)
+        return board
+
+    def get_board_tree_by_id(self, id=""):
+        board = self.get_board_by_id(id)
+        if not board.id:
+            return board
+        board.show_details = True
+        labels = self.label_map(id)
+        cards = {}
+        for row in self.mirror.board_cards(id):
+            cards.setdefault(row["list_id"], []).append(
+                Card(self.card_info(row, labels))
+            )
+        for _list in board.lists:
+            _list.show_details = True
+            _list.cards = cards.get(_list.id, [])
+        self.update_card_comments(board.lists)
+        return board
+
+    stream_board_by_id = get_board_tree_by_id
+
+    def stream_lists_by_board_id(self, id=""):
+        return iter(self.get_board_tree_by_id(id).lists)
+
+    def get_lists_by_board_id(self, id=""):
+        lists = self.get_lists(id)
+        for _list in lists:
+            _list.cards = self.get_cards_by_list_id(_list.id, closed=True)
+        return lists
+
+    def get_card_comments_by_id(self, id=""):
+        return [
+            Comment(self.comment_info(row)) for row in self.mirror.comments(id)
+        ]
+
+    def get_card_comments_by_ids(self, ids, remember=True):
+        return [self.get_card_comments_by_id(id) for id in ids]
+
+    def iter_card_comments(self, id="", first_page=None):
+        return iter(self.get_card_comments_by_id(id))
+
+    def get_card_by_id(self, id=""):
+        row = self.mirror.card(id)
+        if row is None:
+            return Card()
+        card = Card(self.card_info(row))
+        if card.has_comments:
+            card.comments = self.get_card_comments_by_id(id)
+        return card
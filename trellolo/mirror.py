@@ -0,0 +1,530 @@
+import json
+import sqlite3
+from os import environ
+from pathlib import Path
+from time import time
+
+from trellolo.actions import ActionPages
+from trellolo.trelloapi import TrelloAPI
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS boards (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    closed INTEGER DEFAULT 0,
+    position INTEGER,
+    last_action_id TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS lists (
+    id TEXT PRIMARY KEY,
+    board_id TEXT,
+    name TEXT,
+    closed INTEGER DEFAULT 0,
+    pos REAL
+);
+CREATE TABLE IF NOT EXISTS cards (
+    id TEXT PRIMARY KEY,
+    board_id TEXT,
+    list_id TEXT,
+    name TEXT,
+    closed INTEGER DEFAULT 0,
+    pos REAL,
+    label_ids TEXT,
+    comment_count INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS labels (
+    id TEXT PRIMARY KEY,
+    board_id TEXT,
+    name TEXT,
+    color TEXT
+);
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    card_id TEXT,
+    board_id TEXT,
+    member TEXT,
+    date TEXT,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS lists_board ON lists (board_id, pos);
+CREATE INDEX IF NOT EXISTS cards_list ON cards (list_id, pos);
+CREATE INDEX IF NOT EXISTS cards_board ON cards (board_id);
+CREATE INDEX IF NOT EXISTS labels_board ON labels (board_id);
+CREATE INDEX IF NOT EXISTS comments_card ON comments (card_id, date);
+"""
+
+
+class Mirror:
+    """Local SQLite replica of boards, lists, cards, labels and comments
+
+    A board is loaded in full once, then kept up to date by replaying its
+    action feed since the last action seen.
+    """
+
+    db_file = Path(
+        environ.get("XDG_CACHE_HOME", "~/.cache"), "trellolo", "mirror.db"
+    ).expanduser()
+    list_fields = "name,idBoard,closed,pos"
+    card_fields = "name,idBoard,idList,closed,pos,idLabels,badges"
+    label_fields = "name,color,idBoard"
+    # Action types whose card is refetched, as they only carry its ID
+    card_actions = {
+        "createCard", "copyCard", "moveCardToBoard",
+        "convertToCardFromCheckItem", "emailCard",
+    }
+    # Fields an update action carries, mapped to their mirror columns
+    card_columns = {
+        "name": "name", "idList": "list_id", "closed": "closed", "pos": "pos"
+    }
+    list_columns = {"name": "name", "closed": "closed", "pos": "pos"}
+    # Action types after which the lists of the board are refetched
+    list_actions = {"createList", "moveListToBoard", "moveListFromBoard"}
+    # Action types after which the labels of the board are refetched
+    label_actions = {"createLabel", "updateLabel", "deleteLabel"}
+
+    def __init__(self, path=None):
+        self.path = Path(path or self.db_file)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # Network
+
+    @staticmethod
+    def fetch_boards():
+        """Get the member's boards in the order Trello lists them"""
+        return TrelloAPI.send_request(
+            "/1/members/me/boards",
+            params={"filter": "all", "fields": "name,closed"},
+        ) or []
+
+    @staticmethod
+    def time_cursor(timestamp):
+        """Return a cursor for the actions made after a time
+
+        Trello IDs start with the second they were made in, so this is
+        where a board without actions resumes from.
+        """
+        return f"{int(timestamp):08x}{'0' * 16}"
+
+    @staticmethod
+    def action_pages(id, since=None, **params):
+        return ActionPages(
+            f"/1/boards/{id}/actions", params, since=since, prefetch=True
+        )
+
+    @classmethod
+    def fetch_actions(cls, id, since=None, **params):
+        """Get a board's actions after an action, newest first, all pages"""
+        return list(cls.action_pages(id, since, **params))
+
+    @classmethod
+    def fetch_feeds(cls, cursors, mapper=map):
+        """Get the new actions of many boards, batching the first pages"""
+        feeds = {
+            id: cls.action_pages(id, since) for id, since in cursors.items()
+        }
+        pages = TrelloAPI.send_batch(
+            [(feed.url, feed.query()) for feed in feeds.values()],
+            mapper=mapper
+        )
+        for feed, page in zip(feeds.values(), pages):
+            feed.first_page = page
+        return {id: list(feed) for id, feed in feeds.items()}
+
+    @classmethod
+    def fetch_board(cls, id):
+        """Get everything on a board, plus the action to resume from"""
+        # Take the cursor first so changes made during the load replay
+        started = time()
+        latest = TrelloAPI.send_request(
+            f"/1/boards/{id}/actions", params={"limit": 1, "fields": "id"}
+        )
+        board = TrelloAPI.send_request(f"/1/boards/{id}", params={
+            "fields": "name,closed",
+            "lists": "all",
+            "list_fields": cls.list_fields,
+            "cards": "all",
+            "card_fields": cls.card_fields,
+            "labels": "all",
+            "label_fields": cls.label_fields,
+        })
+        board["comments"] = cls.fetch_actions(
+            id, filter="commentCard", fields="date,data",
+            memberCreator_fields="fullName",
+        )
+        board["last_action_id"] = (
+            latest[0]["id"] if latest else cls.time_cursor(started)
+        )
+        return board
+
+    @classmethod
+    def fetch_cards(cls, ids, mapper=map):
+        """Get cards by ID, with None for the ones that are gone"""
+        url = "/1/cards/{}"
+        params = {"fields": cls.card_fields}
+        return TrelloAPI.send_batch(
+            [(url.format(id), params) for id in ids], mapper=mapper,
+            strict=False
+        )
+
+    @classmethod
+    def fetch_lists(cls, id):
+        return TrelloAPI.send_request(
+            f"/1/boards/{id}/lists",
+            params={"filter": "all", "fields": cls.list_fields},
+        ) or []
+
+    @classmethod
+    def fetch_list_cards(cls, id):
+        return TrelloAPI.send_request(
+            f"/1/lists/{id}/cards",
+            params={"filter": "all", "fields": cls.card_fields},
+        ) or []
+
+    @classmethod
+    def fetch_labels(cls, id):
+        return TrelloAPI.send_request(
+            f"/1/boards/{id}/labels", params={"fields": cls.label_fields}
+        ) or []
+
+    # Sync
+
+    def sync(self, board_ids=None, full=False, mapper=map):
+        """Bring the mirror up to date, returning what was done per board"""
+        started = time()
+        boards = self.fetch_boards()
+        for position, board in enumerate(boards):
+            board["position"] = position
+        if board_ids:
+            boards = [b for b in boards if b["id"] in board_ids]
+        else:
+            self.remove_boards_except([b["id"] for b in boards])
+        for board in boards:
+            self.save_board(board, board["position"])
+
+        cursors = {
+            row["id"]: row["last_action_id"]
+            for row in self.db.execute(
+                "SELECT id, last_action_id FROM boards "
+                "WHERE synced_at IS NOT NULL"
+            )
+        }
+        to_load = [b for b in boards if full or b["id"] not in cursors]
+        to_update = [b for b in boards if b not in to_load]
+
+        report = []
+        for board in mapper(self.fetch_board, [b["id"] for b in to_load]):
+            self.load_board(board)
+            report.append((board["name"], (
+                f"loaded {len(board.get('lists', []))} lists, "
+                f"{len(board.get('cards', []))} cards, "
+                f"{len(board['comments'])} comments"
+            )))
+
+        feeds = self.fetch_feeds(
+            {b["id"]: cursors[b["id"]] for b in to_update}, mapper=mapper
+        )
+        for board in to_update:
+            actions = feeds[board["id"]]
+            self.apply_actions(board["id"], actions, mapper=mapper)
+            if not actions and cursors[board["id"]] is None:
+                self.db.execute(
+                    "UPDATE boards SET last_action_id = ? WHERE id = ?",
+                    (self.time_cursor(started), board["id"]),
+                )
+            report.append((board["name"], f"{len(actions)} changes applied"))
+
+        now = time()
+        self.db.executemany(
+            "UPDATE boards SET synced_at = ? WHERE id = ?",
+            [(now, b["id"]) for b in boards],
+        )
+        self.db.commit()
+        return report
+
+    def apply_actions(self, board_id, actions, mapper=map, advance=True):
+        """Replay a board's actions, given newest first, on the mirror
+
+        Updates, labels and comments are applied from the action itself;
+        only what an action does not describe in full is refetched.
+        """
+        if not actions:
+            return
+        card_ids, moved_lists = set(), set()
+        lists = labels = False
+        for action in reversed(actions):
+            kind = action.get("type", "")
+            data = action.get("data", {})
+            card_id = data.get("card", {}).get("id")
+            if kind == "commentCard":
+                self.save_comment(board_id, action)
+            elif kind == "updateComment":
+                self.db.execute(
+                    "UPDATE comments SET text = ? WHERE id = ?",
+                    (data["action"]["text"], data["action"]["id"]),
+                )
+            elif kind == "deleteComment":
+                self.db.execute(
+                    "DELETE FROM comments WHERE id = ?",
+                    (data["action"]["id"],),
+                )
+            elif kind == "updateCard":
+                columns = self.card_columns
+                if not self.update_row("cards", columns, data["card"]):
+                    card_ids.add(card_id)
+            elif kind in ("addLabelToCard", "removeLabelFromCard"):
+                if not self.update_card_label(
+                    card_id, data["label"], kind == "addLabelToCard"
+                ):
+                    card_ids.add(card_id)
+            elif kind == "updateList":
+                columns = self.list_columns
+                if not self.update_row("lists", columns, data["list"]):
+                    lists = True
+            elif kind == "updateBoard" and "name" in data.get("board", {}):
+                self.db.execute(
+                    "UPDATE boards SET name = ? WHERE id = ?",
+                    (data["board"]["name"], board_id),
+                )
+            if kind in ("commentCard", "deleteComment"):
+                self.count_comments(card_id)
+            if kind in ("deleteCard", "moveCardFromBoard"):
+                card_ids.discard(card_id)
+                self.remove_card(card_id, board_id)
+            elif kind in self.card_actions and card_id:
+                card_ids.add(card_id)
+            if kind == "moveListToBoard":
+                moved_lists.add(data.get("list", {}).get("id"))
+            lists = lists or kind in self.list_actions
+            labels = labels or kind in self.label_actions
+
+        if lists:
+            self.save_lists(board_id, self.fetch_lists(board_id))
+        # Cards come along with a list moved over from another board
+        for list_id in moved_lists:
+            for card in self.fetch_list_cards(list_id):
+                self.save_card(card)
+        if labels:
+            self.save_labels(board_id, self.fetch_labels(board_id))
+        card_ids = sorted(card_ids)
+        cards = self.fetch_cards(card_ids, mapper=mapper)
+        for id, card in zip(card_ids, cards):
+            if card is None:
+                self.remove_card(id)
+            else:
+                self.save_card(card)
+        if advance:
+            self.db.execute(
+                "UPDATE boards SET last_action_id = ? WHERE id = ?",
+                (actions[0]["id"], board_id),
+            )
+        self.db.commit()
+
+    def update_row(self, table, columns, info):
+        """Copy the fields an action carries onto a row, False if missing"""
+        fields = [f for f in columns if f in info]
+        if not fields:
+            return self.db.execute(
+                f"SELECT 1 FROM {table} WHERE id = ?", (info["id"],)
+            ).fetchone() is not None
+        assignments = ", ".join(f"{columns[f]} = ?" for f in fields)
+        return self.db.execute(
+            f"UPDATE {table} SET {assignments} WHERE id = ?",
+            [info[f] for f in fields] + [info["id"]],
+        ).rowcount > 0
+
+    def update_card_label(self, card_id, label, add=True):
+        """Add or remove a label on a card, False if the card is missing"""
+        row = self.card(card_id)
+        if row is None:
+            return False
+        ids = [id for id in json.loads(row["label_ids"] or "[]")
+               if id != label["id"]]
+        if add:
+            ids.append(label["id"])
+            self.db.execute(
+                "INSERT OR IGNORE INTO labels VALUES (?, ?, ?, ?)",
+                (label["id"], row["board_id"], label.get("name"),
+                 label.get("color")),
+            )
+        self.db.execute(
+            "UPDATE cards SET label_ids = ? WHERE id = ?",
+            (json.dumps(ids), card_id),
+        )
+        return True
+
+    def count_comments(self, card_id):
+        """Recount a card's comments, so replaying an action is harmless"""
+        self.db.execute(
+            "UPDATE cards SET comment_count = (SELECT count(*) FROM comments "
+            "WHERE card_id = cards.id) WHERE id = ?",
+            (card_id,),
+        )
+
+    # Storage
+
+    def save_board(self, board, position=None):
+        # Not an upsert, which needs SQLite 3.24, and not a replace, which
+        # would reset the sync state
+        self.db.execute(
+            "INSERT OR IGNORE INTO boards (id) VALUES (?)", (board["id"],)
+        )
+        self.db.execute(
+            "UPDATE boards SET name = ?, closed = ?, "
+            "position = coalesce(?, position) WHERE id = ?",
+            (board.get("name"), board.get("closed", False), position,
+             board["id"]),
+        )
+
+    def load_board(self, board):
+        """Replace everything mirrored for a board with a full load"""
+        id = board["id"]
+        self.remove_board_contents(id)
+        self.save_board(board)
+        self.save_lists(id, board.get("lists", []))
+        self.save_labels(id, board.get("labels", []))
+        for card in board.get("cards", []):
+            self.save_card(card)
+        for action in board["comments"]:
+            self.save_comment(id, action)
+        self.db.execute(
+            "UPDATE boards SET last_action_id = ?, synced_at = ? "
+            "WHERE id = ?",
+            (board["last_action_id"], time(), id),
+        )
+        self.db.commit()
+
+    def save_lists(self, board_id, lists):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO lists VALUES (?, ?, ?, ?, ?)",
+            [(l["id"], l.get("idBoard", board_id), l.get("name"),
+              l.get("closed", False), l.get("pos")) for l in lists],
+        )
+        kept = {l["id"] for l in lists}
+        self.db.executemany("DELETE FROM lists WHERE id = ?", [
+            (row["id"],)
+            for row in self.db.execute(
+                "SELECT id FROM lists WHERE board_id = ?", (board_id,)
+            )
+            if row["id"] not in kept
+        ])
+
+    def save_labels(self, board_id, labels):
+        self.db.execute("DELETE FROM labels WHERE board_id = ?", (board_id,))
+        self.db.executemany(
+            "INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?)",
+            [(l["id"], l.get("idBoard", board_id), l.get("name"),
+              l.get("color")) for l in labels],
+        )
+
+    def save_card(self, card):
+        self.db.execute(
+            "INSERT OR REPLACE INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (card["id"], card.get("idBoard"), card.get("idList"),
+             card.get("name"), card.get("closed", False), card.get("pos"),
+             json.dumps(card.get("idLabels", [])),
+             card.get("badges", {}).get("comments", 0)),
+        )
+
+    def save_comment(self, board_id, action):
+        data = action.get("data", {})
+        self.db.execute(
+            "INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?, ?)",
+            (action["id"], data.get("card", {}).get("id"), board_id,
+             action.get("memberCreator", {}).get("fullName"),
+             action.get("date"), data.get("text")),
+        )
+
+    def remove_card(self, id, board_id=None):
+        """Drop a card and its comments, if it is still on the board"""
+        if board_id:
+            row = self.db.execute(
+                "SELECT board_id FROM cards WHERE id = ?", (id,)
+            ).fetchone()
+            if row and row["board_id"] != board_id:
+                return
+        self.db.execute("DELETE FROM cards WHERE id = ?", (id,))
+        self.db.execute("DELETE FROM comments WHERE card_id = ?", (id,))
+
+    def remove_board_contents(self, id):
+        for table in ("lists", "cards", "labels", "comments"):
+            self.db.execute(f"DELETE FROM {table} WHERE board_id = ?", (id,))
+
+    def remove_boards_except(self, ids):
+        """Forget the boards the member no longer has"""
+        for row in self.db.execute("SELECT id FROM boards").fetchall():
+            id = row["id"]
+            if id not in ids:
+                self.remove_board_contents(id)
+                self.db.execute("DELETE FROM boards WHERE id = ?", (id,))
+
+    # Queries
+
+    def staleness(self):
+        """Seconds since the least recently synced board was synced"""
+        row = self.db.execute(
+            "SELECT count(*) AS boards, min(synced_at) AS oldest FROM boards"
+        ).fetchone()
+        if not row["boards"] or row["oldest"] is None:
+            return None
+        return time() - row["oldest"]
+
+    def boards(self):
+        return self.db.execute(
+            "SELECT * FROM boards ORDER BY position"
+        ).fetchall()
+
+    def board(self, id):
+        return self.db.execute(
+            "SELECT * FROM boards WHERE id = ?", (id,)
+        ).fetchone()
+
+    def lists(self, board_id, closed=True):
+        query = "SELECT * FROM lists WHERE board_id = ?"
+        if not closed:
+            query += " AND NOT closed"
+        return self.db.execute(
+            query + " ORDER BY pos, id", (board_id,)
+        ).fetchall()
+
+    def list(self, id):
+        return self.db.execute(
+            "SELECT * FROM lists WHERE id = ?", (id,)
+        ).fetchone()
+
+    def cards(self, list_id, closed=True):
+        query = "SELECT * FROM cards WHERE list_id = ?"
+        if not closed:
+            query += " AND NOT closed"
+        return self.db.execute(
+            query + " ORDER BY pos, id", (list_id,)
+        ).fetchall()
+
+    def board_cards(self, board_id):
+        return self.db.execute(
+            "SELECT * FROM cards WHERE board_id = ? ORDER BY pos, id",
+            (board_id,),
+        ).fetchall()
+
+    def card(self, id):
+        return self.db.execute(
+            "SELECT * FROM cards WHERE id = ?", (id,)
+        ).fetchone()
+
+    def labels(self, board_id):
+        return self.db.execute(
+            "SELECT * FROM labels WHERE board_id = ?", (board_id,)
+        ).fetchall()
+
+    def comments(self, card_id):
+        return self.db.execute(
+            "SELECT * FROM comments WHERE card_id = ? "
+            "ORDER BY date DESC, id DESC",
+            (card_id,),
+        ).fetchall()
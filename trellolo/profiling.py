@@ -0,0 +1,85 @@
+import cProfile
+import os
+import pstats
+from time import perf_counter
+
+
+class CommandProfile:
+    """CPU profile of a command, split into network wait and Python time
+
+    Only the thread running the command is profiled. With --concurrency,
+    the time spent waiting for the workers counts as network time.
+    """
+
+    # Modules whose hottest functions are reported
+    modules = ("trellolo/trello.py", "trellolo/board.py")
+    # Functions that mostly wait on the network, by file and name
+    network = (
+        ("trellolo/trelloapi.py", "send_rate_limited"),
+        ("requests/models.py", "generate"),
+        ("concurrent/futures/_base.py", "result"),
+        ("selectors.py", "select"),
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self.profiler = cProfile.Profile()
+        self.wall = 0
+
+    def start(self):
+        self.started = perf_counter()
+        self.profiler.enable()
+
+    def stop(self):
+        """Stop profiling and write the stats file"""
+        self.profiler.disable()
+        self.wall = perf_counter() - self.started
+        self.profiler.dump_stats(self.path)
+
+    @staticmethod
+    def matches(filename, suffix):
+        return filename.replace(os.sep, "/").endswith(suffix)
+
+    def entries(self):
+        """Yield (file, line, function) and (calls, own, cumulative) times"""
+        stats = pstats.Stats(self.profiler).stats
+        for func, (_, calls, own, cumulative, _) in stats.items():
+            yield func, (calls, own, cumulative)
+
+    def network_time(self):
+        return sum(
+            cumulative
+            for (filename, _, name), (_, _, cumulative) in self.entries()
+            if any(
+                name == func and self.matches(filename, suffix)
+                for suffix, func in self.network
+            )
+        )
+
+    def hot_functions(self, limit=10):
+        """Return the functions of the reported modules with most own time"""
+        found = [
+            (func, times) for func, times in self.entries()
+            if any(self.matches(func[0], m) for m in self.modules)
+        ]
+        found.sort(key=lambda entry: -entry[1][1])
+        return found[:limit]
+
+    def report(self, limit=10):
+        """Yield the lines summing up the profile"""
+        network = min(self.network_time(), self.wall)
+        yield (
+            f"Profile written to {self.path}: {self.wall:.3f}s, "
+            f"{network:.3f}s waiting on the network, "
+            f"{self.wall - network:.3f}s in Python"
+        )
+        yield f"Hot functions in {', '.join(self.modules)}:"
+        yield f"{'calls':>9}{'own s':>9}{'total s':>9}  function"
+        for (filename, line, name), (calls, own, cumulative) in (
+            self.hot_functions(limit)
+        ):
+            module = os.path.basename(filename)
+            yield (
+                f"{calls:>9}{own:>9.3f}{cumulative:>9.3f}  "
+                f"{module}:{line}({name})"
+            )
@@ -0,0 +1,125 @@
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from time import monotonic, time
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking
+
+    Reserving a token returns how long the caller must wait before
+    sending, so the same bucket can gate threads and coroutines.
+    """
+
+    # The rate never drops below this share of the published limit
+    min_share = 0.1
+    # Share of the published limit regained after each success
+    recovery = 0.05
+
+    def __init__(self, limit, interval, clock=monotonic):
+        self.limit = limit
+        self.interval = interval
+        self.max_rate = limit / interval
+        self.rate = self.max_rate
+        self.tokens = limit
+        self.clock = clock
+        self.updated = clock()
+        self.blocked_until = 0
+        self.lock = Lock()
+
+    def refill(self, now):
+        elapsed = now - self.updated
+        self.tokens = min(self.limit, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take a token and return the seconds to wait before using it"""
+        with self.lock:
+            now = self.clock()
+            self.refill(now)
+            self.tokens -= 1
+            delay = max(0, -self.tokens / self.rate)
+            return max(delay, self.blocked_until - now)
+
+    def sync(self, remaining=None):
+        """Speed back up, trusting the server's count of remaining tokens"""
+        with self.lock:
+            self.refill(self.clock())
+            if remaining is not None:
+                self.tokens = min(self.tokens, remaining)
+            self.rate = min(
+                self.max_rate, self.rate + self.max_rate * self.recovery
+            )
+
+    def throttle(self, wait):
+        """Back off after a 429: pause everyone and slow the refill rate"""
+        with self.lock:
+            now = self.clock()
+            self.refill(now)
+            self.tokens = min(self.tokens, 0)
+            self.rate = max(self.max_rate * self.min_share, self.rate / 2)
+            self.blocked_until = max(self.blocked_until, now + wait)
+            return max(0, self.blocked_until - now)
+
+
+class RateLimiter:
+    """Single gate for Trello traffic, per API key and per token
+
+    Trello allows 300 requests per 10 seconds for each API key and 100
+    requests per 10 seconds for each token.
+    """
+
+    key_limit = (300, 10)
+    token_limit = (100, 10)
+    max_retries = 5
+
+    def __init__(self, clock=monotonic):
+        self.clock = clock
+        self.buckets = {}
+        self.lock = Lock()
+
+    def bucket(self, kind, value):
+        with self.lock:
+            if (kind, value) not in self.buckets:
+                limit = self.key_limit if kind == "key" else self.token_limit
+                self.buckets[(kind, value)] = TokenBucket(
+                    *limit, clock=self.clock
+                )
+            return self.buckets[(kind, value)]
+
+    def buckets_for(self, key, token):
+        return [self.bucket("key", key), self.bucket("token", token)]
+
+    def reserve(self, key, token):
+        """Return the seconds to wait before sending the next request"""
+        return max(b.reserve() for b in self.buckets_for(key, token))
+
+    def update(self, key, token, headers):
+        """Sync the buckets with Trello's rate limit response headers"""
+        buckets = zip(("key", "token"), self.buckets_for(key, token))
+        for kind, bucket in buckets:
+            remaining = headers.get(f"x-rate-limit-api-{kind}-remaining")
+            if remaining is not None and remaining.isdigit():
+                bucket.sync(int(remaining))
+            else:
+                bucket.sync()
+
+    def throttled(self, key, token, retry_after=None, attempt=0):
+        """Back off after a 429 and return the seconds to wait"""
+        wait = self.retry_after(retry_after)
+        if wait is None:
+            wait = min(2 ** attempt, 30)
+        return max(b.throttle(wait) for b in self.buckets_for(key, token))
+
+    @staticmethod
+    def retry_after(value):
+        """Parse a Retry-After header given in seconds or as a date"""
+        if not value:
+            return None
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0, parsedate_to_datetime(value).timestamp() - time())
+        except (TypeError, ValueError):
+            return None
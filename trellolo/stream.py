@@ -0,0 +1,103 @@
+import codecs
+import json
+
+
+class JSONStream:
+    """Incremental JSON parser over an iterator of response body chunks
+
+    Arrays and objects are walked one element or member at a time, so only
+    the value being decoded and the current chunk are ever held in memory.
+    """
+
+    whitespace = " \t\n\r"
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.raw_decode = json.JSONDecoder().raw_decode
+        self.buffer = ""
+        self.pos = 0
+        self.done = False
+
+    def fill(self):
+        """Read the next chunk, returning False at the end of the body"""
+        if self.done:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.done = True
+            text = self.decoder.decode(b"", final=True)
+        else:
+            text = self.decoder.decode(chunk)
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character"""
+        while True:
+            while (
+                self.pos < len(self.buffer)
+                and self.buffer[self.pos] in self.whitespace
+            ):
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(
+                f"Expected {char!r} but found {self.buffer[self.pos]!r}"
+            )
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete value"""
+        first = self.peek()
+        while True:
+            try:
+                value, end = self.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number or literal may carry on into the next chunk
+            if end == len(self.buffer) and first not in '{["':
+                if self.fill():
+                    continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Walk an array, stopping at each element until it is consumed"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            char = self.peek()
+            self.pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' but found {char!r}")
+
+    def members(self):
+        """Walk an object, yielding each key with the stream at its value"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError(f"Expected ',' or '}}' but found {char!r}")
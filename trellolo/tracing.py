@@ -0,0 +1,120 @@
+import json
+import re
+from collections import defaultdict
+from math import ceil
+from threading import Lock
+from time import perf_counter, time
+
+
+class RequestTracer:
+    """Calls hooks with a record of every API request once it completes
+
+    A record holds the method, the endpoint with IDs replaced by
+    placeholders, the status, the response bytes, the latency in
+    milliseconds, how many 429s were retried, and whether the cache
+    answered ("fresh") or confirmed its copy ("revalidated"). Nothing is
+    recorded while no hook is registered.
+    """
+
+    hooks = []
+    object_id = re.compile(r"/[0-9a-fA-F]{24}(?=/|$)")
+    token_path = re.compile(r"^/1/tokens/[^/]+")
+
+    @classmethod
+    def add_hook(cls, hook):
+        cls.hooks.append(hook)
+
+    @classmethod
+    def remove_hook(cls, hook):
+        if hook in cls.hooks:
+            cls.hooks.remove(hook)
+
+    @classmethod
+    def endpoint(cls, url):
+        """Return the template of a url, e.g. /1/cards/{id}/actions"""
+        url = cls.object_id.sub("/{id}", url)
+        # Keep tokens out of traces
+        return cls.token_path.sub("/1/tokens/{token}", url)
+
+    @classmethod
+    def start(cls, method, url):
+        """Return a record to complete, or None when nobody listens"""
+        if not cls.hooks:
+            return None
+        return {
+            "time": round(time(), 3),
+            "method": method,
+            "endpoint": cls.endpoint(url),
+            "retries": 0,
+            "started": perf_counter(),
+        }
+
+    @classmethod
+    def finish(cls, record, status, size=0, cache=None):
+        """Complete a record and hand it to every hook"""
+        if record is None:
+            return
+        started = record.pop("started")
+        record.update(
+            status=status, bytes=size, cache=cache,
+            ms=round((perf_counter() - started) * 1000, 3),
+        )
+        for hook in list(cls.hooks):
+            hook(record)
+
+
+class RequestStats:
+    """Hook summing up the requests made to each endpoint"""
+
+    def __init__(self):
+        self.records = defaultdict(list)
+        self.lock = Lock()
+
+    def __call__(self, record):
+        with self.lock:
+            key = (record["method"], record["endpoint"])
+            self.records[key].append(record)
+
+    @staticmethod
+    def percentile(values, share):
+        """Return the nearest-rank percentile of sorted values"""
+        return values[max(ceil(share * len(values)) - 1, 0)]
+
+    def summary(self):
+        """Yield the lines of a table, slowest endpoints in total first"""
+        yield (
+            f"{'endpoint':<40}{'count':>6}{'errors':>7}{'cached':>7}"
+            f"{'retries':>8}{'KiB':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        )
+        rows = sorted(
+            self.records.items(),
+            key=lambda item: -sum(r["ms"] for r in item[1]),
+        )
+        for (method, endpoint), records in rows:
+            latencies = sorted(r["ms"] for r in records)
+            errors = sum(1 for r in records if r["status"] >= 400)
+            cached = sum(1 for r in records if r["cache"])
+            retries = sum(r["retries"] for r in records)
+            size = sum(r["bytes"] for r in records) / 1024
+            yield (
+                f"{method + ' ' + endpoint:<40}{len(records):>6}"
+                f"{errors:>7}{cached:>7}{retries:>8}{size:>9.1f}"
+                f"{self.percentile(latencies, 0.5):>9.1f}"
+                f"{self.percentile(latencies, 0.95):>9.1f}"
+            )
+
+
+class TraceFile:
+    """Hook appending each record to a file as a line of JSON"""
+
+    def __init__(self, path):
+        self.file = open(path, "a")
+        self.lock = Lock()
+
+    def __call__(self, record):
+        line = json.dumps(record) + "\n"
+        with self.lock:
+            self.file.write(line)
+
+    def close(self):
+        self.file.close()
@@ -1,200 +1,148 @@
 class TrelloObject:
-    """Base Trello object"""
+    """Base Trello object
 
-    show_details = False
+    Models are slotted records built straight from the API dict, so big
+    boards cost no per-instance __dict__ and no property calls.
+    """
 
-    def __init__(self, info: dict = {}):
-        self.name = info.get("name")
-        self.id = info.get("id")
-
-    @property
-    def id(self):
-        return self._id
+    __slots__ = ("id", "name", "show_details")
+    # API fields needed to build and render the object
+    api_fields = ["name"]
 
-    @id.setter
-    def id(self, _id):
-        self._id = _id
+    @classmethod
+    def projection(cls):
+        """Return the fields to request for this object"""
+        return ",".join(cls.api_fields)
 
-    @property
-    def name(self):
-        return self._name
+    def __init__(self, info=None):
+        info = info or {}
+        self.id = info.get("id")
+        self.name = info.get("name")
+        self.show_details = False
 
-    @name.setter
-    def name(self, val):
-        self._name = val
+    @classmethod
+    def fields(cls):
+        """Return the names of the attributes of the object"""
+        return [
+            name
+            for klass in reversed(cls.__mro__)
+            for name in getattr(klass, "__slots__", ())
+        ]
 
     def __repr__(self):
-        return str(vars(self))
+        return str({name: getattr(self, name) for name in self.fields()})
 
     def __str__(self):
+        return "\n".join(self.lines())
+
+    def header(self):
         return f"{self.__class__.__name__} ID: {self.id} | Name: {self.name}"
 
+    def lines(self):
+        """Yield the rendered object one line at a time"""
+        yield self.header()
+
 
 class Board(TrelloObject):
     """Trello Board object"""
 
-    def __init__(self, info: dict = {}):
-        super().__init__(info)
-        self.lists = info.get("lists", [])
-
-    @property
-    def lists(self):
-        return self._lists
+    __slots__ = ("lists",)
 
-    @lists.setter
-    def lists(self, lists):
-        self._lists = lists
-        if lists and isinstance(lists[0], dict):
-            self._lists = [List(l) for l in lists]
+    def __init__(self, info=None):
+        info = info or {}
+        self.id = info.get("id")
+        self.name = info.get("name")
+        self.show_details = False
+        self.lists = [List(l) for l in info.get("lists", ())]
 
-    def __str__(self):
-        data = [f"{super().__str__()}"]
+    def lines(self):
+        yield self.header()
         if self.show_details:
-            if self.lists:
-                data.extend([str(l) for l in self.lists])
-            else:
-                data.append(
-                    "  🗋 No lists are on this board.\n"
-                )  # pragma: no cover
-        return "\n".join(data)
+            # Streamed lists are generators, so check as they go by
+            empty = True
+            for l in self.lists:
+                empty = False
+                yield from l.lines()
+            if empty:
+                yield "  🗋 No lists are on this board.\n"  # pragma: no cover
 
 
 class List(TrelloObject):
     """Trello List object"""
 
-    def __init__(self, info: dict = {}):
-        super().__init__(info)
-        self.cards = info.get("cards", [])
-        self.board_id = info.get("idBoard")
+    __slots__ = ("cards", "board_id")
+    api_fields = ["name", "idBoard"]
 
-    @property
-    def cards(self):
-        return self._cards
-
-    @cards.setter
-    def cards(self, val=[]):
-        self._cards = val
-        if val and isinstance(val[0], dict):
-            self._cards = [Card(c) for c in val]
-
-    @property
-    def board_id(self):
-        return self._board_id
-
-    @board_id.setter
-    def board_id(self, board_id: str):
-        self._board_id = board_id
+    def __init__(self, info=None):
+        info = info or {}
+        self.id = info.get("id")
+        self.name = info.get("name")
+        self.show_details = False
+        self.cards = [Card(c) for c in info.get("cards", ())]
+        self.board_id = info.get("idBoard")
 
-    def __str__(self):
-        data = [f"  📄 {super().__str__()}"]
+    def lines(self):
+        yield f"  📄 {self.header()}"
         if self.show_details:
-            if self.cards:
-                data.extend([str(c) for c in self.cards])
-            else:
-                data.append("    🃠 No cards are on this list.")
-        data.append("")
-        return "\n".join(data)
+            empty = True
+            for c in self.cards:
+                empty = False
+                yield from c.lines()
+            if empty:
+                yield "    🃠 No cards are on this list."
+        yield ""
 
 
 class Card(TrelloObject):
     """Trello Card object"""
 
-    def __init__(self, info: dict = {}, has_comments=False):
-        super().__init__(info)
+    __slots__ = ("board_id", "list_id", "comments", "labels", "has_comments")
+    api_fields = ["name", "idBoard", "idList", "labels", "badges"]
+
+    def __init__(self, info=None):
+        info = info or {}
+        self.id = info.get("id")
+        self.name = info.get("name")
+        self.show_details = False
         self.board_id = info.get("idBoard")
         self.list_id = info.get("idList")
-        self.comments = info.get("comments", [])
-        self.labels = info.get("labels", [])
-        if isinstance(info, dict) and info.get("badges"):
-            self.has_comments = bool(info.get("badges").get("comments", 0))
-        else:
-            self.has_comments = 0
-
-    @property
-    def board_id(self):
-        return self._board_id
+        self.comments = []
+        self.labels = [Label(l) for l in info.get("labels", ())]
+        badges = info.get("badges")
+        self.has_comments = bool(badges.get("comments", 0)) if badges else 0
 
-    @board_id.setter
-    def board_id(self, board_id: str):
-        self._board_id = board_id
-
-    @property
-    def list_id(self):
-        return self._list_id
-
-    @list_id.setter
-    def list_id(self, list_id: str):
-        self._list_id = list_id
-
-    @property
-    def comments(self):
-        return self._comments
-
-    @comments.setter
-    def comments(self, comments=[]):
-        self._comments = comments
-
-    @property
-    def has_comments(self):
-        return self._has_comments
-
-    @has_comments.setter
-    def has_comments(self, info: bool = False):
-        self._has_comments = info
-
-    @property
-    def labels(self):
-        return self._labels
-
-    @labels.setter
-    def labels(self, labels=[]):
-        self._labels = [Label(l) for l in labels]
-
-    def __str__(self):
-        data = [f"    🃪 {super().__str__()}"]
+    def lines(self):
+        yield f"    🃪 {self.header()}"
         if self.labels:
-            data.append(
+            yield (
                 f"{' '*5} 🏷  Label(s): "
                 f"{[ l.colour for l in self.labels ]}"
             )
-        if self.comments:
-            data.extend([str(c).rstrip() for c in self.comments])
+        for c in self.comments:
+            yield from (line.rstrip() for line in c.lines())
         # else:
-        #     data.append(f"{' '*8}💭  No comments on card")
-        return "\n".join(data)
+        #     yield f"{' '*8}💭  No comments on card"
 
 
 class Comment(TrelloObject):
     """Trello Comment object"""
 
-    def __init__(self, info={}):
-        super().__init__({
-            "name": info.get("memberCreator").get("fullName"),
-            "id": info.get("id")
-        })
-        self.date = info.get("date")
-        self.text = info.get("data").get("text")
-
-    @property
-    def date(self):
-        return self._date
+    __slots__ = ("date", "text")
+    api_fields = ["date", "data"]
+    member_fields = ["fullName"]
 
-    @date.setter
-    def date(self, date=""):
-        self._date = date
-
-    @property
-    def text(self):
-        return self._text
-
-    @text.setter
-    def text(self, info=""):
-        self._text = info
+    def __init__(self, info=None):
+        info = info or {}
+        self.id = info.get("id")
+        self.name = info.get("memberCreator", {}).get("fullName")
+        self.show_details = False
+        self.date = info.get("date")
+        self.text = info.get("data", {}).get("text")
 
-    def __str__(self):
-        return str(
+    def lines(self):
+        yield str(
             f"{' '*8}💭  " +
-            super().__str__() +
+            self.header() +
             f" | Date: {self.date}"
             f" | Text: {self.text}"
         )
@@ -203,26 +151,13 @@ class Comment(TrelloObject):
 class Label(TrelloObject):
     """Trello Label object"""
 
-    _id_board = ""
+    __slots__ = ("colour", "id_board")
+    api_fields = ["name", "color", "idBoard"]
 
-    def __init__(self, info: dict = {}):
-        super().__init__(info)
+    def __init__(self, info=None):
+        info = info or {}
+        self.id = info.get("id")
+        self.name = info.get("name")
+        self.show_details = False
         self.colour = info.get("color")
-        if not self.id_board:
-            self.id_board = info.get("idBoard")
-
-    @property
-    def colour(self):
-        return self._colour
-
-    @colour.setter
-    def colour(self, colour: str):
-        self._colour = colour
-
-    @property
-    def id_board(self):
-        return self._id_board
-
-    @id_board.setter
-    def id_board(self, id_board=""):
-        self._id_board = id_board
+        self.id_board = info.get("idBoard") or ""
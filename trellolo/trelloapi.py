@@ -1,4 +1,15 @@
+from threading import Lock
+from time import sleep
+from urllib.parse import urlencode
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from trellolo.cache import ResponseCache
+from trellolo.credentials import CredentialCache
+from trellolo.decoder import JSONDecoder
+from trellolo.ratelimit import RateLimiter
+from trellolo.tracing import RequestTracer
 
 
 class TrelloAPI:
@@ -8,6 +19,21 @@ class TrelloAPI:
     base_url = "https://api.trello.com"
     url = None
     initialized = False
+    pool_size = 10
+    # Trello accepts up to 10 sub-requests per /1/batch call
+    batch_limit = 10
+    session = None
+    # Sends requests instead of the session if set, e.g. a Cassette
+    transport = None
+    cache = ResponseCache
+    credentials = CredentialCache
+    decoder = JSONDecoder
+    rate_limiter = RateLimiter()
+    tracer = RequestTracer
+    # Decoded response body bytes received by this process
+    bytes_received = 0
+    _session_lock = Lock()
+    _stats_lock = Lock()
 
     @classmethod
     def __init__(cls, key="", token="", url=""):
@@ -17,38 +43,274 @@ class TrelloAPI:
             cls.token = token
 
     @classmethod
-    def send_request(
+    def get_session(cls):
+        """Return the shared keep-alive session, creating it if needed"""
+        if cls.transport is not None:
+            return cls.transport
+        with cls._session_lock:
+            if cls.session is None:
+                cls.session = cls.new_session()
+        return cls.session
+
+    @classmethod
+    def new_session(cls):
+        """Create a keep-alive session backed by a connection pool"""
+        adapter = HTTPAdapter(
+            pool_connections=cls.pool_size, pool_maxsize=cls.pool_size
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+        return session
+
+    @classmethod
+    def set_pool_size(cls, size):
+        """Resize the connection pool used by the shared session"""
+        if size != cls.pool_size:
+            cls.pool_size = size
+            cls.close()
+
+    @classmethod
+    def close(cls):
+        """Close the shared session and its pooled connections"""
+        if cls.session is not None:
+            cls.session.close()
+            cls.session = None
+
+    @classmethod
+    def connection_stats(cls):
+        """Return how many connections were opened and reused"""
+        opened = requests_sent = 0
+        if cls.session is not None:
+            # The same adapter is mounted for both schemes
+            adapters = {id(a): a for a in cls.session.adapters.values()}
+            for adapter in adapters.values():
+                pools = adapter.poolmanager.pools
+                for pool_key in pools.keys():
+                    pool = pools.get(pool_key)
+                    if pool is None:
+                        continue  # pragma: no cover
+                    opened += pool.num_connections
+                    requests_sent += pool.num_requests
+        return {
+            "opened": opened,
+            "reused": max(requests_sent - opened, 0),
+            "requests": requests_sent,
+        }
+
+    @classmethod
+    def build_request(
         cls, url="", method="GET", headers={}, params={}, data={},
         key="", token=""
     ):
-        """Make a generic Trello API call."""
+        """Combine the arguments of a Trello API call."""
 
-        headers["Accept"] = "application/json"
         # Add the API Key and token to the query string
         if not key:
             key = cls.api_key
         if not token:
             token = cls.token
-        params.update({"key": key, "token": token})
+        params = dict(params, key=key, token=token)
 
-        # Combine args
-        kwargs = {
+        return {
             "method": method.upper(),
             "url": cls.url + url,
-            "headers": headers,
-            "params": params,
+            "headers": dict(headers),
+            "params": {k: v for k, v in params.items() if v is not None},
             "data": data,
         }
 
-        resp = requests.request(**kwargs)
-        if resp.status_code == 200:
-            return resp.json()
+    @classmethod
+    def check_response(cls, status, content, key=None, token=None):
+        """Raise an HTTPError for any unsuccessful response
+
+        On a 401, the credentials the request sent are validated again on
+        the next run.
+        """
+        if status == 401 and key and token:
+            cls.credentials.forget(key, token)
+        if status != 200:
+            if isinstance(content, bytes):
+                content = content.decode(errors="replace")
+            raise requests.HTTPError(f"{status}: {content}")
+
+    @staticmethod
+    def credentials_sent(kwargs):
+        """Return the key and token a request was built with"""
+        return kwargs["params"].get("key"), kwargs["params"].get("token")
+
+    @classmethod
+    def cache_lookup(cls, kwargs):
+        """Return the cache key and entry of a GET, adding validators"""
+        if kwargs["method"] != "GET":
+            return None, None
+        cache_key = cls.cache.key("GET", kwargs["url"], kwargs["params"])
+        entry = cls.cache.load(cache_key)
+        if entry and not cls.cache.fresh(entry):
+            kwargs["headers"].update(cls.cache.validators(entry))
+        return cache_key, entry
+
+    @classmethod
+    def cache_update(cls, url, kwargs, cache_key, headers, content, body):
+        """Cache a GET response, or invalidate what a mutation touched"""
+        if cache_key:
+            cls.cache.save(cache_key, url, headers, content, body)
         else:
-            raise requests.HTTPError(f"{resp.status_code}: {resp.text}")
+            cls.cache.invalidate(url, kwargs["params"], content)
+
+    @classmethod
+    def count_bytes(cls, size):
+        # Counted on TrelloAPI, so the async client adds to the same total
+        with cls._stats_lock:
+            TrelloAPI.bytes_received += size
+
+    @classmethod
+    def send_rate_limited(cls, kwargs, trace=None):
+        """Send a request through the rate limiter, retrying on 429s"""
+        key, token = cls.credentials_sent(kwargs)
+        limiter = cls.rate_limiter
+        for attempt in range(limiter.max_retries + 1):
+            sleep(limiter.reserve(key, token))
+            resp = cls.get_session().request(**kwargs)
+            if not kwargs.get("stream"):
+                cls.count_bytes(len(resp.content))
+            if resp.status_code != 429:
+                limiter.update(key, token, resp.headers)
+                break
+            wait = limiter.throttled(
+                key, token, resp.headers.get("Retry-After"), attempt
+            )
+            if attempt == limiter.max_retries:
+                # Keep the body of the last 429 for the caller's error
+                break
+            resp.close()
+            if trace is not None:
+                trace["retries"] = attempt + 1
+            sleep(wait)
+        return resp
+
+    @classmethod
+    def send_request(
+        cls, url="", method="GET", headers={}, params={}, data={},
+        key="", token=""
+    ):
+        """Make a generic Trello API call."""
+        kwargs = cls.build_request(
+            url, method, headers, params, data, key, token
+        )
+        trace = cls.tracer.start(kwargs["method"], url)
+        cache_key, entry = cls.cache_lookup(kwargs)
+        if entry and cls.cache.fresh(entry):
+            cls.tracer.finish(trace, 200, cache="fresh")
+            return entry["body"]
+
+        resp = cls.send_rate_limited(kwargs, trace)
+        if entry and resp.status_code == 304:
+            cls.tracer.finish(trace, 304, cache="revalidated")
+            return cls.cache.revalidated(cache_key, entry)
+        content = resp.content
+        cls.tracer.finish(trace, resp.status_code, len(content))
+        cls.check_response(
+            resp.status_code, content, *cls.credentials_sent(kwargs)
+        )
+        body = cls.decoder.decode(content)
+        cls.cache_update(url, kwargs, cache_key, resp.headers, content, body)
+        return body
+
+    @classmethod
+    def stream_request(cls, url="", params={}, chunk_size=64 * 1024):
+        """Make a GET call, yielding the body in chunks as it arrives.
+
+        Streamed responses bypass the cache, since they are too big to keep.
+        """
+        kwargs = cls.build_request(url, "GET", {}, params, {}, "", "")
+        kwargs["stream"] = True
+        trace = cls.tracer.start("GET", url)
+        with cls.send_rate_limited(kwargs, trace) as resp:
+            if resp.status_code != 200:
+                cls.tracer.finish(trace, resp.status_code, len(resp.content))
+                cls.check_response(
+                    resp.status_code, resp.content,
+                    *cls.credentials_sent(kwargs)
+                )
+            size = 0
+            for chunk in resp.iter_content(chunk_size):
+                cls.count_bytes(len(chunk))
+                size += len(chunk)
+                yield chunk
+            cls.tracer.finish(trace, resp.status_code, size)
+
+    @classmethod
+    def batch_chunks(cls, calls):
+        """Split (url, params) GETs into chunks that fit one batch call"""
+        return [
+            calls[i:i + cls.batch_limit]
+            for i in range(0, len(calls), cls.batch_limit)
+        ]
+
+    @staticmethod
+    def batch_params(calls):
+        """Encode (url, params) GETs as the urls of a /1/batch call"""
+        urls = []
+        for url, params in calls:
+            # Sub-requests are relative to the API version
+            if url.startswith("/1/"):
+                url = url[2:]
+            # urlencode escapes commas so they don't split the urls list
+            urls.append(f"{url}?{urlencode(params)}" if params else url)
+        return {"urls": ",".join(urls)}
+
+    @classmethod
+    def split_batch(cls, resp, strict=True):
+        """Return the body of every sub-request, raising on failures.
+
+        If strict is off, failed sub-requests give None instead.
+        """
+        results = []
+        for item in resp:
+            if "200" in item:
+                results.append(item["200"])
+                continue
+            if not strict:
+                results.append(None)
+                continue
+            status = item.get("statusCode") or next(iter(item), "")
+            message = item.get("message") or item.get(status, "")
+            cls.check_response(status, message)
+        return results
+
+    @classmethod
+    def send_batch(cls, calls, mapper=map, strict=True):
+        """Coalesce independent (url, params) GETs into /1/batch calls.
+
+        Results are returned in the same order as the calls. A custom
+        mapper function can be supplied to send the batch calls in parallel.
+        """
+        if len(calls) == 1 and strict:
+            url, params = calls[0]
+            return [cls.send_request(url, params=params)]
+
+        def send(chunk):
+            return cls.split_batch(cls.send_request(
+                "/1/batch", params=cls.batch_params(chunk)
+            ), strict)
+
+        return [
+            result
+            for results in mapper(send, cls.batch_chunks(calls))
+            for result in results
+        ]
 
     @classmethod
     def valid_credentials(cls, key, token):
-        """Validate the API key"""
-        cls.send_request(url=f"/1/tokens/{token}", key=key, token=token)
+        """Validate the API key, unless it was validated recently"""
+        if not cls.credentials.valid(key, token):
+            cls.send_request(url=f"/1/tokens/{token}", key=key, token=token)
+            cls.credentials.save(key, token)
         cls.initialized = True
         return True
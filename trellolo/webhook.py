@@ -0,0 +1,142 @@
+import hmac
+from base64 import b64encode
+from hashlib import sha1
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from trellolo.cache import ResponseCache
+from trellolo.decoder import JSONDecoder
+from trellolo.mirror import Mirror
+from trellolo.trelloapi import TrelloAPI
+
+
+def signature(secret, body, callback_url):
+    """Return the X-Trello-Webhook header Trello signs a callback with"""
+    digest = hmac.new(
+        secret.encode(), body + callback_url.encode(), sha1
+    ).digest()
+    return b64encode(digest).decode()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Answer Trello's URL checks and the actions it posts"""
+
+    def do_HEAD(self):
+        # Trello checks the callback URL answers before creating a webhook
+        self.reply(200)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.server.verify(
+            body, self.headers.get("X-Trello-Webhook", "")
+        ):
+            return self.reply(401)
+        try:
+            payload = JSONDecoder.decode(body)
+        except ValueError:
+            return self.reply(400)
+        try:
+            self.server.apply(payload)
+        except Exception as e:
+            # Trello retries callbacks that fail
+            self.server.log(f"Unable to apply callback: {e}")
+            return self.reply(500)
+        self.reply(200)
+
+    def reply(self, status):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass  # applied actions are reported by the server
+
+
+class WebhookServer(HTTPServer):
+    """HTTP server applying Trello webhook callbacks as they arrive
+
+    Each action is replayed on the local mirror, when it holds the board,
+    and drops the cached responses that mention what the action touched.
+    Callbacks are handled one at a time, in the serving thread.
+    """
+
+    description = "trellolo webhook serve"
+    # Actions that change objects in place, leaving the rest of the board
+    in_place_actions = {
+        "updateCard", "updateList", "commentCard", "updateComment",
+        "deleteComment", "addLabelToCard", "removeLabelFromCard",
+    }
+
+    def __init__(self, address, callback_url, secret, log=print):
+        super().__init__(address, WebhookHandler)
+        self.callback_url = callback_url
+        self.secret = secret
+        self.log = log
+        self.created = []
+
+    def verify(self, body, header):
+        """Check a callback was signed with the API secret"""
+        return hmac.compare_digest(
+            signature(self.secret, body, self.callback_url), header
+        )
+
+    @classmethod
+    def touched_ids(cls, board_id, action):
+        """Return the IDs of the objects an action changed"""
+        ids = [
+            value["id"] for key, value in action.get("data", {}).items()
+            if key != "board" and isinstance(value, dict) and "id" in value
+        ]
+        if action.get("type") not in cls.in_place_actions or not ids:
+            ids.append(board_id)
+        return ids
+
+    def apply(self, payload):
+        """Apply the action of a callback to the cache and the mirror"""
+        action = payload.get("action") or {}
+        board_id = (
+            action.get("data", {}).get("board", {}).get("id")
+            or payload.get("model", {}).get("id")
+        )
+        if not action.get("id") or not board_id:
+            return
+        ResponseCache.invalidate(
+            "", {}, " ".join(self.touched_ids(board_id, action))
+        )
+        mirror = Mirror()
+        try:
+            board = mirror.board(board_id)
+            if board is not None and board["synced_at"] is not None:
+                # The cursor stays put, so a sync replays missed actions
+                mirror.apply_actions(board_id, [action], advance=False)
+        finally:
+            mirror.close()
+        self.log(f"{board_id}: {action.get('type')} {action['id']} applied")
+
+    def register(self, board_ids):
+        """Point a webhook at this server for each board, if none does yet"""
+        existing = {
+            hook["idModel"]: hook
+            for hook in TrelloAPI.send_request(
+                f"/1/tokens/{TrelloAPI.token}/webhooks"
+            ) or []
+            if hook.get("callbackURL") == self.callback_url
+        }
+        for id in board_ids:
+            if id in existing:
+                continue
+            self.created.append(TrelloAPI.send_request(
+                method="POST", url="/1/webhooks", params={
+                    "callbackURL": self.callback_url,
+                    "idModel": id,
+                    "description": self.description,
+                },
+            ))
+        return len(board_ids)
+
+    def unregister(self):
+        """Delete the webhooks this server created"""
+        while self.created:
+            hook = self.created.pop()
+            TrelloAPI.send_request(
+                method="DELETE", url=f"/1/webhooks/{hook['id']}"
+            )